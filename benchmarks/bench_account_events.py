@@ -0,0 +1,83 @@
+"""Balance fetches and stale wallet screens with and without account events
+
+Usage: python -m benchmarks.bench_account_events [--users 200] [--taps 20] [--deposit-every 5]
+
+--users users each open the wallet screen --taps times while a deposit
+lands every --deposit-every taps, against an in-process API, four ways:
+the default 10s balance cache alone, no cache (a fetch per tap), and the
+event-driven cache with deposit events that carry only the amount (the
+cached balances are dropped) or the new balance (they are patched). Counts
+upstream balance fetches and screens that showed a balance other than the
+account's. The mapping itself is covered by tests/test_account_events.py.
+"""
+import argparse
+import asyncio
+import logging
+from decimal import Decimal
+from typing import Dict, Optional
+
+import httpx
+
+from src.config.config import EVENT_CACHE_INVALIDATIONS
+from src.services import api_service
+from src.services.account_events import BALANCES, AccountEvents
+from src.services.cache import ResponseCache
+from src.services.http_client import close_http_client, use_http_client
+
+def balances(entries: Dict[str, str]) -> Dict:
+    return {"data": [{"walletId": wallet_id, "balance": balance} for wallet_id, balance in entries.items()]}
+
+async def run(args: argparse.Namespace, ttl: float, deposit_field: Optional[str]) -> Dict[str, int]:
+    truth = {f"token-{i}": Decimal("100.00") for i in range(args.users)}
+    fetches = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal fetches
+        fetches += 1
+        token = request.headers["authorization"].split(" ", 1)[1]
+        return httpx.Response(200, json=balances({f"w-{token}": f"{truth[token]:.2f}"}))
+
+    api_service.response_cache = ResponseCache(100000, {BALANCES: ttl})
+    events = AccountEvents(api_service.response_cache, EVENT_CACHE_INVALIDATIONS)
+    stale = 0
+
+    async def user(token: str) -> None:
+        nonlocal stale
+        for tap in range(1, args.taps + 1):
+            response = await api_service.api_request("get", BALANCES, token=token)
+            if Decimal(response["data"][0]["balance"]) != truth[token]:
+                stale += 1
+            if tap % args.deposit_every == 0:
+                truth[token] += Decimal("25")
+                if deposit_field is not None:
+                    value = "25" if deposit_field == "amount" else f"{truth[token]:.2f}"
+                    events.apply([token], "deposit", {"id": f"{token}-{tap}", "walletId": f"w-{token}", deposit_field: value})
+            await asyncio.sleep(0)
+
+    use_http_client(httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    try:
+        await asyncio.gather(*(user(token) for token in truth))
+    finally:
+        await close_http_client(None)
+    return {"fetches": fetches, "stale": stale}
+
+async def main(args: argparse.Namespace) -> None:
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    taps = args.users * args.taps
+    print(f"{args.users} users x {args.taps} wallet screens, a deposit every {args.deposit_every}")
+    for label, ttl, deposit_field in (
+        ("10s cache, no events", 10, None),
+        ("no cache", 0, None),
+        ("amount events, 300s", 300, "amount"),
+        ("balance events, 300s", 300, "balance")
+    ):
+        result = await run(args, ttl, deposit_field)
+        print(f"{label:22} {result['fetches']:6} balance fetches for {taps} screens, "
+              f"{result['stale']:5} showed a stale balance")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--taps", type=int, default=20)
+    parser.add_argument("--deposit-every", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
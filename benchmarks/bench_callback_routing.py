@@ -0,0 +1,95 @@
+"""Cost of routing a callback query: regex pattern scan vs CallbackRouter
+
+Usage: python -m benchmarks.bench_callback_routing [--actions 120] [--lookups 100000]
+
+Builds one conversation state with --actions callback actions, a quarter of
+them carrying a payload. "regex" registers one CallbackQueryHandler per
+action, with "^action$" or "^action_.*$" patterns, and finds the handler the
+way ConversationHandler does, by calling check_update on each in turn.
+"router" registers a single CallbackRouter. Both are fed the same random
+callback queries. Also checks that every query reaches its own action's
+handler: a prefix pattern registered before an action that starts with the
+same name takes that action's queries.
+"""
+import argparse
+import random
+import time
+from typing import Callable, Dict, List, Tuple
+
+from telegram import CallbackQuery, Update, User
+from telegram.ext import CallbackQueryHandler
+
+from src.ui.callbacks import CallbackRouter, pack
+
+def make_handler(action: str) -> Callable:
+    async def handler(update, context):
+        return action
+    handler.action = action
+    return handler
+
+def make_update(update_id: int, data: str) -> Update:
+    user = User(1, "Bench", False)
+    return Update(update_id, callback_query=CallbackQuery(str(update_id), user, "bench", data=data))
+
+def build_actions(count: int) -> List[Tuple[str, bool]]:
+    """(action, takes a payload); includes a prefix pair like set_default / set_default_wallet"""
+    actions = [("set_default", True), ("set_default_wallet", False)]
+    for i in range(count - len(actions)):
+        actions.append((f"action_{i:03d}", i % 4 == 0))
+    return actions
+
+def regex_handlers(actions: List[Tuple[str, bool]], handlers: Dict[str, Callable]) -> List[CallbackQueryHandler]:
+    return [
+        CallbackQueryHandler(handlers[action], pattern=f"^{action}_.*$" if payload else f"^{action}$")
+        for action, payload in actions
+    ]
+
+def regex_route(registered: List[CallbackQueryHandler], update: Update):
+    for handler in registered:
+        if handler.check_update(update):
+            return handler.callback
+    return None
+
+def time_routes(route: Callable, updates: List[Update]) -> float:
+    started = time.perf_counter()
+    for update in updates:
+        route(update)
+    return (time.perf_counter() - started) / len(updates)
+
+def main(args: argparse.Namespace) -> None:
+    actions = build_actions(args.actions)
+    handlers = {action: make_handler(action) for action, _ in actions}
+    random.seed(7)
+
+    regex_updates, router_updates, expected = [], [], []
+    for i in range(args.lookups):
+        action, payload = random.choice(actions)
+        wallet_id = f"{i:08x}-0000-4000-8000-000000000000" if payload else ""
+        regex_updates.append(make_update(i, f"{action}_{wallet_id}" if payload else action))
+        router_updates.append(make_update(i, pack(action, wallet_id)))
+        expected.append(action)
+
+    registered = regex_handlers(actions, handlers)
+    router = CallbackRouter(handlers)
+
+    def router_route(update: Update):
+        return router.check_update(update)
+
+    regex_time = time_routes(lambda update: regex_route(registered, update), regex_updates)
+    router_time = time_routes(router_route, router_updates)
+
+    regex_wrong = sum(1 for update, action in zip(regex_updates, expected)
+                      if getattr(regex_route(registered, update), "action", None) != action)
+    router_wrong = sum(1 for update, action in zip(router_updates, expected)
+                       if getattr(router_route(update), "action", None) != action)
+
+    print(f"{len(actions)} actions, {args.lookups:,} callback queries")
+    print(f"regex scan: {regex_time * 1e6:.2f}us per query, {regex_wrong:,} routed to the wrong handler")
+    print(f"router:     {router_time * 1e6:.2f}us per query, {router_wrong:,} routed to the wrong handler")
+    print(f"speedup: {regex_time / router_time:.0f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--actions", type=int, default=120)
+    parser.add_argument("--lookups", type=int, default=100000)
+    main(parser.parse_args())
@@ -0,0 +1,170 @@
+"""Throughput of the signed event webhook at a steady event rate
+
+Usage: python -m benchmarks.bench_events [--rate 1000] [--seconds 5] [--duplicates 0.05]
+
+Runs EventIngress with each of --orgs mock Copperx organizations (see
+benchmarks.mock_copperx_api) having --chats-per-org logged-in chats, and
+formats the deposit message for every chat an event reaches. --senders
+processes POST signed deposit events at --rate per second in total, each
+over --connections keep-alive connections, and resend a --duplicates
+fraction of them the way a retrying sender would. Reports the rate
+sustained, HTTP statuses, duplicates dropped and delivery latency from
+receipt, and checks that a bad signature is refused.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import random
+import time
+from typing import Dict, List, Tuple
+from urllib.parse import urlsplit
+
+from benchmarks.mock_copperx_api import MockUser
+from src.services.events import EventIngress, sign, SIGNATURE_HEADER
+from src.ui import messages
+
+SECRET = "bench-events-secret"
+
+def deposit_event(event_id: int, organization_id: str) -> bytes:
+    """A Pusher webhook batch with one deposit event on the organization's channel"""
+    return json.dumps({
+        "time_ms": int(time.time() * 1000),
+        "events": [{
+            "name": "client_event",
+            "channel": f"private-org-{organization_id}",
+            "event": "deposit",
+            "data": json.dumps({"id": f"dep-{event_id}", "amount": f"{10 + event_id % 90}.00"})
+        }]
+    }).encode()
+
+class Connection:
+    """A keep-alive HTTP/1.1 connection written by hand; httpx costs more CPU per request than the ingress"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, host: str, path: str):
+        self.reader = reader
+        self.writer = writer
+        self.head = f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+
+    @classmethod
+    async def open(cls, url: str) -> "Connection":
+        parts = urlsplit(url)
+        reader, writer = await asyncio.open_connection(parts.hostname, parts.port)
+        return cls(reader, writer, parts.netloc, parts.path)
+
+    async def post(self, body: bytes, signature: str) -> int:
+        self.writer.write(
+            f"{self.head}{SIGNATURE_HEADER}: {signature}\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+        )
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        status_line, _, headers = head.decode("latin-1").partition("\r\n")
+        length = 0
+        for line in headers.split("\r\n"):
+            name, _, value = line.partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        if length:
+            await self.reader.readexactly(length)
+        return int(status_line.split(" ")[1])
+
+    def close(self) -> None:
+        self.writer.close()
+
+async def send_events(url: str, args: argparse.Namespace, sender: int) -> Tuple[Dict[int, int], int, float]:
+    """POST every --senders'th event on a fixed schedule; returns status counts, the forged request's status and the send time"""
+    statuses: Dict[int, int] = {}
+    organizations = [MockUser(i, 0).organization_id for i in range(args.orgs)]
+    total = int(args.rate * args.seconds)
+    random.seed(sender)
+    connections = [await Connection.open(url) for _ in range(args.connections)]
+    forged_body = deposit_event(0, organizations[0])
+    forged = await connections[0].post(forged_body, sign("wrong", forged_body))
+    bodies: asyncio.Queue = asyncio.Queue()
+
+    async def post(connection: Connection) -> None:
+        while True:
+            body = await bodies.get()
+            if body is None:
+                return
+            status = await connection.post(body, sign(SECRET, body))
+            statuses[status] = statuses.get(status, 0) + 1
+
+    posting = [asyncio.create_task(post(connection)) for connection in connections]
+    started = time.perf_counter()
+    for i in range(sender, total, args.senders):
+        # A resend repeats an earlier event's id, as a retried delivery would
+        event_id = random.randrange(i) if i and random.random() < args.duplicates else i
+        delay = started + i / args.rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        bodies.put_nowait(deposit_event(event_id, organizations[event_id % args.orgs]))
+    for _ in connections:
+        bodies.put_nowait(None)
+    await asyncio.gather(*posting)
+    elapsed = time.perf_counter() - started
+    for connection in connections:
+        connection.close()
+    return statuses, forged, elapsed
+
+def sender_process(url: str, args: argparse.Namespace, sender: int, results: multiprocessing.Queue) -> None:
+    results.put(asyncio.run(send_events(url, args, sender)))
+
+async def main(args: argparse.Namespace) -> None:
+    logging.getLogger().setLevel(logging.WARNING)
+    chats = {
+        MockUser(i, 0).organization_id: {i * args.chats_per_org + k for k in range(args.chats_per_org)}
+        for i in range(args.orgs)
+    }
+    texts: List[str] = []
+
+    def deliver(organization_id, event, data, user_ids) -> None:
+        text = messages.DEPOSIT_RECEIVED.format(amount=data.get("amount"))
+        texts.extend(text for _ in user_ids)
+
+    ingress = EventIngress(SECRET, lambda organization_id: chats.get(organization_id, set()), deliver,
+                           host="127.0.0.1", port=0, queue_size=args.queue_size, workers=args.workers)
+    await ingress.start()
+    url = f"http://127.0.0.1:{ingress.server.port}{ingress.path}"
+
+    results: multiprocessing.Queue = multiprocessing.Queue()
+    senders = [
+        multiprocessing.Process(target=sender_process, args=(url, args, sender, results))
+        for sender in range(args.senders)
+    ]
+    statuses: Dict[int, int] = {}
+    elapsed = 0.0
+    try:
+        for sender in senders:
+            sender.start()
+        for _ in senders:
+            sent_statuses, forged_status, sent_elapsed = await asyncio.to_thread(results.get)
+            for status, count in sent_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+            elapsed = max(elapsed, sent_elapsed)
+        for sender in senders:
+            sender.join()
+    finally:
+        await ingress.stop()
+
+    stats = ingress.stats()
+    total = int(args.rate * args.seconds)
+    print(f"bad signature -> {forged_status}")
+    print(f"{total} events offered at {args.rate}/s, sent in {elapsed:.2f}s ({total / elapsed:,.0f}/s), "
+          f"HTTP statuses {statuses}")
+    print(f"{stats['delivered']} delivered to {len(texts)} chats, {stats['duplicates']} duplicates dropped, "
+          f"delivery p50={stats['delivery_p50_ms']}ms p95={stats['delivery_p95_ms']}ms")
+    print(f"ingress stats: {stats}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=1000, help="events per second")
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--duplicates", type=float, default=0.05, help="fraction of events sent again")
+    parser.add_argument("--orgs", type=int, default=1000)
+    parser.add_argument("--chats-per-org", type=int, default=2)
+    parser.add_argument("--senders", type=int, default=2, help="sending processes")
+    parser.add_argument("--connections", type=int, default=20, help="connections per sender")
+    parser.add_argument("--queue-size", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=4)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,171 @@
+"""Memory use of /export on a 100k-transfer history, from the API pages to the uploaded document
+
+Usage: python -m benchmarks.bench_export [--transfers 100000] [--page-size 100]
+
+First checks that CSV and NDJSON exports read back to the transfers they
+were made from. Then exports --transfers generated transfers, which are
+never all held at once, and reports the peak Python allocation
+(tracemalloc) next to collecting the pages into one string first. Last,
+the file is sent with Bot.send_document to a local server that counts the
+bytes it receives, once as a StreamedInputFile and once as a plain
+InputFile, which python-telegram-bot reads whole before uploading.
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import logging
+import resource
+import time
+import tracemalloc
+from typing import Dict, List
+
+from telegram import Bot, InputFile
+
+from src.services.export import CSV, CSV_COLUMNS, NDJSON, StreamedInputFile, export_transfers, file_size
+
+def make_transfer(number: int) -> Dict:
+    return {
+        "id": f"{number:032x}",
+        "createdAt": f"2025-01-{number % 28 + 1:02d}T12:00:00.000Z",
+        "type": ("DEPOSIT", "WITHDRAWAL", "EMAIL_TRANSFER", "WALLET_TRANSFER")[number % 4],
+        "status": "SUCCESS",
+        "amount": f"{number % 1000 + 1}.{number % 100:02d}",
+        "currency": "USDC",
+        "totalFee": "0.10",
+        "feeCurrency": "USDC",
+        "destinationCountry": "usa",
+        "note": f"invoice, \"{number}\"",
+        "sourceAccount": {"walletAddress": f"0x{number:040x}", "network": "137"},
+        "destinationAccount": {"walletAddress": f"0x{number + 1:040x}", "payeeEmail": f"payee{number}@example.com"}
+    }
+
+def fake_api(total: int):
+    pages = 0
+
+    async def fetch(token: str, page: int, limit: int) -> Dict:
+        nonlocal pages
+        pages += 1
+        start = (page - 1) * limit
+        return {
+            "data": [make_transfer(number) for number in range(start, min(total, start + limit))],
+            "hasMore": start + limit < total
+        }
+
+    return fetch, lambda: pages
+
+def rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+async def check_formats() -> None:
+    fetch, _ = fake_api(250)
+    output, count = await export_transfers(fetch, "token", CSV, page_size=100)
+    rows = list(csv.reader(io.TextIOWrapper(output, encoding="utf-8", newline="")))
+    assert count == 250 and len(rows) == 251 and rows[0] == [column for column, _ in CSV_COLUMNS]
+    assert rows[8][rows[0].index("note")] == 'invoice, "7"', rows[8]
+    assert rows[8][rows[0].index("to_email")] == "payee7@example.com"
+
+    output, count = await export_transfers(fetch, "token", NDJSON, page_size=100)
+    assert [json.loads(line) for line in output] == [make_transfer(number) for number in range(250)]
+
+    empty, _ = fake_api(0)
+    output, count = await export_transfers(empty, "token", CSV)
+    assert count == 0 and output.read().decode().strip() == ",".join(column for column, _ in CSV_COLUMNS)
+
+    reports: List[int] = []
+    await export_transfers(fetch, "token", CSV, on_progress=reports.append, page_size=10, progress_interval=0)
+    assert reports == list(range(10, 251, 10)), reports
+    print("format checks passed")
+
+async def collect_all(fetch, fmt: str, page_size: int) -> int:
+    """The naive export: every page kept, then joined into one document"""
+    pages, page = [], 1
+    while True:
+        response = await fetch("token", page, page_size)
+        pages.append(response["data"])
+        if not response["hasMore"]:
+            break
+        page += 1
+    document = "".join(json.dumps(t) + "\n" for transfers in pages for t in transfers).encode()
+    return len(document)
+
+class CountingBotAPI:
+    """Answers sendDocument after reading the upload in chunks, counting its bytes"""
+
+    def __init__(self):
+        self.received = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        head = await reader.readuntil(b"\r\n\r\n")
+        length = next(int(line.split(b":", 1)[1]) for line in head.split(b"\r\n")
+                      if line.lower().startswith(b"content-length:"))
+        while length:
+            chunk = await reader.read(min(length, 65536))
+            length -= len(chunk)
+            self.received += len(chunk)
+        body = json.dumps({"ok": True, "result": {
+            "message_id": 1, "date": int(time.time()), "chat": {"id": 1, "type": "private"}
+        }}).encode()
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nConnection: close\r\n"
+                     b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+        await writer.drain()
+        writer.close()
+
+async def main(args: argparse.Namespace) -> None:
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    await check_formats()
+    print(f"{args.transfers} transfers, {args.page_size} per page; RSS before: {rss_mb():.0f} MB")
+
+    results = {}
+    for fmt in (CSV, NDJSON):
+        fetch, pages = fake_api(args.transfers)
+        tracemalloc.start()
+        started = time.perf_counter()
+        output, count = await export_transfers(fetch, "token", fmt, page_size=args.page_size)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        size = file_size(output)
+        results[fmt] = output
+        print(f"streamed {fmt:6} {count} rows, {pages()} pages, {size / 1e6:.1f} MB file in {elapsed:.1f}s, "
+              f"peak allocated {peak / 1e6:.1f} MB, on disk: {output._rolled}")
+    print(f"RSS after streaming both: {rss_mb():.0f} MB")
+
+    fetch, _ = fake_api(args.transfers)
+    tracemalloc.start()
+    size = await collect_all(fetch, NDJSON, args.page_size)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"collected ndjson {size / 1e6:.1f} MB document, peak allocated {peak / 1e6:.1f} MB")
+
+    api = CountingBotAPI()
+    server = await asyncio.start_server(api.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    bot = Bot("123:EXPORT-BENCH", base_url=f"http://127.0.0.1:{port}/bot")
+    async with server:
+        for label, make in (
+            ("StreamedInputFile", lambda output: StreamedInputFile(output, "export.csv")),
+            ("InputFile", lambda output: InputFile(output, filename="export.csv"))
+        ):
+            output = results[CSV]
+            output.seek(0)
+            api.received = 0
+            tracemalloc.start()
+            started = time.perf_counter()
+            await bot.send_document(1, make(output), write_timeout=60)
+            elapsed = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"upload {label:17} {api.received / 1e6:.1f} MB received in {elapsed:.2f}s, "
+                  f"peak allocated {peak / 1e6:.1f} MB")
+    await bot.shutdown()
+    for output in results.values():
+        output.close()
+    print(f"peak RSS: {rss_mb():.0f} MB")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transfers", type=int, default=100000)
+    parser.add_argument("--page-size", type=int, default=100)
+    asyncio.run(main(parser.parse_args()))
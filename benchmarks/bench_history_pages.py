@@ -0,0 +1,137 @@
+"""Latency of paging through transaction history, with and without next-page prefetch
+
+Usage: python -m benchmarks.bench_history_pages [--users 50] [--pages 4] [--api-latency 0.1] [--think-time 1]
+
+Logs N virtual users in (see benchmarks.load_telegram), opens Transaction
+History and taps Next --pages times, reading each page for around
+--think-time seconds, against the mock API answering after --api-latency. Runs once with
+the handler's prefetch and once with it disabled, on different users so no
+cache is shared, and reports how long a Next tap takes to be handled. First
+checks that split_text keeps long pages within Telegram's limit.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import time
+import warnings
+from typing import Dict, List
+
+from benchmarks.bench_views import LOGIN, send
+from benchmarks.load_telegram import VirtualUser, percentile, start_mock_api
+from src.ui.views import MAX_MESSAGE_LENGTH, split_text
+
+def check_split() -> None:
+    rows = [f"📤 ↑ OUT {i}.00 USDC - 01/0{i % 9 + 1}/2025 - SUCCESS\n" for i in range(400)]
+    text = "📜 Transactions, page 2\n\n" + "".join(rows)
+    chunks = split_text(text)
+    assert "".join(chunks) == text
+    assert all(len(chunk.encode("utf-16-le")) // 2 <= MAX_MESSAGE_LENGTH for chunk in chunks)
+    assert all(chunk.endswith("\n") for chunk in chunks), "chunks should break between lines"
+    long_line = "x" * (MAX_MESSAGE_LENGTH * 2 + 5)
+    assert [len(chunk) for chunk in split_text(long_line)] == [MAX_MESSAGE_LENGTH, MAX_MESSAGE_LENGTH, 5]
+    print(f"split_text: {len(text)} characters -> {len(chunks)} messages")
+
+async def read_history(vu: VirtualUser, application, handled, pages: int, think_time: float) -> List[float]:
+    """Log in, open history and page forward; returns the handling time of each Next tap"""
+    for _, kind, value in LOGIN:
+        await send(application, handled, vu.build_update(kind, value))
+    await send(application, handled, vu.build_update("button", "Transaction History"))
+
+    latencies = []
+    for _ in range(pages):
+        await asyncio.sleep(think_time * random.uniform(0.5, 1.5))
+        started = time.perf_counter()
+        await send(application, handled, vu.build_update("button", "Next ➡️"))
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+async def main(args: argparse.Namespace) -> None:
+    check_split()
+    requested_users = args.users
+    # One set of users per run
+    args.users *= 2
+    mock_process, os.environ["API_BASE_URL"] = await start_mock_api(args)
+
+    from telegram import Update
+    from telegram.ext import Application, TypeHandler
+    import server
+    from benchmarks.fake_bot_api import FakeBotAPI
+    from src.services.concurrency import OrderedApplication, UpdateQueue
+    from src.services.http_client import close_http_client, init_http_client
+
+    logging.getLogger().setLevel(logging.WARNING)
+    warnings.filterwarnings("ignore", message="If 'per_message=False'")
+    for name in ("httpx", "telegram", "server", "src.utils.logger"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+
+    fake_api = FakeBotAPI()
+    application = (
+        Application.builder()
+        .token("123456:HISTORY-BENCH")
+        .request(fake_api)
+        .get_updates_request(FakeBotAPI())
+        .application_class(OrderedApplication, kwargs={"max_concurrency": 64})
+        .concurrent_updates(1000)
+        .update_queue(UpdateQueue(1000, 1000))
+        .build()
+    )
+    application.add_handler(server.create_conversation_handler())
+
+    handled: Dict[int, asyncio.Future] = {}
+
+    async def mark_handled(update, context) -> None:
+        future = handled.get(update.update_id)
+        if future is not None and not future.done():
+            future.set_result(None)
+
+    application.add_handler(TypeHandler(Update, mark_handled), group=1000)
+    errors: List[str] = []
+
+    async def record_error(update, context) -> None:
+        errors.append(repr(context.error))
+
+    application.add_error_handler(record_error)
+
+    prefetch = server.prefetch
+    results = {}
+    await application.initialize()
+    await init_http_client(application)
+    await application.start()
+    try:
+        for run, (label, enabled) in enumerate((("no prefetch", False), ("prefetch", True))):
+            server.prefetch = prefetch if enabled else (lambda call: call.close())
+            users = [
+                VirtualUser(run * requested_users + i, application.bot, fake_api, args.otp)
+                for i in range(requested_users)
+            ]
+            latencies = await asyncio.gather(*(
+                read_history(vu, application, handled, args.pages, args.think_time) for vu in users
+            ))
+            results[label] = [latency for user_latencies in latencies for latency in user_latencies]
+    finally:
+        server.prefetch = prefetch
+        await application.stop()
+        await close_http_client(application)
+        await application.shutdown()
+        mock_process.terminate()
+        await mock_process.wait()
+
+    print(f"{requested_users} users x {args.pages} Next taps, API latency {args.api_latency * 1000:.0f}ms, "
+          f"{len(errors)} handler errors")
+    for label, samples in results.items():
+        print(f"{label:12} Next tap p50={percentile(samples, 0.5) * 1000:.1f}ms "
+              f"p95={percentile(samples, 0.95) * 1000:.1f}ms")
+    print(f"API cache: {server.response_cache.stats().get('/transfers')}")
+    if errors:
+        print(f"first error: {errors[0]}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=4)
+    parser.add_argument("--api-latency", type=float, default=0.1)
+    parser.add_argument("--think-time", type=float, default=1.0)
+    parser.add_argument("--otp", default="123456")
+    asyncio.run(main(parser.parse_args()))
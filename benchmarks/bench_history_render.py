@@ -0,0 +1,101 @@
+"""Rendering time of transaction history text, per-row loop versus TransactionRenderer
+
+Usage: python -m benchmarks.bench_history_render [--rows 10000] [--days 90] [--repeat 20]
+
+Builds --rows transfers spread over --days days, with a few malformed
+timestamps, types and missing fields, and checks the renderer produces
+exactly the text of the loop view_transaction_history used to run. Then
+times both on the full list and on a 10-row page, best of --repeat runs,
+with the renderer's day cache cleared before each run so it is not
+measured warm.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List
+
+from src.ui import messages
+from src.ui.transactions import _format_day, history_renderer
+
+def make_transactions(rows: int, days: int) -> List[Dict]:
+    rng = random.Random(7)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    transactions = []
+    for number in range(rows):
+        created_at = start + timedelta(seconds=rng.randrange(days * 86400), microseconds=rng.randrange(1000) * 1000)
+        transactions.append({
+            "id": f"{number:032x}",
+            "type": rng.choice(("DEPOSIT", "WITHDRAWAL", "EMAIL_TRANSFER", "WALLET_TRANSFER", "FEE")),
+            "status": rng.choice(("SUCCESS", "PENDING", "FAILED")),
+            "amount": f"{rng.uniform(1, 1000):.2f}",
+            "createdAt": created_at.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+        })
+    # The odd rows the API may send
+    transactions[1]["createdAt"] = "not a date"
+    transactions[2]["createdAt"] = "2025-02-30T10:00:00Z"
+    transactions[3]["createdAt"] = None
+    del transactions[4]["createdAt"], transactions[4]["amount"], transactions[4]["status"], transactions[4]["type"]
+    transactions[5]["createdAt"] = "2025-03-01T10:00:00+05:30"
+    return transactions
+
+def loop_render(header: str, transactions: List[Dict]) -> str:
+    """The per-row loop view_transaction_history ran before TransactionRenderer"""
+    parts = [header]
+    for tx in transactions:
+        tx_type = tx.get("type", "Unknown")
+        created_at = tx.get("createdAt", "Unknown")
+        if created_at != "Unknown":
+            try:
+                tx_date = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+                created_at = tx_date.strftime("%m/%d/%Y")
+            except:
+                pass
+        direction = ""
+        if tx_type == "DEPOSIT":
+            direction = "↓ IN"
+            icon = "📥"
+        elif tx_type in ["WITHDRAWAL", "EMAIL_TRANSFER", "WALLET_TRANSFER"]:
+            direction = "↑ OUT"
+            icon = "📤"
+        else:
+            icon = "🔄"
+        parts.append(messages.HISTORY_ENTRY.format(
+            icon=icon,
+            direction=direction,
+            amount=tx.get("amount", "0"),
+            created_at=created_at,
+            status=tx.get("status", "Unknown")
+        ))
+    return "".join(parts)
+
+def renderer_render(header: str, transactions: List[Dict]) -> str:
+    return history_renderer.render(header, transactions)
+
+def best_of(render: Callable[[str, List[Dict]], str], transactions: List[Dict], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        _format_day.cache_clear()
+        started = time.perf_counter()
+        render(messages.HISTORY_HEADER, transactions)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main(args: argparse.Namespace) -> None:
+    transactions = make_transactions(args.rows, args.days)
+    expected = loop_render(messages.HISTORY_HEADER, transactions)
+    assert renderer_render(messages.HISTORY_HEADER, transactions) == expected, "renderer output differs from the loop"
+    print(f"{args.rows} rows over {args.days} days render identically ({len(expected)} characters)")
+
+    for label, rows in ((f"{args.rows} rows", transactions), ("10-row page", transactions[:10])):
+        loop = best_of(loop_render, rows, args.repeat)
+        renderer = best_of(renderer_render, rows, args.repeat)
+        print(f"{label:11} loop {loop * 1000:8.3f}ms  renderer {renderer * 1000:8.3f}ms  "
+              f"({loop / renderer:.1f}x, {renderer / len(rows) * 1e6:.2f}us per row)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--repeat", type=int, default=20)
+    main(parser.parse_args())
@@ -0,0 +1,73 @@
+"""Updates/sec with concurrent simulated users, blocking vs pooled async API client
+
+Usage: python -m benchmarks.bench_http_client [--users 500] [--updates 2] [--latency 0.01]
+
+Each simulated update performs one authenticated GET against the local mock
+API, the same shape as the balance lookups done by the wallet and transfer
+handlers. The response cache is disabled so every update reaches the API.
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+import requests
+
+from benchmarks.mock_copperx_api import MockCopperxAPI
+from src.services import api_service
+from src.services.http_client import close_http_client, init_http_client
+
+async def legacy_api_request(url: str, token: str) -> dict:
+    """The previous implementation: a blocking requests call inside a coroutine"""
+    try:
+        response = requests.get(url, headers={"Authorization": f"Bearer {token}"})
+        response.raise_for_status()
+        return response.json()
+    except requests.exceptions.RequestException as e:
+        return {"error": str(e)}
+
+async def run_users(tokens: list, updates: int, handle_update) -> float:
+    """Drive every simulated user concurrently and return updates/sec"""
+    async def user(token: str) -> None:
+        for _ in range(updates):
+            result = await handle_update(token)
+            assert "error" not in result, result
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user(token) for token in tokens))
+    return len(tokens) * updates / (time.perf_counter() - started)
+
+async def main(args: argparse.Namespace) -> None:
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    # The blocking client stalls the caller's loop, so the API must run on its own thread
+    api = MockCopperxAPI(users=args.users, latency=args.latency)
+    base_url = api.start_in_thread()
+    tokens = [api.user(i).token for i in range(args.users)]
+    api_service.API_BASE_URL = base_url
+    api_service.response_cache.ttls = {}
+
+    before = await run_users(
+        tokens, args.updates,
+        lambda token: legacy_api_request(f"{base_url}/wallets/balances", token)
+    )
+
+    await init_http_client(None)
+    try:
+        after = await run_users(
+            tokens, args.updates,
+            lambda token: api_service.api_request("get", "/wallets/balances", token=token)
+        )
+    finally:
+        await close_http_client(None)
+
+    print(f"users={args.users} updates/user={args.updates} upstream latency={args.latency * 1000:.0f}ms")
+    print(f"blocking requests : {before:10.1f} updates/sec")
+    print(f"pooled httpx      : {after:10.1f} updates/sec ({after / before:.1f}x)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--updates", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.01, help="simulated API latency in seconds")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,102 @@
+"""Outbound scheduler against a Bot API that enforces Telegram's rate limits
+
+Usage: python -m benchmarks.bench_outbound [--chats 200] [--notifications 1500] [--transfers 50]
+
+A burst of deposit notifications spread over --chats chats is queued at once,
+followed by transfer results. The stand-in bot answers 429 (RetryAfter) the
+way Telegram does when a chat gets more than one message per second or the
+bot more than 30 per second. The same burst is then sent directly, without
+the scheduler, for comparison.
+"""
+import argparse
+import asyncio
+import random
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict, List
+
+from telegram.error import RetryAfter
+
+from benchmarks.load_telegram import percentile
+from src.services.outbound import NOTIFICATION, TRANSFER, OutboundScheduler
+
+class RateLimitedBot:
+    """Accepts sends within 30/s overall and 1/s per chat, otherwise raises RetryAfter"""
+
+    def __init__(self, round_trip: float = 0.05):
+        self.round_trip = round_trip
+        self.recent: Deque[float] = deque()
+        self.last_per_chat: Dict[int, float] = {}
+        self.accepted = 0
+        self.rejected = 0
+
+    async def send_message(self, chat_id: int, text: str, **kwargs) -> dict:
+        await asyncio.sleep(self.round_trip / 2)
+        now = time.monotonic()
+        while self.recent and now - self.recent[0] > 1:
+            self.recent.popleft()
+        # A little slack for timer jitter, as Telegram's own limits aren't exact either
+        if len(self.recent) >= 31 or now - self.last_per_chat.get(chat_id, -10) < 0.95:
+            self.rejected += 1
+            raise RetryAfter(1)
+        self.recent.append(now)
+        self.last_per_chat[chat_id] = now
+        self.accepted += 1
+        await asyncio.sleep(self.round_trip / 2)
+        return {"chat_id": chat_id, "text": text}
+
+async def scheduled(args: argparse.Namespace) -> None:
+    bot = RateLimitedBot()
+    scheduler = OutboundScheduler()
+    scheduler.start(bot)
+    latencies: Dict[str, List[float]] = defaultdict(list)
+
+    async def timed(lane: str, future: asyncio.Future, queued_at: float) -> None:
+        if await future is not None:
+            latencies[lane].append(time.monotonic() - queued_at)
+
+    started = time.monotonic()
+    waits = []
+    for i in range(args.notifications):
+        chat_id = random.randrange(args.chats)
+        future = scheduler.send_message(chat_id, f"🎉 Deposit Received! {i} USDC", lane=NOTIFICATION)
+        waits.append(timed("notification", future, time.monotonic()))
+    for i in range(args.transfers):
+        future = scheduler.send_message(10_000 + i, f"Success! Transfer {i}", lane=TRANSFER)
+        waits.append(timed("transfer", future, time.monotonic()))
+    await asyncio.gather(*waits)
+    elapsed = time.monotonic() - started
+    await scheduler.stop()
+
+    print(f"scheduled: {bot.accepted} Bot API calls in {elapsed:.1f}s ({bot.accepted / elapsed:.1f}/s), "
+          f"{bot.rejected} got 429")
+    for lane, samples in latencies.items():
+        print(f"  {lane}: {len(samples)} delivered, p50 {percentile(samples, 0.5):.2f}s, "
+              f"p95 {percentile(samples, 0.95):.2f}s")
+    print(f"  stats: {scheduler.stats()}")
+
+async def direct(args: argparse.Namespace) -> None:
+    bot = RateLimitedBot()
+    random.seed(1)
+    chats = [random.randrange(args.chats) for _ in range(args.notifications)] + [10_000 + i for i in range(args.transfers)]
+
+    async def send(chat_id: int) -> None:
+        try:
+            await bot.send_message(chat_id, "text")
+        except RetryAfter:
+            pass
+
+    await asyncio.gather(*(send(chat_id) for chat_id in chats))
+    print(f"direct:    {bot.accepted} delivered, {bot.rejected} got 429 and were lost")
+
+async def main(args: argparse.Namespace) -> None:
+    random.seed(1)
+    await scheduled(args)
+    await direct(args)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chats", type=int, default=200)
+    parser.add_argument("--notifications", type=int, default=1500)
+    parser.add_argument("--transfers", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
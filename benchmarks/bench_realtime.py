@@ -0,0 +1,178 @@
+"""Sockets and memory used by real-time notifications as logged-in users grow
+
+Usage: python -m benchmarks.bench_realtime [--users 1000] [--chats-per-org 2]
+
+Runs the mock Copperx API and a mock Pusher server (benchmarks.mock_pusher)
+in their own processes so they don't count towards the bot's RSS. Channels
+are authorised through server.authorize_channel against the mock API.
+
+"shared" is the bot's PusherSubscriber: one connection for the process, one
+channel per organization, with --chats-per-org Telegram users logged in to
+each. On that connection it then publishes one event per organization and
+counts deliveries, drops the connection and times the resubscribe, and logs
+everyone out and checks that no channel is left subscribed. "per-user" then
+gives every logged-in user their own Pusher connection, which is what one
+client per user costs once it actually subscribes.
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from multiprocessing.connection import Connection
+from typing import Any, Callable, List
+
+from benchmarks.load_telegram import start_mock_api
+from benchmarks.mock_copperx_api import MockUser
+from benchmarks.mock_pusher import MockPusher
+
+def rss_kb() -> int:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+def serve_pusher(conn: Connection) -> None:
+    """Mock Pusher process: answers (command, *args) tuples sent over conn"""
+    async def serve() -> None:
+        pusher = MockPusher()
+        conn.send(await pusher.start())
+        loop = asyncio.get_running_loop()
+        while True:
+            command, *args = await loop.run_in_executor(None, conn.recv)
+            if command == "stop":
+                await pusher.stop()
+                conn.send(None)
+                return
+            if command == "publish":
+                conn.send(await pusher.publish(*args))
+            elif command == "disconnect":
+                await pusher.disconnect_all(*args)
+                conn.send(None)
+            elif command == "stats":
+                conn.send({
+                    "connections": len(pusher.sockets),
+                    "peak_connections": pusher.peak_connections,
+                    "channels": pusher.subscribed_channels(),
+                    "rejected": pusher.rejected
+                })
+    asyncio.run(serve())
+
+async def call(conn: Connection, *command) -> Any:
+    conn.send(command)
+    return await asyncio.get_running_loop().run_in_executor(None, conn.recv)
+
+async def wait_for(condition: Callable[[], Any], timeout: float = 60) -> float:
+    started = time.perf_counter()
+    while not await condition():
+        if time.perf_counter() - started > timeout:
+            raise TimeoutError("condition not reached")
+        await asyncio.sleep(0.02)
+    return time.perf_counter() - started
+
+async def main(args: argparse.Namespace) -> None:
+    args.api_latency = 0.0
+    mock_process, os.environ["API_BASE_URL"] = await start_mock_api(args)
+    conn, child_conn = multiprocessing.Pipe()
+    pusher_process = multiprocessing.Process(target=serve_pusher, args=(child_conn,), daemon=True)
+    pusher_process.start()
+    url = await asyncio.get_running_loop().run_in_executor(None, conn.recv)
+
+    import server
+    from src.services.http_client import close_http_client, init_http_client
+    from src.services.realtime import PusherSubscriber
+
+    logging.getLogger().setLevel(logging.WARNING)
+    for name in ("httpx", "server", "src.utils.logger"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+
+    tokens = [MockUser(i, 0).token for i in range(args.users)]
+    organizations = [f"org-{i}" for i in range(args.users)]
+    users = [(i * args.chats_per_org + k, i) for i in range(args.users) for k in range(args.chats_per_org)]
+    delivered: List[int] = []
+
+    def on_event(organization_id, event, data, user_ids) -> None:
+        delivered.append(len(user_ids))
+
+    async def settled(subscribers: List[PusherSubscriber], channels: int) -> bool:
+        stats = await call(conn, "stats")
+        return stats["channels"] == channels and all(s.socket_id for s in subscribers)
+
+    await init_http_client(None)
+    try:
+        steps = sorted({max(1, args.users // 4), max(1, args.users // 2), args.users})
+        print(f"{len(users)} Telegram users in {args.users} organizations")
+        print(f"{'':10} {'orgs':>6} {'sockets':>8} {'channels':>9} {'RSS +KiB':>9}")
+
+        # One shared connection
+        baseline = rss_kb()
+        shared = PusherSubscriber(url, server.authorize_channel, on_event)
+        shared.start()
+        subscribed = 0
+        for count in steps:
+            for user_id, index in users[subscribed:count * args.chats_per_org]:
+                shared.subscribe(user_id, organizations[index], tokens[index])
+            subscribed = count * args.chats_per_org
+            await wait_for(lambda: settled([shared], count))
+            stats = await call(conn, "stats")
+            print(f"{'shared':10} {count:6} {stats['connections']:8} {stats['channels']:9} {rss_kb() - baseline:9}")
+
+        # Fan-out: one event per organization reaches each of its chats
+        started = time.perf_counter()
+        for organization_id in organizations:
+            await call(conn, "publish", f"private-org-{organization_id}", "deposit", {"amount": "25"})
+        await wait_for(lambda: asyncio.sleep(0, len(delivered) == args.users))
+        elapsed = time.perf_counter() - started
+        print(f"fan-out: {len(delivered)} events -> {sum(delivered)} chat deliveries in {elapsed:.2f}s")
+
+        # Reconnect: every channel is authorised and subscribed again on the new socket
+        old_socket = shared.socket_id
+        await call(conn, "disconnect", 4200)
+        elapsed = await wait_for(lambda: asyncio.sleep(0, shared.socket_id not in (None, old_socket)))
+        elapsed += await wait_for(lambda: settled([shared], args.users))
+        print(f"reconnect: {args.users} channels resubscribed in {elapsed:.2f}s")
+
+        # Logout: channels go once their last member leaves
+        for user_id, _ in users[::args.chats_per_org]:
+            shared.unsubscribe(user_id)
+        stats = await call(conn, "stats")
+        print(f"half the chats logged out: {stats['channels']} channels still subscribed")
+        for user_id, _ in users:
+            shared.unsubscribe(user_id)
+        await wait_for(lambda: settled([shared], 0))
+        stats = await call(conn, "stats")
+        print(f"everyone logged out: {stats['channels']} channels, {stats['connections']} socket, "
+              f"{stats['rejected']} rejected subscriptions")
+        print(shared.stats())
+        await shared.stop()
+
+        # One connection per logged-in user
+        baseline = rss_kb()
+        per_user: List[PusherSubscriber] = []
+        for count in steps:
+            for user_id, index in users[len(per_user):count * args.chats_per_org]:
+                subscriber = PusherSubscriber(url, server.authorize_channel, on_event)
+                subscriber.subscribe(user_id, organizations[index], tokens[index])
+                subscriber.start()
+                per_user.append(subscriber)
+            await wait_for(lambda: settled(per_user, count))
+            stats = await call(conn, "stats")
+            print(f"{'per-user':10} {count:6} {stats['connections']:8} {stats['channels']:9} {rss_kb() - baseline:9}")
+        for subscriber in per_user:
+            await subscriber.stop()
+        await wait_for(lambda: settled([], 0))
+        del per_user
+    finally:
+        await close_http_client(None)
+        await call(conn, "stop")
+        pusher_process.join()
+        mock_process.terminate()
+        await mock_process.wait()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000, help="organizations with logged-in users")
+    parser.add_argument("--chats-per-org", type=int, default=2)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,96 @@
+"""Memory held by 100k logged-in sessions: free-form dicts vs slotted UserSession
+
+Usage: python -m benchmarks.bench_session_memory [--sessions 100000] [--with-pusher]
+
+The dict layout is the one server.py used before src.models.session: the whole
+/auth/me payload, the organization id copied next to it and the loose transfer
+fields of a user halfway through a wallet transfer. --with-pusher also gives
+every dict session its own pusher.Pusher client, as setup_pusher_notifications
+used to.
+"""
+import argparse
+import gc
+import tracemalloc
+from typing import Callable
+
+from src.models.session import ProfileSummary, UserSession
+
+def auth_me_payload(i: int) -> dict:
+    """A /auth/me response shaped like Copperx's"""
+    return {
+        "id": f"7c1f5f8e-2a4b-4c3d-9e8f-{i:012d}",
+        "firstName": "Load",
+        "lastName": f"User {i}",
+        "name": f"Load User {i}",
+        "email": f"user{i}@example.com",
+        "profileImage": f"https://cdn.copperx.io/avatars/{i}.png",
+        "organizationId": f"0b6d7e2c-4f3a-4b1d-8c9e-{i:012d}",
+        "organizationName": f"Org {i}",
+        "role": "owner",
+        "status": "active",
+        "type": "individual",
+        "relayerAddress": f"0x{i:040x}",
+        "flags": ["intro", "kyc_reminder"],
+        "walletAddress": f"0x{i + 1:040x}",
+        "walletId": f"2f4e6a8c-1b3d-4e5f-a7b9-{i:012d}",
+        "walletAccountType": "web3_auth_copperx",
+        "createdAt": "2025-01-01T00:00:00.000Z"
+    }
+
+def dict_session(i: int, with_pusher: bool) -> dict:
+    profile = auth_me_payload(i)
+    session = {
+        "email": profile["email"],
+        "token": f"eyJhbGciOiJIUzI1NiJ9.{i:064d}.signature",
+        "profile": profile,
+        "organization_id": profile["organizationId"],
+        "transfer_type": "wallet",
+        "recipient_address": f"0x{i + 2:040x}",
+        "wallet_id": f"w-{i}-0",
+        "transfer_amount": 12.5,
+        "idempotency_key": f"{i:032x}"
+    }
+    if with_pusher:
+        import pusher
+        session["pusher"] = pusher.Pusher(app_id="1", key="key", secret="secret", cluster="eu", ssl=True)
+    return session
+
+def slotted_session(i: int) -> UserSession:
+    profile = auth_me_payload(i)
+    session = UserSession(
+        email=profile["email"],
+        token=f"eyJhbGciOiJIUzI1NiJ9.{i:064d}.signature",
+        profile=ProfileSummary.from_api(profile)
+    )
+    draft = session.start_draft("wallet")
+    draft.recipient_address = f"0x{i + 2:040x}"
+    draft.wallet_id = f"w-{i}-0"
+    draft.amount = 12.5
+    draft.idempotency_key = f"{i:032x}"
+    return session
+
+def measure(build: Callable[[int], object], count: int) -> int:
+    """Bytes still allocated after building count sessions"""
+    gc.collect()
+    tracemalloc.start()
+    sessions = {i: build(i) for i in range(count)}
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del sessions
+    return current
+
+def main(args: argparse.Namespace) -> None:
+    old = measure(lambda i: dict_session(i, args.with_pusher), args.sessions)
+    new = measure(slotted_session, args.sessions)
+
+    print(f"{args.sessions:,} sessions")
+    print(f"dict sessions:    {old / 1024 / 1024:8.1f} MB ({old / args.sessions:,.0f} bytes each)")
+    print(f"slotted sessions: {new / 1024 / 1024:8.1f} MB ({new / args.sessions:,.0f} bytes each)")
+    print(f"saved {100 * (1 - new / old):.0f}%")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=100000)
+    parser.add_argument("--with-pusher", action="store_true", help="include a pusher.Pusher client per dict session")
+    main(parser.parse_args())
@@ -0,0 +1,73 @@
+"""Write throughput of the SQLite session backend at 10k active sessions
+
+Usage: python -m benchmarks.bench_session_sqlite [--sessions 10000] [--rounds 5]
+
+Each round touches every session the way one update does (read, mutate),
+then times the batched flush. Afterwards a fresh SessionStore is opened on
+the same file to time lazy loads, as the bot does on its first update after
+a restart.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from src.models.session import ProfileSummary, UserSession, dump_session, load_session
+from src.services.persistence import SQLiteDatabase, SQLiteSessionBackend
+from src.services.session_store import SessionStore
+
+def make_session(user_id: int) -> UserSession:
+    session = UserSession(
+        email=f"user{user_id}@example.com",
+        token=f"token-{user_id}-" + "x" * 120,
+        profile=ProfileSummary(f"Load {user_id}", f"user{user_id}@example.com", f"org-{user_id}", "Org", "2025-01-01")
+    )
+    session.start_draft("email").recipient_email = "friend@example.com"
+    return session
+
+def open_store(path: str, capacity: int):
+    database = SQLiteDatabase(path)
+    backend = SQLiteSessionBackend(database, flush_interval=1, encode=dump_session, decode=load_session)
+    return database, backend, SessionStore(capacity, 86400, 300, backend=backend)
+
+async def main(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "sessions.sqlite3")
+        database, backend, store = open_store(path, args.sessions * 2)
+
+        started = time.perf_counter()
+        for user_id in range(args.sessions):
+            store[user_id] = make_session(user_id)
+        written = await backend.flush()
+        elapsed = time.perf_counter() - started
+        print(f"initial write: {written} sessions in {elapsed * 1000:.0f}ms ({written / elapsed:,.0f} rows/s)")
+
+        flush_times = []
+        for round_number in range(args.rounds):
+            for user_id in range(args.sessions):
+                store[user_id].draft.amount = round_number
+            started = time.perf_counter()
+            written = await backend.flush()
+            flush_times.append(time.perf_counter() - started)
+
+        best, worst = min(flush_times), max(flush_times)
+        print(f"update flush: {args.sessions} sessions, best {best * 1000:.0f}ms "
+              f"({args.sessions / best:,.0f} rows/s), worst {worst * 1000:.0f}ms")
+        print(f"database size: {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+        database.close()
+
+        # Simulated restart: nothing in memory, everything read back on demand
+        database, backend, store = open_store(path, args.sessions * 2)
+        started = time.perf_counter()
+        restored = sum(1 for user_id in range(args.sessions) if store[user_id].draft.amount == args.rounds - 1)
+        elapsed = time.perf_counter() - started
+        print(f"after restart: {restored}/{args.sessions} sessions lazily loaded in {elapsed * 1000:.0f}ms "
+              f"({elapsed / args.sessions * 1e6:.1f}us per user)")
+        database.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
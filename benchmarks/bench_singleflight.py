@@ -0,0 +1,60 @@
+"""Upstream calls made by a burst of identical concurrent GETs
+
+Usage: python -m benchmarks.bench_singleflight [--callers 100] [--latency 0.05]
+
+Fires N concurrent api_request calls for the same token and endpoint (a
+double-tapped button, or several handlers for one account) and checks that
+they reach the API exactly once.
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from src.services import api_service
+from src.services.http_client import close_http_client, use_http_client
+
+async def main(args: argparse.Namespace) -> None:
+    upstream_calls = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal upstream_calls
+        upstream_calls += 1
+        await asyncio.sleep(args.latency)
+        return httpx.Response(200, json={"data": [{"walletId": "w1", "balance": "10"}]})
+
+    use_http_client(httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    # Measure coalescing alone, not the response cache in front of it
+    api_service.response_cache.ttls = {}
+
+    try:
+        for endpoint in ("/wallets/balances", "/auth/me"):
+            upstream_calls = 0
+            started = time.perf_counter()
+            results = await asyncio.gather(*(
+                api_service.api_request("get", endpoint, token="token-1") for _ in range(args.callers)
+            ))
+            elapsed = time.perf_counter() - started
+
+            assert all(r is results[0] for r in results), "callers received different responses"
+            assert upstream_calls == 1, f"expected 1 upstream call, got {upstream_calls}"
+            print(f"{endpoint:20} {args.callers} callers -> {upstream_calls} upstream call in {elapsed * 1000:.1f}ms")
+
+        # A different token must not share the in-flight request
+        upstream_calls = 0
+        await asyncio.gather(
+            api_service.api_request("get", "/auth/me", token="token-1"),
+            api_service.api_request("get", "/auth/me", token="token-2")
+        )
+        assert upstream_calls == 2, f"expected 2 upstream calls for 2 tokens, got {upstream_calls}"
+        print(f"{'/auth/me':20} 2 tokens -> {upstream_calls} upstream calls")
+        print(api_service.inflight_requests.stats())
+    finally:
+        await close_http_client(None)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--callers", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated API latency in seconds")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,173 @@
+"""Sync cost and query latency of the local transaction index
+
+Usage: python -m benchmarks.bench_transaction_index [--owners 20] [--transfers 5000] [--api-latency 0.1]
+
+First checks the sync rules against an in-process /transfers: a first sync
+indexes one page and the backfill the rest, later syncs fetch only the new
+pages and refresh recent statuses, and filtered queries agree with
+filtering the full list in Python. Then --owners organizations with
+--transfers transfers each are indexed, and filtered searches are timed
+against what answering them from the API would take: every page fetched
+at --api-latency, then filtered.
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from src.services.persistence import SQLiteDatabase
+from src.services.transaction_index import TransactionFilter, TransactionIndex, parse_filter
+
+TYPES = ("DEPOSIT", "WITHDRAWAL", "EMAIL_TRANSFER", "WALLET_TRANSFER")
+STATUSES = ("SUCCESS", "PENDING", "FAILED")
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+def make_transfer(owner: str, number: int) -> Dict:
+    rng = random.Random(f"{owner}-{number}")
+    return {
+        "id": f"{owner}-tx-{number}",
+        "type": rng.choice(TYPES),
+        "status": rng.choice(STATUSES),
+        "amount": f"{rng.uniform(1, 1000):.2f}",
+        "createdAt": (START + timedelta(hours=number)).isoformat().replace("+00:00", "Z")
+    }
+
+class FakeTransfers:
+    """Newest-first /transfers per token, with page/limit paging"""
+
+    def __init__(self, latency: float = 0):
+        self.latency = latency
+        self.transfers: Dict[str, List[Dict]] = {}
+        self.requests = 0
+
+    def add(self, owner: str, count: int) -> None:
+        existing = self.transfers.setdefault(owner, [])
+        start = len(existing)
+        existing[:0] = [make_transfer(owner, number) for number in reversed(range(start, start + count))]
+
+    async def fetch(self, token: str, page: int, limit: int) -> Dict:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        transfers = self.transfers.get(token, [])
+        data = transfers[(page - 1) * limit:page * limit]
+        return {"data": data, "hasMore": page * limit < len(transfers)}
+
+def matches(transfer: Dict, search: TransactionFilter) -> bool:
+    created_at = datetime.fromisoformat(transfer["createdAt"].replace("Z", "+00:00")).timestamp()
+    amount = float(transfer["amount"])
+    return (
+        (not search.types or transfer["type"] in search.types)
+        and (not search.statuses or transfer["status"] in search.statuses)
+        and (search.since is None or created_at >= search.since)
+        and (search.until is None or created_at < search.until)
+        and (search.min_amount is None or amount >= search.min_amount)
+        and (search.max_amount is None or amount <= search.max_amount)
+    )
+
+SEARCHES = (
+    "deposit",
+    "withdrawal success",
+    "email wallet pending min:100",
+    "from:2024-02-01 to:2024-03-15",
+    "deposit success from:2024-03-01 min:10 max:500",
+    "failed max:50"
+)
+
+async def wait_for_backfill(index: TransactionIndex, owners: List[str]) -> None:
+    while not all(index.is_complete(owner) for owner in owners):
+        await asyncio.sleep(0.01)
+
+async def check_sync(path: str) -> None:
+    api = FakeTransfers()
+    index = TransactionIndex(SQLiteDatabase(path), api.fetch, page_size=50, sync_interval=30, backfill_delay=0.05)
+    api.add("org-a", 520)
+
+    assert await index.sync("org-a", "org-a")
+    assert api.requests == 1 and not index.is_complete("org-a"), "a first sync should fetch one page"
+    assert index.page("org-a", 6, 10) is None, "an incomplete index must not answer unfiltered pages it lacks"
+    assert index.page("org-a", 4, 10) is not None
+    await wait_for_backfill(index, ["org-a"])
+    assert api.requests == 11, api.requests
+    assert [t["id"] for t in index.query("org-a", limit=1000)] == [t["id"] for t in api.transfers["org-a"]]
+
+    requests = api.requests
+    api.add("org-a", 7)
+    assert await index.sync("org-a", "org-a") and api.requests == requests, "syncs within the interval are free"
+    index.mark_stale("org-a")
+    api.transfers["org-a"][20]["status"] = "REFUNDED"
+    assert await index.sync("org-a", "org-a")
+    assert api.requests == requests + 1, "7 new transfers fit in one page"
+    assert index.query("org-a", limit=1)[0]["id"] == "org-a-tx-526"
+    assert index.query("org-a", parse_filter("refunded"))[0]["id"] == api.transfers["org-a"][20]["id"]
+
+    index.mark_stale("org-a")
+    api.add("org-a", 120)
+    requests = api.requests
+    assert await index.sync("org-a", "org-a")
+    assert api.requests == requests + 3, "120 new transfers take three pages of 50"
+    assert len(index.query("org-a", limit=10000)) == 647
+
+    for terms in SEARCHES:
+        search = parse_filter(terms)
+        expected = [t["id"] for t in api.transfers["org-a"] if matches(t, search)]
+        assert [t["id"] for t in index.query("org-a", search, limit=10000)] == expected, terms
+    for bad in ("from:yesterday", "min:lots", "colour:red"):
+        try:
+            parse_filter(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"{bad} should not parse")
+
+    await index.stop()
+    index.database.close()
+    print(f"sync checks passed: {index.stats()}")
+
+async def main(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        await check_sync(os.path.join(directory, "check.sqlite3"))
+
+        api = FakeTransfers()
+        owners = [f"org-{i}" for i in range(args.owners)]
+        for owner in owners:
+            api.add(owner, args.transfers)
+        index = TransactionIndex(
+            SQLiteDatabase(os.path.join(directory, "index.sqlite3")), api.fetch, page_size=100, backfill_delay=0
+        )
+        started = time.perf_counter()
+        await asyncio.gather(*(index.sync(owner, owner) for owner in owners))
+        await wait_for_backfill(index, owners)
+        elapsed = time.perf_counter() - started
+        print(f"indexed {args.owners} x {args.transfers} transfers in {elapsed:.1f}s ({api.requests} pages), "
+              f"{os.path.getsize(os.path.join(directory, 'index.sqlite3')) / 1024 / 1024:.1f} MB")
+
+        pages = -(-args.transfers // 100)
+        for terms in SEARCHES:
+            search = parse_filter(terms)
+            timings = []
+            for owner in owners:
+                started = time.perf_counter()
+                transfers, has_more = index.page(owner, 1, 10, search)
+                timings.append(time.perf_counter() - started)
+            timings.sort()
+            print(f"{terms:48} p50={timings[len(timings) // 2] * 1000:.2f}ms p95={timings[int(len(timings) * 0.95)] * 1000:.2f}ms "
+                  f"(API: {pages} pages, ~{pages * args.api_latency:.1f}s)")
+
+        started = time.perf_counter()
+        for owner in owners:
+            index.page(owner, 40, 10)
+        print(f"unfiltered page 40: {(time.perf_counter() - started) / len(owners) * 1000:.2f}ms per owner")
+
+        await index.stop()
+        index.database.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--owners", type=int, default=20)
+    parser.add_argument("--transfers", type=int, default=5000)
+    parser.add_argument("--api-latency", type=float, default=0.1)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,115 @@
+"""Per-update allocations of keyboards and texts, rebuilt inline vs prebuilt
+
+Usage: python -m benchmarks.bench_ui_alloc [--renders 10000]
+
+Each scenario renders what one handler sends: the main menu, the transfer
+menu, an error path's "Back to Transfer Menu" markup and a three-wallet
+"Set Default Wallet" keyboard. "inline" rebuilds them the way the handlers
+used to, "prebuilt" uses src.ui.keyboards and src.ui.messages. The renders
+are kept alive so tracemalloc's traced memory shows how much each one
+allocates, and they are timed separately without tracing.
+"""
+import argparse
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+from src.ui import keyboards, messages
+
+WALLETS = [
+    {"id": f"wallet-{i}", "network": network, "isDefault": i == 0}
+    for i, network in enumerate(("Polygon", "Arbitrum", "Base"))
+]
+
+def inline_main_menu():
+    keyboard = [
+        [InlineKeyboardButton("👛 Wallet Management", callback_data="wallet_menu")],
+        [InlineKeyboardButton("💸 Fund Transfers", callback_data="transfer_menu")],
+        [InlineKeyboardButton("👤 My Profile", callback_data="profile")],
+        [InlineKeyboardButton("🔑 KYC Status", callback_data="kyc_status")],
+        [InlineKeyboardButton("📜 Transaction History", callback_data="transaction_history")],
+        [InlineKeyboardButton("⚙️ Settings", callback_data="settings")],
+        [InlineKeyboardButton("Logout", callback_data="logout")]
+    ]
+    return f"Hello {'Load'}! 👋\n\nWelcome to your Copperx dashboard. What would you like to do today?", InlineKeyboardMarkup(keyboard)
+
+def prebuilt_main_menu():
+    return messages.MAIN_MENU.format(name="Load"), keyboards.MAIN_MENU
+
+def inline_transfer_menu():
+    keyboard = [
+        [InlineKeyboardButton("Send to Email Address", callback_data="email_transfer")],
+        [InlineKeyboardButton("Send to External Wallet", callback_data="wallet_transfer")],
+        [InlineKeyboardButton("Withdraw to Bank Account", callback_data="bank_withdrawal")],
+        [InlineKeyboardButton("View Recent Transfers", callback_data="recent_transfers")],
+        [InlineKeyboardButton("Back to Main Menu", callback_data="main_menu")]
+    ]
+    return "Select a transfer option:", InlineKeyboardMarkup(keyboard)
+
+def prebuilt_transfer_menu():
+    return messages.TRANSFER_MENU, keyboards.TRANSFER_MENU
+
+def inline_error():
+    return ("Failed to fetch your balance. Please try again later.",
+            InlineKeyboardMarkup([[InlineKeyboardButton("Back to Transfer Menu", callback_data="transfer_menu")]]))
+
+def prebuilt_error():
+    return messages.BALANCE_FAILED, keyboards.BACK_TO_TRANSFER
+
+def inline_wallets():
+    keyboard = []
+    for wallet in WALLETS:
+        label = f"{'✅ ' if wallet.get('isDefault', False) else ''}{wallet.get('network', 'Unknown')}"
+        keyboard.append([InlineKeyboardButton(label, callback_data=f"set_default_{wallet.get('id')}")])
+    keyboard.append([InlineKeyboardButton("Back to Wallet Menu", callback_data="wallet_menu")])
+    return "Select your default wallet for transactions:", InlineKeyboardMarkup(keyboard)
+
+def prebuilt_wallets():
+    return messages.SELECT_DEFAULT_WALLET, keyboards.choice_keyboard(
+        (
+            (f"{'✅ ' if wallet.get('isDefault', False) else ''}{wallet.get('network', 'Unknown')}",
+             f"set_default_{wallet.get('id')}")
+            for wallet in WALLETS
+        ),
+        keyboards.BACK_TO_WALLET_ROW
+    )
+
+SCENARIOS: Dict[str, Dict[str, Callable]] = {
+    "main menu": {"inline": inline_main_menu, "prebuilt": prebuilt_main_menu},
+    "transfer menu": {"inline": inline_transfer_menu, "prebuilt": prebuilt_transfer_menu},
+    "error path": {"inline": inline_error, "prebuilt": prebuilt_error},
+    "wallet keyboard": {"inline": inline_wallets, "prebuilt": prebuilt_wallets}
+}
+
+def allocated_per_render(render: Callable, renders: int) -> float:
+    render()  # warm caches, as a running bot would have
+    kept: List = []
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for _ in range(renders):
+        kept.append(render())
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # The list of results itself is the same for both variants
+    return (after - before) / renders
+
+def time_per_render(render: Callable, renders: int) -> float:
+    started = time.perf_counter()
+    for _ in range(renders):
+        render()
+    return (time.perf_counter() - started) / renders
+
+def main(args: argparse.Namespace) -> None:
+    print(f"{'scenario':<16} {'variant':<9} {'bytes/render':>13} {'us/render':>10}")
+    for scenario, variants in SCENARIOS.items():
+        for variant, render in variants.items():
+            allocated = allocated_per_render(render, args.renders)
+            elapsed = time_per_render(render, args.renders)
+            print(f"{scenario:<16} {variant:<9} {allocated:>13,.0f} {elapsed * 1e6:>10.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--renders", type=int, default=10000)
+    main(parser.parse_args())
@@ -0,0 +1,121 @@
+"""Bot API edits saved by rendered-view diffing on repeated taps
+
+Usage: python -m benchmarks.bench_views [--users 100] [--rounds 10]
+
+Logs N virtual users in (see benchmarks.load_telegram), then has each tap
+Transaction History on the main menu message twice per round, the way
+impatient users double-tap. Every tap carries the main menu as the user saw
+it, and every tap after the first asks for the history view that is already
+showing. Counts editMessageText calls and reports the view cache's stats.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+import warnings
+from typing import Dict, List
+
+from benchmarks.load_telegram import JOURNEY, VirtualUser, start_mock_api
+
+LOGIN = JOURNEY[:4]
+
+async def send(application, handled: Dict[int, asyncio.Future], update) -> None:
+    done = handled[update.update_id] = asyncio.get_running_loop().create_future()
+    await application.update_queue.put(update)
+    try:
+        await done
+    finally:
+        del handled[update.update_id]
+
+async def run_user(vu: VirtualUser, application, handled: Dict[int, asyncio.Future], rounds: int) -> int:
+    """Log in, then double-tap Transaction History each round; returns the number of taps sent"""
+    for _, kind, value in LOGIN:
+        await send(application, handled, vu.build_update(kind, value))
+    main_menu = vu.fake_api.last_messages[vu.user_id]
+
+    taps = 0
+    for _ in range(rounds):
+        # Both taps come from the main menu message the user is looking at
+        vu.fake_api.last_messages[vu.user_id] = main_menu
+        first, second = vu.build_update("button", "Transaction History"), vu.build_update("button", "Transaction History")
+        await asyncio.gather(send(application, handled, first), send(application, handled, second))
+        taps += 2
+    return taps
+
+async def main(args: argparse.Namespace) -> None:
+    args.api_latency = 0.0
+    mock_process, os.environ["API_BASE_URL"] = await start_mock_api(args)
+
+    from telegram import Update
+    from telegram.ext import Application, TypeHandler
+    import server
+    from benchmarks.fake_bot_api import FakeBotAPI
+    from src.services.concurrency import OrderedApplication, UpdateQueue
+    from src.services.http_client import close_http_client, init_http_client
+    from src.ui.views import view_cache
+
+    logging.getLogger().setLevel(logging.WARNING)
+    warnings.filterwarnings("ignore", message="If 'per_message=False'")
+    for name in ("httpx", "telegram", "server", "src.utils.logger"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+
+    fake_api = FakeBotAPI()
+    application = (
+        Application.builder()
+        .token("123456:VIEWS-BENCH")
+        .request(fake_api)
+        .get_updates_request(FakeBotAPI())
+        .application_class(OrderedApplication, kwargs={"max_concurrency": 64})
+        .concurrent_updates(1000)
+        .update_queue(UpdateQueue(1000, 1000))
+        .build()
+    )
+    application.add_handler(server.create_conversation_handler())
+
+    handled: Dict[int, asyncio.Future] = {}
+
+    async def mark_handled(update, context) -> None:
+        future = handled.get(update.update_id)
+        if future is not None and not future.done():
+            future.set_result(None)
+
+    application.add_handler(TypeHandler(Update, mark_handled), group=1000)
+    errors: List[str] = []
+
+    async def record_error(update, context) -> None:
+        errors.append(repr(context.error))
+
+    application.add_error_handler(record_error)
+
+    users = [VirtualUser(i, application.bot, fake_api, args.otp) for i in range(args.users)]
+    await application.initialize()
+    await init_http_client(application)
+    await application.start()
+    try:
+        started = time.perf_counter()
+        taps = await asyncio.gather(*(run_user(vu, application, handled, args.rounds) for vu in users))
+        elapsed = time.perf_counter() - started
+    finally:
+        await application.stop()
+        await close_http_client(application)
+        await application.shutdown()
+        mock_process.terminate()
+        await mock_process.wait()
+
+    stats = view_cache.stats()
+    total_taps = sum(taps)
+    tap_edits = stats["edits_sent"] + stats["edits_skipped"] + stats["not_modified_errors"]
+    print(f"{args.users} users, {total_taps} menu taps in {elapsed:.2f}s, {len(errors)} handler errors")
+    print(f"editMessageText calls: {fake_api.calls['editMessageText']} for {tap_edits} edits requested "
+          f"({stats['edits_skipped'] / max(tap_edits, 1):.0%} skipped)")
+    print(f"view cache: {stats}")
+    if errors:
+        print(f"first error: {errors[0]}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--otp", default="123456")
+    asyncio.run(main(parser.parse_args()))
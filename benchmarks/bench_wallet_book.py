@@ -0,0 +1,108 @@
+"""Wallet menu join cost, linear next() scans versus WalletBook
+
+Usage: python -m benchmarks.bench_wallet_book [--wallets 10 100 1000 5000] [--repeat 5]
+
+For each account size, checks that the wallet menu lines, total balance
+and network lookups from a WalletBook match the scans the wallet handlers
+used to run, then times both: building the book from the two responses,
+and reusing it while the cached responses are unchanged.
+"""
+import argparse
+import random
+import time
+from typing import Callable, Dict, Tuple
+
+from src.models.wallet import WalletBook, WalletBooks
+from src.ui import messages
+
+NETWORKS = ("137", "42161", "8453", "1", "10")
+
+def make_responses(wallets: int) -> Tuple[Dict, Dict]:
+    rng = random.Random(wallets)
+    wallet_list = [
+        {"id": f"wallet-{n}", "network": rng.choice(NETWORKS), "address": f"0x{n:040x}", "isDefault": n == 0}
+        for n in range(wallets)
+    ]
+    # Balances arrive in their own order, and not every wallet has one
+    balances = [{"walletId": w["id"], "balance": f"{rng.uniform(0, 1000):.2f}"} for w in wallet_list if rng.random() < 0.9]
+    rng.shuffle(balances)
+    return {"data": wallet_list}, {"data": balances}
+
+def scan_menu(wallets_response: Dict, balances_response: Dict) -> str:
+    """The wallet menu loop before WalletBook"""
+    balances = balances_response.get("data", [])
+    parts = [messages.WALLETS_HEADER]
+    for wallet in wallets_response.get("data", []):
+        wallet_id = wallet.get("id")
+        address = wallet.get("address", "N/A")
+        wallet_balance = next((b for b in balances if b.get("walletId") == wallet_id), {})
+        parts.append(messages.WALLET_ENTRY.format(
+            marker="✅ " if wallet.get("isDefault", False) else "",
+            network=wallet.get("network", "Unknown"),
+            address_start=address[:10],
+            address_end=address[-10:],
+            balance=f"{wallet_balance.get('balance', '0')} USDC"
+        ))
+    return "".join(parts)
+
+def book_menu(book: WalletBook) -> str:
+    parts = [messages.WALLETS_HEADER]
+    for wallet in book.wallets:
+        address = wallet.get("address", "N/A")
+        parts.append(messages.WALLET_ENTRY.format(
+            marker="✅ " if wallet.get("isDefault", False) else "",
+            network=wallet.get("network", "Unknown"),
+            address_start=address[:10],
+            address_end=address[-10:],
+            balance=f"{book.balance_of(wallet.get('id'))} USDC"
+        ))
+    return "".join(parts)
+
+def check(wallets_response: Dict, balances_response: Dict) -> None:
+    book = WalletBook.from_responses(wallets_response, balances_response)
+    assert book_menu(book) == scan_menu(wallets_response, balances_response)
+    balances = balances_response["data"]
+    assert book.total_balance == sum(float(b.get("balance", 0)) for b in balances)
+    for wallet in wallets_response["data"][::7] + [{"id": "missing"}]:
+        wallet_id = wallet["id"]
+        expected = next((w.get("network", "Unknown") for w in wallets_response["data"] if w.get("id") == wallet_id), "Unknown")
+        assert book.network_of(wallet_id) == expected
+    assert book.default is wallets_response["data"][0]
+
+    failed = WalletBook.from_responses(wallets_response, {"error": "down"})
+    assert failed.balances is None and failed.total_balance is None and failed.wallets is wallets_response["data"]
+    assert WalletBook.from_responses({"error": "down"}, balances_response).wallets is None
+
+    # A patched or refetched response is a new object, and the book is rebuilt from it
+    books = WalletBooks(1)
+    first = books.get("token", wallets_response, balances_response)
+    assert books.get("token", wallets_response, balances_response) is first
+    assert books.get("token", wallets_response, {**balances_response}) is not first
+
+def best_of(run: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main(args: argparse.Namespace) -> None:
+    for wallets in args.wallets:
+        wallets_response, balances_response = make_responses(wallets)
+        check(wallets_response, balances_response)
+
+        books = WalletBooks(10)
+        scan = best_of(lambda: scan_menu(wallets_response, balances_response), args.repeat)
+        built = best_of(lambda: book_menu(WalletBook.from_responses(wallets_response, balances_response)), args.repeat)
+        books.get("token", wallets_response, balances_response)
+        reused = best_of(lambda: book_menu(books.get("token", wallets_response, balances_response)), args.repeat)
+        print(f"{wallets:5} wallets  scan {scan * 1000:9.2f}ms  book built {built * 1000:7.2f}ms ({scan / built:6.1f}x)  "
+              f"book reused {reused * 1000:7.2f}ms ({scan / reused:6.1f}x)")
+    print("wallet book checks passed")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--wallets", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=5)
+    main(parser.parse_args())
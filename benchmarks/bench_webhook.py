@@ -0,0 +1,131 @@
+"""End-to-end update latency through the webhook ingress
+
+Usage: python -m benchmarks.bench_webhook [--updates 2000] [--connections 40] [--queue-size 1000]
+
+Runs server.py's ConversationHandler behind WebhookIngress with the Bot API
+answered in-process (benchmarks.fake_bot_api), then POSTs /start updates
+from distinct users the way Telegram does, over --connections keep-alive
+connections. The sender runs in its own process so it doesn't compete with
+the bot for the event loop. Latency is measured from sending the POST to the
+bot's reply reaching the Bot API. Also checks that a wrong secret token gets 403.
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import time
+import warnings
+from typing import Dict, List, Tuple
+
+import httpx
+
+from benchmarks.fake_bot_api import FakeBotAPI
+from benchmarks.load_telegram import percentile
+
+SECRET = "bench-secret"
+
+class TimedBotAPI(FakeBotAPI):
+    """Records when the first reply to each chat arrives"""
+
+    def __init__(self):
+        super().__init__()
+        self.replied_at: Dict[int, float] = {}
+
+    def answer(self, api_method, params):
+        if api_method == "sendMessage":
+            # Wall clock, because the POSTs are timed in another process
+            self.replied_at.setdefault(int(params["chat_id"]), time.time())
+        return super().answer(api_method, params)
+
+def start_update(update_id: int, user_id: int) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "Hook"},
+            "text": "/start",
+            "entities": [{"type": "bot_command", "offset": 0, "length": 6}]
+        }
+    }
+
+async def send_updates(url: str, updates: int, connections: int) -> Tuple[Dict[int, float], Dict[int, int], int]:
+    """POST one /start per user; returns send times, status counts and the forged request's status"""
+    sent_at: Dict[int, float] = {}
+    statuses: Dict[int, int] = {}
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with httpx.AsyncClient(limits=limits, headers={"X-Telegram-Bot-Api-Secret-Token": SECRET}) as client:
+        forged = await client.post(url, json=start_update(0, 1), headers={"X-Telegram-Bot-Api-Secret-Token": "wrong"})
+        semaphore = asyncio.Semaphore(connections)
+
+        async def post(i: int) -> None:
+            user_id = 2_000_000 + i
+            # Like Telegram, never have more than max_connections requests outstanding
+            async with semaphore:
+                sent_at[user_id] = time.time()
+                response = await client.post(url, json=start_update(i + 1, user_id))
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        await asyncio.gather(*(post(i) for i in range(updates)))
+    return sent_at, statuses, forged.status_code
+
+def sender_process(url: str, updates: int, connections: int, results: multiprocessing.Queue) -> None:
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    results.put(asyncio.run(send_updates(url, updates, connections)))
+
+async def main(args: argparse.Namespace) -> None:
+    from telegram.ext import Application
+    import server
+    from src.services.webhook import WebhookIngress
+
+    logging.getLogger().setLevel(logging.WARNING)
+    warnings.filterwarnings("ignore", message="If 'per_message=False'")
+    for name in ("httpx", "telegram", "server", "src.utils.logger"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+
+    fake_api = TimedBotAPI()
+    application = (
+        Application.builder()
+        .token("123456:WEBHOOK-BENCH")
+        .request(fake_api)
+        .get_updates_request(FakeBotAPI())
+        .update_queue(asyncio.Queue(maxsize=args.queue_size))
+        .build()
+    )
+    application.add_handler(server.create_conversation_handler())
+    ingress = WebhookIngress(application, "/telegram", SECRET, "127.0.0.1", 0)
+
+    await application.initialize()
+    await application.start()
+    await ingress.start()
+    url = f"http://127.0.0.1:{ingress.server.port}/telegram"
+
+    results: multiprocessing.Queue = multiprocessing.Queue()
+    sender = multiprocessing.Process(target=sender_process, args=(url, args.updates, args.connections, results))
+    try:
+        started = time.time()
+        sender.start()
+        sent_at, statuses, forged_status = await asyncio.to_thread(results.get)
+        while len(fake_api.replied_at) < statuses.get(200, 0) and time.time() - started < 60:
+            await asyncio.sleep(0.01)
+        elapsed = time.time() - started
+    finally:
+        sender.join()
+        await ingress.stop()
+        await application.stop()
+        await application.shutdown()
+
+    latencies: List[float] = [fake_api.replied_at[user] - sent for user, sent in sent_at.items() if user in fake_api.replied_at]
+    print(f"wrong secret token -> {forged_status}")
+    print(f"{args.updates} updates in {elapsed:.2f}s ({len(latencies) / elapsed:,.0f} handled/s), HTTP statuses {statuses}")
+    print(f"end-to-end latency p50={percentile(latencies, 0.5) * 1000:.1f}ms "
+          f"p95={percentile(latencies, 0.95) * 1000:.1f}ms p99={percentile(latencies, 0.99) * 1000:.1f}ms")
+    print(f"ingress stats: {ingress.stats()}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--connections", type=int, default=40, help="Telegram's max_connections")
+    parser.add_argument("--queue-size", type=int, default=1000)
+    asyncio.run(main(parser.parse_args()))
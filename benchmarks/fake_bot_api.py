@@ -0,0 +1,75 @@
+"""In-process stand-in for the Telegram Bot API
+
+Plugged into Application.builder().request(...) so handlers run unchanged
+while every Bot API call is answered locally and recorded.
+"""
+import asyncio
+import itertools
+import json
+import time
+from collections import defaultdict
+from typing import Any, Dict, Optional, Tuple
+
+from telegram.request import BaseRequest, RequestData
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "Copperx Load Bot", "username": "copperx_load_bot"}
+
+class FakeBotAPI(BaseRequest):
+    """Answers Bot API methods locally and keeps the last message sent to each chat"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.last_messages: Dict[int, Dict[str, Any]] = {}
+        self._message_ids = itertools.count(1000)
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    async def do_request(self, url: str, method: str, request_data: Optional[RequestData] = None,
+                         read_timeout=None, write_timeout=None, connect_timeout=None,
+                         pool_timeout=None) -> Tuple[int, bytes]:
+        api_method = url.rsplit("/", 1)[-1]
+        params = request_data.parameters if request_data else {}
+        self.calls[api_method] += 1
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        result = self.answer(api_method, params)
+        return 200, json.dumps({"ok": True, "result": result}).encode()
+
+    def answer(self, api_method: str, params: Dict[str, Any]) -> Any:
+        if api_method == "getMe":
+            return {**BOT_USER, "can_join_groups": False, "can_read_all_group_messages": False,
+                    "supports_inline_queries": False}
+
+        if api_method in ("sendMessage", "editMessageText", "sendDocument"):
+            chat_id = int(params["chat_id"])
+            message = {
+                "message_id": int(params.get("message_id") or next(self._message_ids)),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "from": BOT_USER,
+                "text": params.get("text") or params.get("caption") or ""
+            }
+            if params.get("reply_markup"):
+                message["reply_markup"] = params["reply_markup"]
+            if api_method == "sendDocument":
+                message["document"] = {"file_id": f"doc-{message['message_id']}", "file_unique_id": "doc"}
+            self.last_messages[chat_id] = message
+            return message
+
+        return True
+
+    def button_data(self, chat_id: int, label: str) -> str:
+        """callback_data of the first button in the chat's last message whose text contains label"""
+        markup = self.last_messages.get(chat_id, {}).get("reply_markup") or {}
+        for row in markup.get("inline_keyboard", []):
+            for button in row:
+                if label in button.get("text", ""):
+                    return button["callback_data"]
+        raise LookupError(f"No '{label}' button in the last message to chat {chat_id}")
@@ -0,0 +1,279 @@
+"""Synthetic Telegram load against the bot's ConversationHandler
+
+Usage: python -m benchmarks.load_telegram [--users 200] [--concurrency 64] [--api-latency 0.02] [--output benchmarks/load_results.json]
+
+Builds the Application from server.create_conversation_handler() with the Bot
+API answered in-process (benchmarks.fake_bot_api), then drives N virtual
+users through a full journey concurrently:
+
+    /start -> Login -> email -> OTP -> Wallet Management -> Main Menu
+    -> Fund Transfers -> Send to Email -> recipient -> amount -> Confirm
+
+Updates are put on the Application's update queue, skipping Telegram's
+network, and each user waits for its update to be handled before sending the
+next. --concurrency sets how many updates the OrderedApplication runs at once;
+0 uses a stock Application, which handles updates one at a time. The Copperx
+API is the local mock (started as a subprocess unless --api-url is given).
+Reports p50/p95/p99 latency per step, throughput and peak RSS, and writes them
+as JSON for comparison across commits.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import resource
+import socket
+import subprocess
+import sys
+import time
+import warnings
+from collections import defaultdict
+from typing import Dict, List
+
+JOURNEY = (
+    ("start", "command", "/start"),
+    ("login", "button", "Login"),
+    ("email", "text", "{email}"),
+    ("otp", "text", "{otp}"),
+    ("wallet_menu", "button", "Wallet Management"),
+    ("main_menu", "button", "Back to Main Menu"),
+    ("transfer_menu", "button", "Fund Transfers"),
+    ("email_transfer", "button", "Send to Email Address"),
+    ("recipient", "text", "friend@example.com"),
+    ("amount", "text", "1.5"),
+    ("confirm", "button", "Confirm")
+)
+
+_update_ids = itertools.count(1)
+
+def percentile(samples: List[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 2),
+        "max_ms": round(max(samples, default=0) * 1000, 2)
+    }
+
+def peak_rss_bytes() -> int:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+async def start_mock_api(args: argparse.Namespace):
+    """Run the mock Copperx API in its own process so it doesn't skew RSS and CPU"""
+    port = free_port()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "benchmarks.mock_copperx_api", "--port", str(port),
+        "--users", str(args.users), "--latency", str(args.api_latency),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    for _ in range(100):
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return process, f"http://127.0.0.1:{port}/api"
+        except OSError:
+            await asyncio.sleep(0.05)
+    process.kill()
+    raise RuntimeError("Mock API did not start")
+
+class VirtualUser:
+    """One scripted Telegram user"""
+
+    def __init__(self, index: int, bot, fake_api, otp: str):
+        self.index = index
+        self.user_id = 1_000_000 + index
+        self.email = f"user{index}@example.com"
+        self.otp = otp
+        self.bot = bot
+        self.fake_api = fake_api
+        self.user = {"id": self.user_id, "is_bot": False, "first_name": f"Load{index}"}
+
+    def _message(self, text: str) -> dict:
+        message = {
+            "message_id": next(_update_ids),
+            "date": int(time.time()),
+            "chat": {"id": self.user_id, "type": "private"},
+            "from": self.user,
+            "text": text
+        }
+        if text.startswith("/"):
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        return message
+
+    def build_update(self, kind: str, value: str):
+        from telegram import Update
+
+        update_id = next(_update_ids)
+        if kind in ("command", "text"):
+            payload = {"update_id": update_id, "message": self._message(value.format(email=self.email, otp=self.otp))}
+        else:
+            payload = {
+                "update_id": update_id,
+                "callback_query": {
+                    "id": str(update_id),
+                    "from": self.user,
+                    "chat_instance": str(self.user_id),
+                    "data": self.fake_api.button_data(self.user_id, value),
+                    "message": self.fake_api.last_messages[self.user_id]
+                }
+            }
+        return Update.de_json(payload, self.bot)
+
+async def run_user(vu: VirtualUser, application, handled: Dict[int, asyncio.Future], think_time: float,
+                   latencies: Dict[str, List[float]]) -> bool:
+    """Play the journey once; True if the transfer was confirmed"""
+    loop = asyncio.get_running_loop()
+    for step, kind, value in JOURNEY:
+        try:
+            update = vu.build_update(kind, value)
+        except LookupError:
+            return False
+        done = handled[update.update_id] = loop.create_future()
+        started = time.perf_counter()
+        await application.update_queue.put(update)
+        try:
+            await done
+        finally:
+            del handled[update.update_id]
+        latencies[step].append(time.perf_counter() - started)
+        if think_time:
+            await asyncio.sleep(think_time)
+
+    return vu.fake_api.last_messages.get(vu.user_id, {}).get("text", "").startswith("Success!")
+
+async def main(args: argparse.Namespace) -> Dict:
+    mock_process = None
+    if args.api_url:
+        os.environ["API_BASE_URL"] = args.api_url
+    else:
+        mock_process, os.environ["API_BASE_URL"] = await start_mock_api(args)
+
+    # Imported after API_BASE_URL is set so the bot talks to the mock
+    from telegram import Update
+    from telegram.ext import Application, TypeHandler
+    import server
+    from benchmarks.fake_bot_api import FakeBotAPI
+    from src.services.concurrency import OrderedApplication, UpdateQueue
+    from src.services.http_client import close_http_client, init_http_client
+
+    logging.getLogger().setLevel(logging.WARNING)
+    warnings.filterwarnings("ignore", message="If 'per_message=False'")
+    for name in ("httpx", "telegram", "server", "src.utils.logger"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+
+    fake_api = FakeBotAPI(latency=args.telegram_latency)
+    builder = (
+        Application.builder()
+        .token("123456:LOAD-TEST")
+        .request(fake_api)
+        .get_updates_request(FakeBotAPI())
+    )
+    if args.concurrency:
+        builder = (
+            builder
+            .application_class(OrderedApplication, kwargs={"max_concurrency": args.concurrency})
+            .concurrent_updates(1000)
+            .update_queue(UpdateQueue(1000, 1000))
+        )
+    application = builder.build()
+    application.add_handler(server.create_conversation_handler())
+
+    # Handlers in a later group run once the conversation has handled the update
+    handled: Dict[int, asyncio.Future] = {}
+
+    async def mark_handled(update, context) -> None:
+        future = handled.get(update.update_id)
+        if future is not None and not future.done():
+            future.set_result(None)
+
+    application.add_handler(TypeHandler(Update, mark_handled), group=1000)
+
+    errors: List[str] = []
+
+    async def record_error(update, context) -> None:
+        errors.append(repr(context.error))
+
+    application.add_error_handler(record_error)
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    users = [VirtualUser(i, application.bot, fake_api, args.otp) for i in range(args.users)]
+
+    await application.initialize()
+    await init_http_client(application)
+    server.outbound.start(application.bot)
+    await application.start()
+    try:
+        started = time.perf_counter()
+        outcomes = await asyncio.gather(*(run_user(vu, application, handled, args.think_time, latencies) for vu in users))
+        elapsed = time.perf_counter() - started
+    finally:
+        await application.stop()
+        await server.outbound.stop()
+        await close_http_client(application)
+        await application.shutdown()
+        if mock_process is not None:
+            mock_process.terminate()
+            await mock_process.wait()
+
+    all_samples = [sample for samples in latencies.values() for sample in samples]
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "params": vars(args),
+        "journeys": {"total": len(users), "completed": sum(outcomes)},
+        "updates": len(all_samples),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_updates_per_s": round(len(all_samples) / elapsed, 1),
+        "latency": summarize(all_samples),
+        "latency_by_step": {step: summarize(latencies[step]) for step, _, _ in JOURNEY},
+        "peak_rss_mb": round(peak_rss_bytes() / 1024 / 1024, 1),
+        "handler_errors": len(errors),
+        "bot_api_calls": dict(fake_api.calls)
+    }
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"concurrency {args.concurrency or 'off'}: {results['journeys']['completed']}/{len(users)} journeys completed, "
+          f"{results['updates']} updates in {results['elapsed_s']}s "
+          f"({results['throughput_updates_per_s']} updates/s)")
+    print(f"latency p50={results['latency']['p50_ms']}ms p95={results['latency']['p95_ms']}ms "
+          f"p99={results['latency']['p99_ms']}ms, peak RSS {results['peak_rss_mb']} MB, "
+          f"{len(errors)} handler errors")
+    if errors:
+        print(f"first error: {errors[0]}")
+    print(f"results written to {args.output}")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200, help="concurrent virtual users")
+    parser.add_argument("--otp", default="123456")
+    parser.add_argument("--concurrency", type=int, default=64, help="updates run at once; 0 for a stock sequential Application")
+    parser.add_argument("--think-time", type=float, default=0.0, help="pause between a user's steps in seconds")
+    parser.add_argument("--api-url", help="use an already running Copperx API (mock) instead of starting one")
+    parser.add_argument("--api-latency", type=float, default=0.02, help="latency injected by the mock API")
+    parser.add_argument("--telegram-latency", type=float, default=0.0, help="simulated Bot API round trip")
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "load_results.json"))
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,399 @@
+"""Local stand-in for the Copperx API used for offline benchmarks and load tests
+
+Usage: python -m benchmarks.mock_copperx_api [--port 8080] [--users 5000] [--latency 0.02]
+Then start the bot with API_BASE_URL=http://127.0.0.1:8080/api
+
+Seeded users log in as user<N>@example.com (N < --users) with the OTP given
+by --otp. Per-user state (wallets, balances, KYC, transfers) is derived from N
+and created lazily on first use, so thousands of users cost nothing until
+they are touched. Latency, error rate and per-token rate limits can be
+injected, and GET /__mock/stats reports request counts per endpoint.
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from src.utils.http_server import HTTPServer, Request, Response
+
+NETWORKS = ("Polygon", "Arbitrum", "Base")
+KYC_STATUSES = ("APPROVED", "APPROVED", "PENDING", "REJECTED", "NOT_STARTED")
+TRANSFER_TYPES = ("DEPOSIT", "WITHDRAWAL", "EMAIL_TRANSFER", "WALLET_TRANSFER")
+TRANSFER_STATUSES = ("SUCCESS", "SUCCESS", "SUCCESS", "PENDING", "FAILED")
+FIRST_NAMES = ("Ada", "Grace", "Alan", "Linus", "Ken", "Barbara", "Edsger", "Donald", "Margaret", "Dennis")
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+def _hex(*parts) -> str:
+    return hashlib.sha256(":".join(map(str, parts)).encode()).hexdigest()
+
+def _iso(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+class MockUser:
+    """Lazily materialised state of one seeded user"""
+
+    def __init__(self, index: int, transfer_count: int):
+        self.index = index
+        self.email = f"user{index}@example.com"
+        self.token = f"mock-token-{index}-{_hex('token', index)[:16]}"
+        self.organization_id = f"org-{index}"
+        self.profile = {
+            "id": f"user-{index}",
+            "name": f"{FIRST_NAMES[index % len(FIRST_NAMES)]} {index}",
+            "email": self.email,
+            "organizationId": self.organization_id,
+            "organizationName": f"Org {index}",
+            "createdAt": _iso(EPOCH - timedelta(days=index % 365))
+        }
+        self.wallets = [
+            {
+                "id": f"w-{index}-{n}",
+                "network": network,
+                "address": "0x" + _hex("wallet", index, n)[:40],
+                "isDefault": n == 0
+            }
+            for n, network in enumerate(NETWORKS)
+        ]
+        self.balances = {wallet["id"]: round(100 + (index * 37 + n * 11) % 900, 2) for n, wallet in enumerate(self.wallets)}
+        self.kyc_status = KYC_STATUSES[index % len(KYC_STATUSES)]
+        self.transfer_count = transfer_count
+        self.new_transfers: List[Dict] = []
+        self.idempotent_responses: Dict[str, Dict] = {}
+
+    def seeded_transfer(self, position: int) -> Dict:
+        """Seeded transfer at a position in the newest-first history"""
+        seed = self.index * 7919 + position
+        return {
+            "id": _hex("transfer", self.index, position)[:32],
+            "type": TRANSFER_TYPES[seed % len(TRANSFER_TYPES)],
+            "status": TRANSFER_STATUSES[seed % len(TRANSFER_STATUSES)],
+            "amount": f"{(seed * 13) % 5000 / 10 + 1:.2f}",
+            "currency": "USDC",
+            "walletId": self.wallets[seed % len(self.wallets)]["id"],
+            "organizationId": self.organization_id,
+            "createdAt": _iso(EPOCH - timedelta(minutes=37 * position + 1))
+        }
+
+    def transfers_page(self, page: int, limit: int) -> List[Dict]:
+        start = (page - 1) * limit
+        rows = self.new_transfers[start:start + limit]
+        seeded_start = max(0, start - len(self.new_transfers))
+        seeded_end = min(self.transfer_count, start + limit - len(self.new_transfers))
+        rows.extend(self.seeded_transfer(p) for p in range(seeded_start, seeded_end))
+        return rows
+
+    def debit(self, amount: float, wallet_id: Optional[str] = None) -> Optional[str]:
+        """Take amount from one wallet, returning an error message if funds are short"""
+        wallet_id = wallet_id or next(w["id"] for w in self.wallets if w["isDefault"])
+        if wallet_id not in self.balances:
+            return "Wallet not found"
+        if self.balances[wallet_id] < amount:
+            return "Insufficient balance"
+        self.balances[wallet_id] = round(self.balances[wallet_id] - amount, 2)
+        return None
+
+    def record_transfer(self, transfer_type: str, amount: float, wallet_id: Optional[str] = None, **extra) -> Dict:
+        transfer = {
+            "id": _hex("new", self.index, len(self.new_transfers), time.time())[:32],
+            "type": transfer_type,
+            "status": "PENDING",
+            "amount": f"{amount:.2f}",
+            "currency": "USDC",
+            "walletId": wallet_id or next(w["id"] for w in self.wallets if w["isDefault"]),
+            "organizationId": self.organization_id,
+            "createdAt": _iso(datetime.now(timezone.utc)),
+            **extra
+        }
+        self.new_transfers.insert(0, transfer)
+        return transfer
+
+class MockCopperxAPI:
+    """Copperx API stand-in implementing every endpoint the bot calls"""
+
+    def __init__(self, users: int = 5000, otp: str = "123456", latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, rate_limit: float = 0.0, transfers_per_user: int = 50,
+                 heavy_user_transfers: int = 0, pusher_key: str = "mock-key", pusher_secret: str = "mock-secret"):
+        self.user_count = users
+        self.otp = otp
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.transfers_per_user = transfers_per_user
+        self.heavy_user_transfers = heavy_user_transfers
+        self.pusher_key = pusher_key
+        self.pusher_secret = pusher_secret
+        self.users: Dict[int, MockUser] = {}
+        self.requests: Dict[str, int] = defaultdict(int)
+        self.injected_errors = 0
+        self.rate_limited = 0
+        self._token_index: Dict[str, int] = {}
+        self._windows: Dict[str, List[float]] = {}
+        self.server: Optional[HTTPServer] = None
+
+    # Seeded data
+
+    def user(self, index: int) -> MockUser:
+        user = self.users.get(index)
+        if user is None:
+            transfers = self.heavy_user_transfers if index == 0 and self.heavy_user_transfers else self.transfers_per_user
+            user = self.users[index] = MockUser(index, transfers)
+            self._token_index[user.token] = index
+        return user
+
+    def user_by_email(self, email: str) -> Optional[MockUser]:
+        local, _, domain = (email or "").partition("@")
+        if domain != "example.com" or not local.startswith("user") or not local[4:].isdigit():
+            return None
+        index = int(local[4:])
+        return self.user(index) if index < self.user_count else None
+
+    def user_by_token(self, request: Request) -> Optional[MockUser]:
+        token = request.headers.get("authorization", "").removeprefix("Bearer ")
+        index = self._token_index.get(token)
+        if index is None and token.startswith("mock-token-"):
+            # Tokens are deterministic, so they stay valid across mock restarts
+            index_text = token.split("-")[2]
+            if index_text.isdigit() and int(index_text) < self.user_count:
+                candidate = self.user(int(index_text))
+                index = candidate.index if candidate.token == token else None
+        return self.users.get(index) if index is not None else None
+
+    # Server lifecycle
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving and return the API base URL"""
+        self.server = HTTPServer(host, port)
+        routes = {
+            ("POST", "/auth/email-otp/request"): self.otp_request,
+            ("POST", "/auth/email-otp/authenticate"): self.otp_authenticate,
+            ("GET", "/auth/me"): self.me,
+            ("GET", "/wallets"): self.wallets,
+            ("GET", "/wallets/default"): self.default_wallet,
+            ("PUT", "/wallets/default"): self.set_default_wallet,
+            ("GET", "/wallets/balances"): self.balances,
+            ("GET", "/kycs"): self.kycs,
+            ("GET", "/transfers"): self.transfers,
+            ("POST", "/transfers/send"): self.send,
+            ("POST", "/transfers/wallet-withdraw"): self.wallet_withdraw,
+            ("POST", "/transfers/offramp"): self.offramp,
+            ("POST", "/notifications/auth"): self.notifications_auth
+        }
+        for (method, path), handler in routes.items():
+            self.server.route(method, f"/api{path}", self._wrap(path, handler))
+        self.server.route("GET", "/__mock/stats", self.stats)
+        await self.server.start()
+        return f"http://{host}:{self.server.port}/api"
+
+    async def stop(self) -> None:
+        if self.server is not None:
+            await self.server.stop()
+
+    def start_in_thread(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Serve from a separate thread and event loop, e.g. to benchmark blocking clients"""
+        ready = threading.Event()
+        address = {}
+
+        async def serve() -> None:
+            address["url"] = await self.start(host, port)
+            ready.set()
+            await asyncio.Event().wait()
+
+        threading.Thread(target=lambda: asyncio.run(serve()), daemon=True).start()
+        ready.wait()
+        return address["url"]
+
+    def _wrap(self, path: str, handler):
+        async def wrapped(request: Request) -> Response:
+            self.requests[f"{request.method} {path}"] += 1
+
+            if self.latency or self.jitter:
+                await asyncio.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+
+            if self.rate_limit:
+                key = request.headers.get("authorization") or "anonymous"
+                now = time.monotonic()
+                window = [t for t in self._windows.get(key, ()) if now - t < 1.0]
+                if len(window) >= self.rate_limit:
+                    self.rate_limited += 1
+                    self._windows[key] = window
+                    return Response.json({"message": "Too many requests"}, 429, {"Retry-After": "1"})
+                window.append(now)
+                self._windows[key] = window
+
+            if self.error_rate and random.random() < self.error_rate:
+                self.injected_errors += 1
+                return Response.json({"message": "Injected failure"}, 503)
+
+            return await handler(request)
+        return wrapped
+
+    async def stats(self, request: Request) -> Response:
+        return Response.json({
+            "requests": dict(self.requests),
+            "total": sum(self.requests.values()),
+            "materialised_users": len(self.users),
+            "injected_errors": self.injected_errors,
+            "rate_limited": self.rate_limited
+        })
+
+    # Endpoints
+
+    async def otp_request(self, request: Request) -> Response:
+        user = self.user_by_email((request.json() or {}).get("email"))
+        if user is None:
+            return Response.json({"message": "User not found"}, 404)
+        return Response.json({"email": user.email, "sid": _hex("sid", user.index)[:24]})
+
+    async def otp_authenticate(self, request: Request) -> Response:
+        body = request.json() or {}
+        user = self.user_by_email(body.get("email"))
+        if user is None or body.get("code") != self.otp:
+            return Response.json({"message": "Invalid OTP"}, 401)
+        return Response.json({"scheme": "Bearer", "accessToken": user.token, "token": user.token, "user": user.profile})
+
+    async def me(self, request: Request) -> Response:
+        user = self.user_by_token(request)
+        if user is None:
+            return Response.json({"message": "Unauthorized"}, 401)
+        return Response.json(user.profile)
+
+    async def wallets(self, request: Request) -> Response:
+        user = self.user_by_token(request)
+        if user is None:
+            return Response.json({"message": "Unauthorized"}, 401)
+        return Response.json({"data": user.wallets})
+
+    async def default_wallet(self, request: Request) -> Response:
+        user = self.user_by_token(request)
+        if user is None:
+            return Response.json({"message": "Unauthorized"}, 401)
+        return Response.json({"data": next(w for w in user.wallets if w["isDefault"])})
+
+    async def set_default_wallet(self, request: Request) -> Response:
+        user = self.user_by_token(request)
+        if user is None:
+            return Response.json({"message": "Unauthorized"}, 401)
+        wallet_id = (request.json() or {}).get("walletId")
+        if wallet_id not in user.balances:
+            return Response.json({"message": "Wallet not found"}, 404)
+        for wallet in user.wallets:
+            wallet["isDefault"] = wallet["id"] == wallet_id
+        return Response.json({"data": next(w for w in user.wallets if w["isDefault"])})
+
+    async def balances(self, request: Request) -> Response:
+        user = self.user_by_token(request)
+        if user is None:
+            return Response.json({"message": "Unauthorized"}, 401)
+        return Response.json({"data": [
+            {"walletId": w["id"], "network": w["network"], "balance": f"{user.balances[w['id']]:.2f}", "symbol": "USDC"}
+            for w in user.wallets
+        ]})
+
+    async def kycs(self, request: Request) -> Response:
+        user = self.user_by_token(request)
+        if user is None:
+            return Response.json({"message": "Unauthorized"}, 401)
+        return Response.json({"data": {"status": user.kyc_status, "type": "INDIVIDUAL"}})
+
+    async def transfers(self, request: Request) -> Response:
+        user = self.user_by_token(request)
+        if user is None:
+            return Response.json({"message": "Unauthorized"}, 401)
+        page = max(1, int(request.query.get("page", 1)))
+        limit = min(100, max(1, int(request.query.get("limit", 10))))
+        total = user.transfer_count + len(user.new_transfers)
+        return Response.json({
+            "data": user.transfers_page(page, limit),
+            "page": page,
+            "limit": limit,
+            "count": total,
+            "hasMore": page * limit < total
+        })
+
+    async def _create_transfer(self, request: Request, transfer_type: str, wallet_field: Optional[str] = None,
+                               **extra_fields) -> Response:
+        user = self.user_by_token(request)
+        if user is None:
+            return Response.json({"message": "Unauthorized"}, 401)
+
+        key = request.headers.get("idempotency-key")
+        if key and key in user.idempotent_responses:
+            return Response.json(user.idempotent_responses[key])
+
+        body = request.json() or {}
+        try:
+            amount = float(body.get("amount"))
+        except (TypeError, ValueError):
+            return Response.json({"message": "Invalid amount"}, 400)
+
+        wallet_id = body.get(wallet_field) if wallet_field else None
+        error = user.debit(amount, wallet_id)
+        if error:
+            return Response.json({"message": error}, 400)
+
+        extra = {name: body.get(field) for name, field in extra_fields.items()}
+        result = {"data": user.record_transfer(transfer_type, amount, wallet_id, **extra)}
+        if key:
+            user.idempotent_responses[key] = result
+        return Response.json(result)
+
+    async def send(self, request: Request) -> Response:
+        return await self._create_transfer(request, "EMAIL_TRANSFER", recipientEmail="email")
+
+    async def wallet_withdraw(self, request: Request) -> Response:
+        return await self._create_transfer(request, "WALLET_TRANSFER", "walletId", toAddress="toAddress")
+
+    async def offramp(self, request: Request) -> Response:
+        return await self._create_transfer(request, "WITHDRAWAL", currency="currency")
+
+    async def notifications_auth(self, request: Request) -> Response:
+        user = self.user_by_token(request)
+        if user is None:
+            return Response.json({"message": "Unauthorized"}, 401)
+        body = request.json() or {}
+        channel = body.get("channel_name", "")
+        if channel != f"private-org-{user.organization_id}":
+            return Response.json({"message": "Forbidden channel"}, 403)
+        signature = hmac.new(
+            self.pusher_secret.encode(), f"{body.get('socket_id')}:{channel}".encode(), hashlib.sha256
+        ).hexdigest()
+        return Response.json({"auth": f"{self.pusher_key}:{signature}"})
+
+async def main(args: argparse.Namespace) -> None:
+    api = MockCopperxAPI(
+        users=args.users,
+        otp=args.otp,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        transfers_per_user=args.transfers_per_user,
+        heavy_user_transfers=args.heavy_user_transfers
+    )
+    base_url = await api.start(args.host, args.port)
+    print(f"Mock Copperx API serving {args.users} users at {base_url}")
+    await asyncio.Event().wait()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--otp", default="123456")
+    parser.add_argument("--latency", type=float, default=0.0, help="added latency per request in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="uniform +/- jitter on the latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="requests/sec allowed per token before 429")
+    parser.add_argument("--transfers-per-user", type=int, default=50)
+    parser.add_argument("--heavy-user-transfers", type=int, default=0, help="history size for user0@example.com")
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
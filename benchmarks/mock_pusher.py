@@ -0,0 +1,118 @@
+"""Local stand-in for the Pusher websocket API used by the real-time benchmarks
+
+Speaks enough of the Pusher protocol for the bot's subscriber: sends
+connection_established, checks private channel signatures the way the
+Copperx API signs them (benchmarks.mock_copperx_api), answers pings, and
+publishes events to the connections subscribed to a channel.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import random
+from collections import defaultdict
+from typing import Any, Dict, Optional, Set
+
+import websockets
+from websockets.exceptions import ConnectionClosed
+from websockets.server import WebSocketServerProtocol
+
+# Thousands of connections open and close during a run; their INFO lines would bury the results
+logging.getLogger("websockets.server").setLevel(logging.WARNING)
+
+class MockPusher:
+    def __init__(self, key: str = "mock-key", secret: str = "mock-secret", activity_timeout: int = 120):
+        self.key = key
+        self.secret = secret
+        self.activity_timeout = activity_timeout
+        self.server: Optional[websockets.WebSocketServer] = None
+        self.sockets: Dict[str, WebSocketServerProtocol] = {}
+        self.channels: Dict[str, Set[str]] = defaultdict(set)
+        self.peak_connections = 0
+        self.total_connections = 0
+        self.subscribes = 0
+        self.unsubscribes = 0
+        self.rejected = 0
+        self.published = 0
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving and return the websocket URL for the app key"""
+        self.server = await websockets.serve(self._handle_connection, host, port, ping_interval=None)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"ws://{host}:{port}/app/{self.key}?protocol=7"
+
+    async def stop(self) -> None:
+        await self.disconnect_all()
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    def sign(self, socket_id: str, channel: str) -> str:
+        signature = hmac.new(self.secret.encode(), f"{socket_id}:{channel}".encode(), hashlib.sha256).hexdigest()
+        return f"{self.key}:{signature}"
+
+    async def publish(self, channel: str, event: str, data: Any) -> int:
+        """Send an event to every connection subscribed to channel; returns how many got it"""
+        message = json.dumps({"event": event, "channel": channel, "data": json.dumps(data)})
+        sent = 0
+        for socket_id in list(self.channels.get(channel, ())):
+            ws = self.sockets.get(socket_id)
+            if ws is None:
+                continue
+            try:
+                await ws.send(message)
+                sent += 1
+            except (ConnectionClosed, ConnectionError):
+                pass
+        self.published += 1
+        return sent
+
+    async def disconnect_all(self, code: int = 4200) -> None:
+        """Close every connection with a Pusher close code (4200: reconnect immediately)"""
+        for ws in list(self.sockets.values()):
+            await ws.close(code)
+
+    def subscribed_channels(self) -> int:
+        return sum(1 for sockets in self.channels.values() if sockets)
+
+    async def _handle_connection(self, ws: WebSocketServerProtocol) -> None:
+        socket_id = f"{random.randrange(10 ** 9)}.{random.randrange(10 ** 9)}"
+        self.sockets[socket_id] = ws
+        self.total_connections += 1
+        self.peak_connections = max(self.peak_connections, len(self.sockets))
+        try:
+            await ws.send(json.dumps({
+                "event": "pusher:connection_established",
+                "data": json.dumps({"socket_id": socket_id, "activity_timeout": self.activity_timeout})
+            }))
+            while True:
+                await self._handle_message(ws, socket_id, json.loads(await ws.recv()))
+        except (ConnectionClosed, ConnectionError):
+            pass
+        finally:
+            del self.sockets[socket_id]
+            for sockets in self.channels.values():
+                sockets.discard(socket_id)
+            await ws.close()
+
+    async def _handle_message(self, ws: WebSocketServerProtocol, socket_id: str, message: Dict) -> None:
+        event = message.get("event")
+        data = message.get("data") or {}
+        if event == "pusher:ping":
+            await ws.send(json.dumps({"event": "pusher:pong", "data": {}}))
+        elif event == "pusher:subscribe":
+            channel = data.get("channel", "")
+            if not hmac.compare_digest(data.get("auth", ""), self.sign(socket_id, channel)):
+                self.rejected += 1
+                await ws.send(json.dumps({
+                    "event": "pusher:subscription_error",
+                    "channel": channel,
+                    "data": {"type": "AuthError", "status": 401}
+                }))
+                return
+            self.subscribes += 1
+            self.channels[channel].add(socket_id)
+            await ws.send(json.dumps({"event": "pusher_internal:subscription_succeeded", "channel": channel}))
+        elif event == "pusher:unsubscribe":
+            self.unsubscribes += 1
+            self.channels[data.get("channel", "")].discard(socket_id)
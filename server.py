@@ -3,14 +3,46 @@
 import os
 import logging
 from dotenv import load_dotenv
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, ContextTypes, ConversationHandler, filters
+from telegram import Update
+from telegram.ext import Application, CommandHandler, MessageHandler, ContextTypes, ConversationHandler, CallbackQueryHandler, filters
 import asyncio
-import json
-import requests
-import pusher
-from typing import Dict, List, Optional, Union, Any
-from datetime import datetime, timedelta
+import functools
+from typing import Dict, List, Optional, Set, Union, Any
+from datetime import datetime, timedelta, timezone
+from src.config.config import (
+    ADMIN_USER_IDS, SESSION_MAX_ENTRIES, SESSION_IDLE_TTL, SESSION_SWEEP_INTERVAL,
+    PERSISTENCE_PATH, SESSION_FLUSH_INTERVAL, CONVERSATION_FLUSH_INTERVAL,
+    BOT_MODE, WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_SECRET_TOKEN,
+    WEBHOOK_MAX_CONNECTIONS, UPDATE_QUEUE_SIZE, UPDATE_CONCURRENCY, UPDATE_MAX_IN_PROGRESS,
+    OUTBOUND_GLOBAL_RATE, OUTBOUND_CHAT_RATE, OUTBOUND_MAX_QUEUED, PUSHER_WS_URL,
+    EVENTS_WEBHOOK_SECRET, EVENTS_PATH, EVENTS_LISTEN, EVENTS_PORT, EVENTS_QUEUE_SIZE, EVENTS_WORKERS, EVENTS_DEDUP_SIZE,
+    EVENT_CACHE_INVALIDATIONS, EVENT_DRIVEN_BALANCES_TTL, HISTORY_PAGE_SIZE,
+    TRANSACTION_INDEX_ENABLED, TRANSACTION_SYNC_INTERVAL, TRANSACTION_SYNC_PAGE_SIZE, TRANSACTION_BACKFILL_DELAY,
+    EXPORT_PAGE_SIZE, EXPORT_SPOOL_SIZE, EXPORT_PROGRESS_INTERVAL, EXPORT_MAX_CONCURRENT
+)
+from src.services.api_service import api_request, clear_cached_responses, response_cache
+from src.services.fanout import fan_out, prefetch
+from src.services.idempotency import submit_transfer, transfer_ledger
+from src.services.session_store import SessionStore
+from src.services.persistence import SQLiteDatabase, SQLiteSessionBackend, SQLitePersistence
+from src.models.session import UserSession, ProfileSummary, dump_session, load_session
+from src.models.wallet import WalletBook, WalletBooks
+from src.utils import metrics
+from src.services.http_client import init_http_client, close_http_client
+from src.services.webhook import WebhookIngress, serve_webhook
+from src.services.concurrency import OrderedApplication, UpdateQueue
+from src.services.outbound import OutboundScheduler, TRANSFER, NOTIFICATION
+from src.services.realtime import PusherSubscriber, pusher_url
+from src.services.events import EventIngress
+from src.services.account_events import AccountEvents, BALANCES
+from src.services.transaction_index import TransactionFilter, TransactionIndex, parse_filter
+from src.services.export import (
+    CSV, FORMATS, MAX_DOCUMENT_SIZE, ExportError, ExportJobs, StreamedInputFile, export_transfers, file_size
+)
+from src.ui.views import edit_view, split_text, view_cache
+from src.ui.transactions import history_renderer
+from src.ui import callbacks, keyboards, messages
+from src.ui.callbacks import CallbackRouter
 
 # Setup logging
 logging.basicConfig(
@@ -24,10 +56,7 @@ load_dotenv()
 
 # Constants
 BOT_TOKEN = os.getenv('BOT_TOKEN')
-API_BASE_URL = "https://income-api.copperx.io/api"
-PUSHER_APP_ID = os.getenv('PUSHER_APP_ID')
 PUSHER_KEY = os.getenv('PUSHER_KEY')
-PUSHER_SECRET = os.getenv('PUSHER_SECRET')
 PUSHER_CLUSTER = os.getenv('PUSHER_CLUSTER')
 
 # Conversation states
@@ -39,51 +68,138 @@ PUSHER_CLUSTER = os.getenv('PUSHER_CLUSTER')
     BANK_WITHDRAWAL_AMOUNT, BANK_WITHDRAWAL_CONFIRM
 ) = range(15)
 
-# User session storage
-user_data = {}
+# User session storage, bounded and expiring so idle or spam sessions don't accumulate
+user_data = SessionStore(SESSION_MAX_ENTRIES, SESSION_IDLE_TTL, SESSION_SWEEP_INTERVAL)
+metrics.register("sessions", user_data.stats)
 
-# Helper Functions
-async def api_request(method: str, endpoint: str, token: Optional[str] = None, data: Optional[Dict] = None) -> Dict:
-    """Make a request to the Copperx API"""
-    url = f"{API_BASE_URL}{endpoint}"
-    headers = {"Content-Type": "application/json"}
-    
-    if token:
-        headers["Authorization"] = f"Bearer {token}"
+def _forget_session_responses(user_id, session, reason):
+    """Drop cached API responses of a session that is going away"""
+    if session.token:
+        clear_cached_responses(session.token)
+        wallet_books.forget(session.token)
+
+user_data.add_eviction_listener(_forget_session_responses)
+
+# Rate-limited outbound messages; transfer results go ahead of notifications
+outbound = OutboundScheduler(OUTBOUND_GLOBAL_RATE, OUTBOUND_CHAT_RATE, max_queued=OUTBOUND_MAX_QUEUED)
+metrics.register("outbound", outbound.stats)
+metrics.register("views", view_cache.stats)
+
+# Real-time notifications: one Pusher connection carries every logged-in user's organization channel
+async def authorize_channel(socket_id: str, channel: str, token: str) -> Optional[str]:
+    """Pusher signature for subscribing socket_id to a private channel, using a member's token"""
+    response = await api_request(
+        "post",
+        "/notifications/auth",
+        token=token,
+        data={"socket_id": socket_id, "channel_name": channel}
+    )
+    if "error" in response:
+        logger.error(f"Failed to authenticate with Pusher: {response['error']}")
+        return None
+    return response.get("auth")
+
+# Events update the members' cached balances, so wallet screens don't need to poll for them
+account_events = AccountEvents(response_cache, EVENT_CACHE_INVALIDATIONS)
+metrics.register("account_events", account_events.stats)
+
+def deliver_event(organization_id: str, event: str, data: Any, user_ids: Set[int]) -> None:
+    """Notify the organization's logged-in users of a Pusher event"""
+    # The websocket and the webhook can both deliver a deposit, and the websocket replays after reconnecting
+    if not account_events.apply(notifications.tokens_of(organization_id), event, data):
+        return
+    if transaction_index is not None:
+        transaction_index.mark_stale(organization_id)
+    if event == "deposit" and isinstance(data, dict):
+        text = messages.DEPOSIT_RECEIVED.format(amount=data.get("amount"))
+    else:
+        return
+    for user_id in user_ids:
+        outbound.send_message(user_id, text, lane=NOTIFICATION)
+
+NOTIFICATIONS_ENABLED = bool(PUSHER_WS_URL or (PUSHER_KEY and PUSHER_CLUSTER))
+notifications = PusherSubscriber(
+    PUSHER_WS_URL or pusher_url(PUSHER_KEY, PUSHER_CLUSTER), authorize_channel, deliver_event
+)
+metrics.register("notifications", notifications.stats)
+
+def _leave_notifications(user_id, session, reason):
+    """Stop following the organization of a session that is going away"""
+    notifications.unsubscribe(user_id)
+
+user_data.add_eviction_listener(_leave_notifications)
+
+# Events POSTed by Copperx reach the same organization members as the websocket's
+events: Optional[EventIngress] = None
+if EVENTS_WEBHOOK_SECRET:
+    events = EventIngress(
+        EVENTS_WEBHOOK_SECRET, notifications.members_of, deliver_event, EVENTS_PATH, EVENTS_LISTEN, EVENTS_PORT,
+        queue_size=EVENTS_QUEUE_SIZE, workers=EVENTS_WORKERS, dedup_size=EVENTS_DEDUP_SIZE
+    )
+    metrics.register("events", events.stats)
+
+if NOTIFICATIONS_ENABLED or events is not None:
+    response_cache.ttls[BALANCES] = EVENT_DRIVEN_BALANCES_TTL
+
+def history_endpoint(page: int, limit: int = HISTORY_PAGE_SIZE) -> str:
+    return f"/transfers?page={page}&limit={limit}"
+
+# Local copy of each organization's transfers; main() opens it in the persistence file
+transaction_index: Optional[TransactionIndex] = None
+
+async def fetch_transfers(token: str, page: int, limit: int) -> Dict:
+    return await api_request("get", history_endpoint(page, limit), token=token)
+
+def history_owner(user_id: int, session: UserSession) -> str:
+    """Key of a session's transfers in the index: its organization, else the Telegram user"""
+    return session.organization_id or f"user-{user_id}"
+
+def history_changed(user_id: int) -> None:
+    """Have the next history view fetch the user's new transfers instead of waiting for the sync interval"""
+    session = user_data.get(user_id)
+    if transaction_index is not None and session is not None:
+        transaction_index.mark_stale(history_owner(user_id, session))
+
+def _refresh_history_owner(user_id, session, reason):
+    """Have the next session of the same owner sync its transfers instead of trusting the last sync"""
+    if transaction_index is not None:
+        transaction_index.mark_stale(history_owner(user_id, session))
+
+user_data.add_eviction_listener(_refresh_history_owner)
+
+async def session_expired(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Send a user whose session is gone back to login"""
+    if update.callback_query:
+        await update.callback_query.answer()
+        await edit_view(update.callback_query, messages.SESSION_EXPIRED, reply_markup=keyboards.LOGIN)
+    else:
+        await update.message.reply_text(messages.SESSION_EXPIRED, reply_markup=keyboards.LOGIN)
     
-    try:
-        if method.lower() == "get":
-            response = requests.get(url, headers=headers)
-        elif method.lower() == "post":
-            response = requests.post(url, headers=headers, json=data)
-        elif method.lower() == "put":
-            response = requests.put(url, headers=headers, json=data)
-        else:
-            return {"error": "Invalid method"}
-        
-        response.raise_for_status()  # Raise exception for 4XX/5XX responses
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        logger.error(f"API request error: {e}")
-        return {"error": str(e)}
+    return START
+
+def require_session(handler):
+    """Run the handler only for logged-in users, otherwise ask them to log in again"""
+    @functools.wraps(handler)
+    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+        user_id = update.effective_user.id
+        session = user_data.get(user_id)
+        if not session or not session.token:
+            return await session_expired(update, context)
+        # Sessions restored after a restart or eviction rejoin their organization's channel
+        if session.organization_id and not notifications.is_subscribed(user_id):
+            notifications.subscribe(user_id, session.organization_id, session.token)
+        return await handler(update, context)
+    return wrapper
 
 # Command Handlers
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Start command handler"""
     user_id = update.effective_user.id
-    user_data[user_id] = {}
+    # Dropping the old session runs the eviction listeners, which clear its cached responses and notifications
+    user_data.pop(user_id, None)
+    user_data[user_id] = UserSession()
     
-    keyboard = [
-        [InlineKeyboardButton("Login", callback_data="login")],
-        [InlineKeyboardButton("About Copperx", callback_data="about")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    
-    await update.message.reply_text(
-        "Welcome to Copperx Payout Bot! 🚀\n\n"
-        "This bot allows you to manage your Copperx account, view balances, and transfer funds directly from Telegram.",
-        reply_markup=reply_markup
-    )
+    await update.message.reply_text(messages.WELCOME, reply_markup=keyboards.START)
     
     return START
 
@@ -92,18 +208,7 @@ async def about_copperx(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
     query = update.callback_query
     await query.answer()
     
-    keyboard = [
-        [InlineKeyboardButton("Login", callback_data="login")],
-        [InlineKeyboardButton("Back to Start", callback_data="back_to_start")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    
-    await query.edit_message_text(
-        "Copperx is building a stablecoin bank for individuals and businesses.\n\n"
-        "Our platform allows you to manage USDC transactions easily and securely.\n\n"
-        "Visit https://copperx.io for more information.",
-        reply_markup=reply_markup
-    )
+    await edit_view(query, messages.ABOUT, reply_markup=keyboards.ABOUT)
     
     return START
 
@@ -112,7 +217,8 @@ async def initiate_login(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     query = update.callback_query
     await query.answer()
     
-    await query.edit_message_text(
+    await edit_view(
+        query,
         "Please enter your email address to login to your Copperx account:"
     )
     
@@ -125,13 +231,11 @@ async def process_email(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
     
     # Basic email validation
     if "@" not in email or "." not in email:
-        await update.message.reply_text(
-            "Invalid email format. Please enter a valid email address:"
-        )
+        await update.message.reply_text(messages.INVALID_EMAIL)
         return AUTH_EMAIL
     
     # Store email in user data
-    user_data[user_id]["email"] = email
+    user_data.setdefault(user_id, UserSession()).email = email
     
     # Request OTP via API
     response = await api_request(
@@ -156,7 +260,10 @@ async def process_otp(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int
     """Process the OTP and authenticate user"""
     user_id = update.effective_user.id
     otp = update.message.text.strip()
-    email = user_data[user_id]["email"]
+    session = user_data.get(user_id)
+    if not session or not session.email:
+        return await session_expired(update, context)
+    email = session.email
     
     # Authenticate with API
     response = await api_request(
@@ -172,7 +279,7 @@ async def process_otp(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int
         return START
     
     # Store token in user data
-    user_data[user_id]["token"] = response["token"]
+    session.token = response["token"]
     
     # Get user profile
     user_profile = await api_request(
@@ -187,188 +294,147 @@ async def process_otp(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int
         )
         return START
     
-    # Store user profile information
-    user_data[user_id]["profile"] = user_profile
-    user_data[user_id]["organization_id"] = user_profile.get("organizationId")
+    # Keep only the profile fields the bot renders
+    session.profile = ProfileSummary.from_api(user_profile)
     
-    # Setup Pusher for notifications if available
-    if PUSHER_APP_ID and PUSHER_KEY and PUSHER_SECRET and user_data[user_id]["organization_id"]:
-        setup_pusher_notifications(user_id, user_data[user_id]["organization_id"], user_data[user_id]["token"])
+    # Follow the organization's real-time events
+    if session.organization_id:
+        notifications.subscribe(user_id, session.organization_id, session.token)
     
     # Show main menu
     return await show_main_menu(update, context)
 
+@require_session
 async def show_main_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Display the main menu"""
     user_id = update.effective_user.id
-    profile = user_data[user_id].get("profile", {})
-    name = profile.get("name", "User")
-    
-    keyboard = [
-        [InlineKeyboardButton("👛 Wallet Management", callback_data="wallet_menu")],
-        [InlineKeyboardButton("💸 Fund Transfers", callback_data="transfer_menu")],
-        [InlineKeyboardButton("👤 My Profile", callback_data="profile")],
-        [InlineKeyboardButton("🔑 KYC Status", callback_data="kyc_status")],
-        [InlineKeyboardButton("📜 Transaction History", callback_data="transaction_history")],
-        [InlineKeyboardButton("⚙️ Settings", callback_data="settings")],
-        [InlineKeyboardButton("Logout", callback_data="logout")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    profile = user_data[user_id].profile
+    name = profile.name if profile and profile.name else "User"
+    text = messages.MAIN_MENU.format(name=name)
     
     if hasattr(update, 'callback_query') and update.callback_query:
         await update.callback_query.answer()
-        await update.callback_query.edit_message_text(
-            f"Hello {name}! 👋\n\nWelcome to your Copperx dashboard. What would you like to do today?",
-            reply_markup=reply_markup
-        )
+        await edit_view(update.callback_query, text, reply_markup=keyboards.MAIN_MENU)
     else:
-        await update.message.reply_text(
-            f"Hello {name}! 👋\n\nWelcome to your Copperx dashboard. What would you like to do today?",
-            reply_markup=reply_markup
-        )
+        await update.message.reply_text(text, reply_markup=keyboards.MAIN_MENU)
     
     return MAIN_MENU
 
+# Wallets with their balances joined, rebuilt only when the cached responses behind them change
+wallet_books = WalletBooks(SESSION_MAX_ENTRIES)
+metrics.register("wallet_books", wallet_books.stats)
+
+async def load_wallet_book(token: str) -> WalletBook:
+    """The account's wallets and balances, both usually answered by the response cache"""
+    responses = await fan_out({
+        "wallets": api_request("get", "/wallets", token=token),
+        "balances": api_request("get", BALANCES, token=token)
+    })
+    return wallet_books.get(token, responses["wallets"], responses["balances"])
+
 # Wallet Management Handlers
+@require_session
 async def wallet_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Show wallet management menu"""
     query = update.callback_query
     await query.answer()
     
     user_id = query.from_user.id
-    token = user_data[user_id]["token"]
+    token = user_data[user_id].token
     
     # Fetch wallet information
-    wallets_response = await api_request("get", "/wallets", token=token)
-    balances_response = await api_request("get", "/wallets/balances", token=token)
+    book = await load_wallet_book(token)
     
-    if "error" in wallets_response or "error" in balances_response:
-        await query.edit_message_text(
-            "Failed to fetch wallet information. Please try again later.",
-            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back to Main Menu", callback_data="main_menu")]])
-        )
+    if book.wallets is None:
+        await edit_view(query, messages.WALLET_INFO_FAILED, reply_markup=keyboards.BACK_TO_MAIN)
         return MAIN_MENU
     
     # Format wallet information
-    wallets = wallets_response.get("data", [])
-    balances = balances_response.get("data", {})
+    balances_available = book.balances is not None
     
-    wallet_text = "Your Wallets:\n\n"
+    parts = [messages.WALLETS_HEADER]
     
-    for wallet in wallets:
-        wallet_id = wallet.get("id")
-        network = wallet.get("network", "Unknown")
+    for wallet in book.wallets:
         address = wallet.get("address", "N/A")
-        is_default = wallet.get("isDefault", False)
-        
-        # Get balance for this wallet
-        wallet_balance = next((b for b in balances if b.get("walletId") == wallet_id), {})
-        balance = wallet_balance.get("balance", "0")
+        balance = f"{book.balance_of(wallet.get('id'))} USDC" if balances_available else "unavailable"
         
-        wallet_text += f"{'✅ ' if is_default else ''}Network: {network}\n"
-        wallet_text += f"Address: {address[:10]}...{address[-10:]}\n"
-        wallet_text += f"Balance: {balance} USDC\n\n"
-    
-    keyboard = [
-        [InlineKeyboardButton("Deposit Funds", callback_data="deposit_funds")],
-        [InlineKeyboardButton("Set Default Wallet", callback_data="set_default_wallet")],
-        [InlineKeyboardButton("View Transaction History", callback_data="transaction_history")],
-        [InlineKeyboardButton("Back to Main Menu", callback_data="main_menu")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    
-    await query.edit_message_text(wallet_text, reply_markup=reply_markup)
+        parts.append(messages.WALLET_ENTRY.format(
+            marker="✅ " if wallet.get("isDefault", False) else "",
+            network=wallet.get("network", "Unknown"),
+            address_start=address[:10],
+            address_end=address[-10:],
+            balance=balance
+        ))
+    
+    if not balances_available:
+        parts.append(messages.BALANCES_UNAVAILABLE)
+    
+    await edit_view(query, "".join(parts), reply_markup=keyboards.WALLET_MENU)
     return WALLET_MENU
 
+@require_session
 async def deposit_funds(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Show deposit instructions"""
     query = update.callback_query
     await query.answer()
     
     user_id = query.from_user.id
-    token = user_data[user_id]["token"]
+    token = user_data[user_id].token
     
-    # Fetch default wallet
-    wallets_response = await api_request("get", "/wallets/default", token=token)
+    # The default wallet is flagged in the wallet list the wallet menu just loaded
+    default_wallet = (await load_wallet_book(token)).default
     
-    if "error" in wallets_response or not wallets_response.get("data"):
-        await query.edit_message_text(
-            "Failed to fetch your default wallet. Please try again later.",
-            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back to Wallet Menu", callback_data="wallet_menu")]])
-        )
+    if default_wallet is None:
+        await edit_view(query, messages.DEFAULT_WALLET_FAILED, reply_markup=keyboards.BACK_TO_WALLET)
         return WALLET_MENU
     
-    default_wallet = wallets_response.get("data", {})
-    network = default_wallet.get("network", "Unknown")
-    address = default_wallet.get("address", "N/A")
-    
-    deposit_text = f"To deposit funds to your Copperx account, please send USDC to your wallet address:\n\n"
-    deposit_text += f"Network: {network}\n"
-    deposit_text += f"Address: `{address}`\n\n"
-    deposit_text += "Important notes:\n"
-    deposit_text += "• Only send USDC to this address\n"
-    deposit_text += "• Ensure you're sending on the correct network\n"
-    deposit_text += "• Deposits typically reflect in your account within minutes\n"
-    deposit_text += "• You'll receive a notification when your deposit arrives"
-    
-    keyboard = [
-        [InlineKeyboardButton("Back to Wallet Menu", callback_data="wallet_menu")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    
-    await query.edit_message_text(deposit_text, reply_markup=reply_markup, parse_mode="Markdown")
+    deposit_text = messages.DEPOSIT_INSTRUCTIONS.format(
+        network=default_wallet.get("network", "Unknown"),
+        address=default_wallet.get("address", "N/A")
+    )
+    
+    await edit_view(query, deposit_text, reply_markup=keyboards.BACK_TO_WALLET, parse_mode="Markdown")
     return WALLET_MENU
 
+@require_session
 async def set_default_wallet(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Set default wallet handler"""
     query = update.callback_query
     await query.answer()
     
     user_id = query.from_user.id
-    token = user_data[user_id]["token"]
+    token = user_data[user_id].token
     
     # Fetch all wallets
-    wallets_response = await api_request("get", "/wallets", token=token)
+    wallets = (await load_wallet_book(token)).wallets
     
-    if "error" in wallets_response or not wallets_response.get("data"):
-        await query.edit_message_text(
-            "Failed to fetch your wallets. Please try again later.",
-            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back to Wallet Menu", callback_data="wallet_menu")]])
-        )
+    if not wallets:
+        await edit_view(query, messages.WALLETS_FAILED, reply_markup=keyboards.BACK_TO_WALLET)
         return WALLET_MENU
     
-    wallets = wallets_response.get("data", [])
-    
     # Create keyboard with wallet options
-    keyboard = []
-    for wallet in wallets:
-        wallet_id = wallet.get("id")
-        network = wallet.get("network", "Unknown")
-        is_default = wallet.get("isDefault", False)
-        
-        label = f"{'✅ ' if is_default else ''}{network}"
-        keyboard.append([InlineKeyboardButton(label, callback_data=f"set_default_{wallet_id}")])
-    
-    keyboard.append([InlineKeyboardButton("Back to Wallet Menu", callback_data="wallet_menu")])
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    
-    await query.edit_message_text(
-        "Select your default wallet for transactions:",
-        reply_markup=reply_markup
+    reply_markup = keyboards.choice_keyboard(
+        (
+            (f"{'✅ ' if wallet.get('isDefault', False) else ''}{wallet.get('network', 'Unknown')}",
+             callbacks.pack(callbacks.SET_DEFAULT, wallet.get('id')))
+            for wallet in wallets
+        ),
+        keyboards.BACK_TO_WALLET_ROW
     )
     
+    await edit_view(query, messages.SELECT_DEFAULT_WALLET, reply_markup=reply_markup)
+    
     return WALLET_MENU
 
+@require_session
 async def update_default_wallet(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Update the default wallet"""
     query = update.callback_query
-    await """Update the default wallet"""
-    query = update.callback_query
     await query.answer()
     
     user_id = query.from_user.id
-    token = user_data[user_id]["token"]
-    wallet_id = query.data.split("_")[-1]
+    token = user_data[user_id].token
+    _, wallet_id = callbacks.unpack(query.data)
     
     # Update default wallet via API
     response = await api_request(
@@ -379,54 +445,44 @@ async def update_default_wallet(update: Update, context: ContextTypes.DEFAULT_TY
     )
     
     if "error" in response:
-        await query.edit_message_text(
-            f"Failed to update default wallet: {response.get('error')}",
-            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back to Wallet Menu", callback_data="wallet_menu")]])
+        await edit_view(
+            query,
+            messages.DEFAULT_WALLET_UPDATE_FAILED.format(error=response.get('error')),
+            reply_markup=keyboards.BACK_TO_WALLET
         )
     else:
-        await query.edit_message_text(
-            "Default wallet updated successfully!",
-            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back to Wallet Menu", callback_data="wallet_menu")]])
-        )
+        await edit_view(query, messages.DEFAULT_WALLET_UPDATED, reply_markup=keyboards.BACK_TO_WALLET)
     
     return WALLET_MENU
 
 # Fund Transfer Handlers
+@require_session
 async def transfer_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Show transfer options menu"""
     query = update.callback_query
     await query.answer()
     
-    keyboard = [
-        [InlineKeyboardButton("Send to Email Address", callback_data="email_transfer")],
-        [InlineKeyboardButton("Send to External Wallet", callback_data="wallet_transfer")],
-        [InlineKeyboardButton("Withdraw to Bank Account", callback_data="bank_withdrawal")],
-        [InlineKeyboardButton("View Recent Transfers", callback_data="recent_transfers")],
-        [InlineKeyboardButton("Back to Main Menu", callback_data="main_menu")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    
-    await query.edit_message_text(
-        "Select a transfer option:",
-        reply_markup=reply_markup
-    )
+    await edit_view(query, messages.TRANSFER_MENU, reply_markup=keyboards.TRANSFER_MENU)
     
     return TRANSFER_MENU
 
+@require_session
 async def email_transfer_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Start email transfer process"""
     query = update.callback_query
     await query.answer()
     
     user_id = query.from_user.id
-    user_data[user_id]["transfer_type"] = "email"
+    user_data[user_id].start_draft("email")
     
-    await query.edit_message_text(
+    await edit_view(
+        query,
         "Please enter the recipient's email address:"
     )
     
     return EMAIL_TRANSFER_RECIPIENT
 
+@require_session
 async def email_transfer_recipient(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Process email recipient"""
     user_id = update.effective_user.id
@@ -434,13 +490,11 @@ async def email_transfer_recipient(update: Update, context: ContextTypes.DEFAULT
     
     # Basic email validation
     if "@" not in email or "." not in email:
-        await update.message.reply_text(
-            "Invalid email format. Please enter a valid email address:"
-        )
+        await update.message.reply_text(messages.INVALID_EMAIL)
         return EMAIL_TRANSFER_RECIPIENT
     
     # Store recipient email
-    user_data[user_id]["recipient_email"] = email
+    user_data[user_id].draft.recipient_email = email
     
     await update.message.reply_text(
         f"Please enter the amount in USDC to send to {email}:"
@@ -448,6 +502,7 @@ async def email_transfer_recipient(update: Update, context: ContextTypes.DEFAULT
     
     return EMAIL_TRANSFER_AMOUNT
 
+@require_session
 async def email_transfer_amount(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Process transfer amount"""
     user_id = update.effective_user.id
@@ -458,64 +513,52 @@ async def email_transfer_amount(update: Update, context: ContextTypes.DEFAULT_TY
         if amount <= 0:
             raise ValueError("Amount must be positive")
     except ValueError:
-        await update.message.reply_text(
-            "Invalid amount. Please enter a valid number:"
-        )
+        await update.message.reply_text(messages.INVALID_AMOUNT)
         return EMAIL_TRANSFER_AMOUNT
     
     # Store amount
-    user_data[user_id]["transfer_amount"] = amount
+    user_data[user_id].draft.amount = amount
     
     # Fetch user's balance to confirm sufficient funds
-    token = user_data[user_id]["token"]
-    balances_response = await api_request("get", "/wallets/balances", token=token)
+    token = user_data[user_id].token
+    book = await load_wallet_book(token)
     
-    if "error" in balances_response:
-        await update.message.reply_text(
-            "Failed to fetch your balance. Please try again later.",
-            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back to Transfer Menu", callback_data="transfer_menu")]])
-        )
+    if book.balances is None:
+        await update.message.reply_text(messages.BALANCE_FAILED, reply_markup=keyboards.BACK_TO_TRANSFER)
         return TRANSFER_MENU
     
-    balances = balances_response.get("data", [])
-    total_balance = sum(float(b.get("balance", 0)) for b in balances)
+    total_balance = book.total_balance
     
     if total_balance < amount:
         await update.message.reply_text(
-            f"Insufficient funds. Your current balance is {total_balance} USDC.",
-            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back to Transfer Menu", callback_data="transfer_menu")]])
+            messages.INSUFFICIENT_FUNDS.format(balance=total_balance),
+            reply_markup=keyboards.BACK_TO_TRANSFER
         )
         return TRANSFER_MENU
     
     # Show confirmation
-    recipient_email = user_data[user_id]["recipient_email"]
+    recipient_email = user_data[user_id].draft.recipient_email
     
-    keyboard = [
-        [InlineKeyboardButton("Confirm", callback_data="confirm_email_transfer")],
-        [InlineKeyboardButton("Cancel", callback_data="transfer_menu")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    user_data[user_id].draft.renew_idempotency_key()
     
     await update.message.reply_text(
-        f"Please confirm the transfer:\n\n"
-        f"To: {recipient_email}\n"
-        f"Amount: {amount} USDC\n"
-        f"Fee: 0 USDC\n"
-        f"Total: {amount} USDC",
-        reply_markup=reply_markup
+        messages.CONFIRM_EMAIL_TRANSFER.format(recipient=recipient_email, amount=amount),
+        reply_markup=keyboards.CONFIRM_EMAIL_TRANSFER
     )
     
     return EMAIL_TRANSFER_CONFIRM
 
+@require_session
 async def email_transfer_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Process email transfer confirmation"""
     query = update.callback_query
     await query.answer()
     
     user_id = query.from_user.id
-    token = user_data[user_id]["token"]
-    recipient_email = user_data[user_id]["recipient_email"]
-    amount = user_data[user_id]["transfer_amount"]
+    token = user_data[user_id].token
+    draft = user_data[user_id].draft
+    recipient_email = draft.recipient_email
+    amount = draft.amount
     
     # Execute transfer via API
     transfer_data = {
@@ -524,43 +567,40 @@ async def email_transfer_confirm(update: Update, context: ContextTypes.DEFAULT_T
         "message": "Transfer via Telegram bot"
     }
     
-    response = await api_request(
-        "post", 
-        "/transfers/send", 
-        token=token,
-        data=transfer_data
-    )
+    response = await submit_transfer(draft.submission_key(), "/transfers/send", token, transfer_data)
     
     if "error" in response:
-        await query.edit_message_text(
-            f"Transfer failed: {response.get('error')}",
-            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back to Transfer Menu", callback_data="transfer_menu")]])
-        )
+        text = messages.TRANSFER_FAILED.format(error=response.get('error'))
     else:
         transfer_id = response.get("data", {}).get("id", "Unknown")
-        
-        await query.edit_message_text(
-            f"Success! {amount} USDC has been sent to {recipient_email}\n"
-            f"Transfer ID: {transfer_id}",
-            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back to Transfer Menu", callback_data="transfer_menu")]])
-        )
+        text = messages.EMAIL_TRANSFER_SENT.format(amount=amount, recipient=recipient_email, transfer_id=transfer_id)
+        history_changed(user_id)
+    
+    await outbound.edit_message_text(
+        query.message.chat_id, query.message.message_id, text,
+        lane=TRANSFER,
+        reply_markup=keyboards.BACK_TO_TRANSFER
+    )
     
     return TRANSFER_MENU
 
+@require_session
 async def wallet_transfer_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Start wallet transfer process"""
     query = update.callback_query
     await query.answer()
     
     user_id = query.from_user.id
-    user_data[user_id]["transfer_type"] = "wallet"
+    user_data[user_id].start_draft("wallet")
     
-    await query.edit_message_text(
+    await edit_view(
+        query,
         "Please enter the recipient's wallet address:"
     )
     
     return WALLET_TRANSFER_ADDRESS
 
+@require_session
 async def wallet_transfer_address(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Process wallet address"""
     user_id = update.effective_user.id
@@ -574,30 +614,22 @@ async def wallet_transfer_address(update: Update, context: ContextTypes.DEFAULT_
         return WALLET_TRANSFER_ADDRESS
     
     # Store recipient address
-    user_data[user_id]["recipient_address"] = address
+    user_data[user_id].draft.recipient_address = address
     
     # Fetch user's wallets to select network
-    token = user_data[user_id]["token"]
-    wallets_response = await api_request("get", "/wallets", token=token)
+    token = user_data[user_id].token
+    wallets = (await load_wallet_book(token)).wallets
     
-    if "error" in wallets_response:
-        await update.message.reply_text(
-            "Failed to fetch your wallets. Please try again later.",
-            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back to Transfer Menu", callback_data="transfer_menu")]])
-        )
+    if wallets is None:
+        await update.message.reply_text(messages.WALLETS_FAILED, reply_markup=keyboards.BACK_TO_TRANSFER)
         return TRANSFER_MENU
     
-    wallets = wallets_response.get("data", [])
     
     # Create keyboard for network selection
-    keyboard = []
-    for wallet in wallets:
-        network = wallet.get("network", "Unknown")
-        wallet_id = wallet.get("id")
-        keyboard.append([InlineKeyboardButton(network, callback_data=f"network_{wallet_id}")])
-    
-    keyboard.append([InlineKeyboardButton("Cancel", callback_data="transfer_menu")])
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    reply_markup = keyboards.choice_keyboard(
+        ((wallet.get("network", "Unknown"), callbacks.pack(callbacks.NETWORK, wallet.get("id"))) for wallet in wallets),
+        keyboards.CANCEL_TRANSFER_ROW
+    )
     
     await update.message.reply_text(
         "Please select the network for this transfer:",
@@ -606,23 +638,26 @@ async def wallet_transfer_address(update: Update, context: ContextTypes.DEFAULT_
     
     return WALLET_TRANSFER_AMOUNT
 
+@require_session
 async def wallet_transfer_network(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Process wallet network selection"""
     query = update.callback_query
     await query.answer()
     
     user_id = query.from_user.id
-    wallet_id = query.data.split("_")[-1]
+    _, wallet_id = callbacks.unpack(query.data)
     
     # Store wallet ID for transfer
-    user_data[user_id]["wallet_id"] = wallet_id
+    user_data[user_id].draft.wallet_id = wallet_id
     
-    await query.edit_message_text(
+    await edit_view(
+        query,
         "Please enter the amount in USDC to send:"
     )
     
     return WALLET_TRANSFER_AMOUNT
 
+@require_session
 async def wallet_transfer_amount(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Process wallet transfer amount"""
     user_id = update.effective_user.id
@@ -633,72 +668,62 @@ async def wallet_transfer_amount(update: Update, context: ContextTypes.DEFAULT_T
         if amount <= 0:
             raise ValueError("Amount must be positive")
     except ValueError:
-        await update.message.reply_text(
-            "Invalid amount. Please enter a valid number:"
-        )
+        await update.message.reply_text(messages.INVALID_AMOUNT)
         return WALLET_TRANSFER_AMOUNT
     
     # Store amount
-    user_data[user_id]["transfer_amount"] = amount
+    user_data[user_id].draft.amount = amount
     
-    # Fetch user's balance to confirm sufficient funds
-    token = user_data[user_id]["token"]
-    balances_response = await api_request("get", "/wallets/balances", token=token)
+    # Fetch user's balance to confirm sufficient funds, and the wallets for the network name
+    token = user_data[user_id].token
+    book = await load_wallet_book(token)
     
-    if "error" in balances_response:
-        await update.message.reply_text(
-            "Failed to fetch your balance. Please try again later.",
-            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back to Transfer Menu", callback_data="transfer_menu")]])
-        )
+    if book.balances is None:
+        await update.message.reply_text(messages.BALANCE_FAILED, reply_markup=keyboards.BACK_TO_TRANSFER)
         return TRANSFER_MENU
     
-    balances = balances_response.get("data", [])
-    total_balance = sum(float(b.get("balance", 0)) for b in balances)
+    total_balance = book.total_balance
     
     if total_balance < amount:
         await update.message.reply_text(
-            f"Insufficient funds. Your current balance is {total_balance} USDC.",
-            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back to Transfer Menu", callback_data="transfer_menu")]])
+            messages.INSUFFICIENT_FUNDS.format(balance=total_balance),
+            reply_markup=keyboards.BACK_TO_TRANSFER
         )
         return TRANSFER_MENU
     
     # Show confirmation
-    recipient_address = user_data[user_id]["recipient_address"]
-    wallet_id = user_data[user_id]["wallet_id"]
+    recipient_address = user_data[user_id].draft.recipient_address
+    wallet_id = user_data[user_id].draft.wallet_id
     
     # Get network name
-    wallets_response = await api_request("get", "/wallets", token=token)
-    wallets = wallets_response.get("data", [])
-    network = next((w.get("network", "Unknown") for w in wallets if w.get("id") == wallet_id), "Unknown")
+    network = book.network_of(wallet_id)
     
-    keyboard = [
-        [InlineKeyboardButton("Confirm", callback_data="confirm_wallet_transfer")],
-        [InlineKeyboardButton("Cancel", callback_data="transfer_menu")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    user_data[user_id].draft.renew_idempotency_key()
     
     await update.message.reply_text(
-        f"Please confirm the transfer:\n\n"
-        f"To address: {recipient_address[:10]}...{recipient_address[-10:]}\n"
-        f"Network: {network}\n"
-        f"Amount: {amount} USDC\n"
-        f"Fee: Varies by network\n"
-        f"Total: ~{amount} USDC + network fees",
-        reply_markup=reply_markup
+        messages.CONFIRM_WALLET_TRANSFER.format(
+            address_start=recipient_address[:10],
+            address_end=recipient_address[-10:],
+            network=network,
+            amount=amount
+        ),
+        reply_markup=keyboards.CONFIRM_WALLET_TRANSFER
     )
     
     return WALLET_TRANSFER_CONFIRM
 
+@require_session
 async def wallet_transfer_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Process wallet transfer confirmation"""
     query = update.callback_query
     await query.answer()
     
     user_id = query.from_user.id
-    token = user_data[user_id]["token"]
-    recipient_address = user_data[user_id]["recipient_address"]
-    amount = user_data[user_id]["transfer_amount"]
-    wallet_id = user_data[user_id]["wallet_id"]
+    token = user_data[user_id].token
+    draft = user_data[user_id].draft
+    recipient_address = draft.recipient_address
+    amount = draft.amount
+    wallet_id = draft.wallet_id
     
     # Execute transfer via API
     transfer_data = {
@@ -707,66 +732,56 @@ async def wallet_transfer_confirm(update: Update, context: ContextTypes.DEFAULT_
         "walletId": wallet_id
     }
     
-    response = await api_request(
-        "post", 
-        "/transfers/wallet-withdraw", 
-        token=token,
-        data=transfer_data
-    )
+    response = await submit_transfer(draft.submission_key(), "/transfers/wallet-withdraw", token, transfer_data)
     
     if "error" in response:
-        await query.edit_message_text(
-            f"Transfer failed: {response.get('error')}",
-            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back to Transfer Menu", callback_data="transfer_menu")]])
-        )
+        text = messages.TRANSFER_FAILED.format(error=response.get('error'))
     else:
         transfer_id = response.get("data", {}).get("id", "Unknown")
-        
-        await query.edit_message_text(
-            f"Success! {amount} USDC has been sent to the wallet address\n"
-            f"Transfer ID: {transfer_id}",
-            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back to Transfer Menu", callback_data="transfer_menu")]])
-        )
+        text = messages.WALLET_TRANSFER_SENT.format(amount=amount, transfer_id=transfer_id)
+        history_changed(user_id)
+    
+    await outbound.edit_message_text(
+        query.message.chat_id, query.message.message_id, text,
+        lane=TRANSFER,
+        reply_markup=keyboards.BACK_TO_TRANSFER
+    )
     
     return TRANSFER_MENU
 
+@require_session
 async def bank_withdrawal_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Start bank withdrawal process"""
     query = update.callback_query
     await query.answer()
     
     user_id = query.from_user.id
-    token = user_data[user_id]["token"]
+    token = user_data[user_id].token
     
     # Check if user has completed KYC
     kyc_response = await api_request("get", "/kycs", token=token)
     
     if "error" in kyc_response:
-        await query.edit_message_text(
-            "Failed to verify KYC status. Please try again later.",
-            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back to Transfer Menu", callback_data="transfer_menu")]])
-        )
+        await edit_view(query, messages.KYC_CHECK_FAILED, reply_markup=keyboards.BACK_TO_TRANSFER)
         return TRANSFER_MENU
     
     kyc_data = kyc_response.get("data", {})
     kyc_status = kyc_data.get("status")
     
     if kyc_status != "APPROVED":
-        await query.edit_message_text(
-            "Bank withdrawals require completed KYC verification.\n\n"
-            "Please complete your KYC on the Copperx web platform first.",
-            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back to Transfer Menu", callback_data="transfer_menu")]])
-        )
+        await edit_view(query, messages.KYC_REQUIRED, reply_markup=keyboards.BACK_TO_TRANSFER)
         return TRANSFER_MENU
     
-    user_data[user_id]["transfer_type"] = "bank"
+    user_data[user_id].start_draft("bank")
     
-    await query.edit_message_text(
+    await edit_view(
+        query,
         "Please enter the amount in USDC to withdraw to your bank account:"
     )
     
     return BANK_WITHDRAWAL_AMOUNT
 
+@require_session
 async def bank_withdrawal_amount(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Process bank withdrawal amount"""
     user_id = update.effective_user.id
@@ -778,68 +793,54 @@ async def bank_withdrawal_amount(update: Update, context: ContextTypes.DEFAULT_T
             raise ValueError("Amount must be positive")
         # Most platforms have minimum withdrawal amounts
         if amount < 10:
-            await update.message.reply_text(
-                "Minimum withdrawal amount is 10 USDC. Please enter a higher amount:"
-            )
+            await update.message.reply_text(messages.MINIMUM_WITHDRAWAL)
             return BANK_WITHDRAWAL_AMOUNT
     except ValueError:
-        await update.message.reply_text(
-            "Invalid amount. Please enter a valid number:"
-        )
+        await update.message.reply_text(messages.INVALID_AMOUNT)
         return BANK_WITHDRAWAL_AMOUNT
     
     # Store amount
-    user_data[user_id]["transfer_amount"] = amount
+    user_data[user_id].draft.amount = amount
     
     # Fetch user's balance to confirm sufficient funds
-    token = user_data[user_id]["token"]
-    balances_response = await api_request("get", "/wallets/balances", token=token)
+    token = user_data[user_id].token
+    book = await load_wallet_book(token)
     
-    if "error" in balances_response:
-        await update.message.reply_text(
-            "Failed to fetch your balance. Please try again later.",
-            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back to Transfer Menu", callback_data="transfer_menu")]])
-        )
+    if book.balances is None:
+        await update.message.reply_text(messages.BALANCE_FAILED, reply_markup=keyboards.BACK_TO_TRANSFER)
         return TRANSFER_MENU
     
-    balances = balances_response.get("data", [])
-    total_balance = sum(float(b.get("balance", 0)) for b in balances)
+    total_balance = book.total_balance
     
     if total_balance < amount:
         await update.message.reply_text(
-            f"Insufficient funds. Your current balance is {total_balance} USDC.",
-            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back to Transfer Menu", callback_data="transfer_menu")]])
+            messages.INSUFFICIENT_FUNDS.format(balance=total_balance),
+            reply_markup=keyboards.BACK_TO_TRANSFER
         )
         return TRANSFER_MENU
     
     # Show confirmation with estimated fees
     estimated_fee = max(5, amount * 0.01)  # Example fee calculation
     
-    keyboard = [
-        [InlineKeyboardButton("Confirm", callback_data="confirm_bank_withdrawal")],
-        [InlineKeyboardButton("Cancel", callback_data="transfer_menu")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    user_data[user_id].draft.renew_idempotency_key()
     
     await update.message.reply_text(
-        f"Please confirm the bank withdrawal:\n\n"
-        f"Amount: {amount} USDC\n"
-        f"Estimated Fee: {estimated_fee} USDC\n"
-        f"Total to Receive: ~{amount - estimated_fee} USDC\n\n"
-        f"Funds will be sent to your default bank account.",
-        reply_markup=reply_markup
+        messages.CONFIRM_BANK_WITHDRAWAL.format(amount=amount, fee=estimated_fee, receive=amount - estimated_fee),
+        reply_markup=keyboards.CONFIRM_BANK_WITHDRAWAL
     )
     
     return BANK_WITHDRAWAL_CONFIRM
 
+@require_session
 async def bank_withdrawal_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Process bank withdrawal confirmation"""
     query = update.callback_query
     await query.answer()
     
     user_id = query.from_user.id
-    token = user_data[user_id]["token"]
-    amount = user_data[user_id]["transfer_amount"]
+    token = user_data[user_id].token
+    draft = user_data[user_id].draft
+    amount = draft.amount
     
     # Execute bank withdrawal via API
     withdrawal_data = {
@@ -847,53 +848,41 @@ async def bank_withdrawal_confirm(update: Update, context: ContextTypes.DEFAULT_
         "currency": "USD"
     }
     
-    response = await api_request(
-        "post", 
-        "/transfers/offramp", 
-        token=token,
-        data=withdrawal_data
-    )
+    response = await submit_transfer(draft.submission_key(), "/transfers/offramp", token, withdrawal_data)
     
     if "error" in response:
-        await query.edit_message_text(
-            f"Withdrawal failed: {response.get('error')}",
-            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back to Transfer Menu", callback_data="transfer_menu")]])
-        )
+        text = messages.WITHDRAWAL_FAILED.format(error=response.get('error'))
     else:
         transfer_id = response.get("data", {}).get("id", "Unknown")
-        
-        await query.edit_message_text(
-            f"Success! Your bank withdrawal of {amount} USDC has been initiated.\n"
-            f"Transfer ID: {transfer_id}\n\n"
-            f"Funds should arrive in your bank account within 1-3 business days.",
-            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back to Transfer Menu", callback_data="transfer_menu")]])
-        )
+        text = messages.WITHDRAWAL_STARTED.format(amount=amount, transfer_id=transfer_id)
+        history_changed(user_id)
+    
+    await outbound.edit_message_text(
+        query.message.chat_id, query.message.message_id, text,
+        lane=TRANSFER,
+        reply_markup=keyboards.BACK_TO_TRANSFER
+    )
     
     return TRANSFER_MENU
 
 # Profile and KYC Handlers
+@require_session
 async def view_profile(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """View user profile"""
     query = update.callback_query
     await query.answer()
     
     user_id = query.from_user.id
-    token = user_data[user_id]["token"]
+    token = user_data[user_id].token
     
     # Refresh profile data
     profile_response = await api_request("get", "/auth/me", token=token)
     
     if "error" in profile_response:
-        await query.edit_message_text(
-            "Failed to fetch your profile. Please try again later.",
-            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back to Main Menu", callback_data="main_menu")]])
-        )
+        await edit_view(query, messages.PROFILE_FAILED, reply_markup=keyboards.BACK_TO_MAIN)
         return MAIN_MENU
     
     profile = profile_response
-    name = profile.get("name", "N/A")
-    email = profile.get("email", "N/A")
-    organization = profile.get("organizationName", "N/A")
     created_at = profile.get("createdAt", "N/A")
     
     if created_at != "N/A":
@@ -904,156 +893,239 @@ async def view_profile(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
         except:
             pass
     
-    profile_text = f"📋 Your Profile\n\n"
-    profile_text += f"👤 Name: {name}\n"
-    profile_text += f"📧 Email: {email}\n"
-    profile_text += f"🏢 Organization: {organization}\n"
-    profile_text += f"📅 Member Since: {created_at}\n"
-    
-    keyboard = [
-        [InlineKeyboardButton("Back to Main Menu", callback_data="main_menu")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    profile_text = messages.PROFILE.format(
+        name=profile.get("name", "N/A"),
+        email=profile.get("email", "N/A"),
+        organization=profile.get("organizationName", "N/A"),
+        created_at=created_at
+    )
     
-    await query.edit_message_text(profile_text, reply_markup=reply_markup)
+    await edit_view(query, profile_text, reply_markup=keyboards.BACK_TO_MAIN)
     return MAIN_MENU
 
+@require_session
 async def view_kyc_status(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """View KYC status"""
     query = update.callback_query
     await query.answer()
     
     user_id = query.from_user.id
-    token = user_data[user_id]["token"]
+    token = user_data[user_id].token
     
     # Fetch KYC status
     kyc_response = await api_request("get", "/kycs", token=token)
     
     if "error" in kyc_response:
-        await query.edit_message_text(
-            "Failed to fetch your KYC status. Please try again later.",
-            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back to Main Menu", callback_data="main_menu")]])
-        )
+        await edit_view(query, messages.KYC_FAILED, reply_markup=keyboards.BACK_TO_MAIN)
         return MAIN_MENU
     
     kyc_data = kyc_response.get("data", {})
     kyc_status = kyc_data.get("status", "NOT_STARTED")
-    kyc_type = kyc_data.get("type", "INDIVIDUAL")
-    
-    status_emoji = {
-        "APPROVED": "✅",
-        "PENDING": "⏳",
-        "REJECTED": "❌",
-        "NOT_STARTED": "🔴"
-    }
-    
-    status_text = {
-        "APPROVED": "Your KYC verification has been approved.",
-        "PENDING": "Your KYC verification is being reviewed.",
-        "REJECTED": "Your KYC verification was rejected. Please check the web platform for details.",
-        "NOT_STARTED": "You haven't started the KYC verification process yet."
-    }
     
-    kyc_text = f"🔐 KYC Status\n\n"
-    kyc_text += f"{status_emoji.get(kyc_status, '❓')} Status: {kyc_status}\n"
-    kyc_text += f"📋 Type: {kyc_type}\n\n"
-    kyc_text += status_text.get(kyc_status, "Unknown status")
+    kyc_text = messages.KYC_STATUS.format(
+        emoji=messages.KYC_STATUS_EMOJI.get(kyc_status, '❓'),
+        status=kyc_status,
+        kyc_type=kyc_data.get("type", "INDIVIDUAL"),
+        description=messages.KYC_STATUS_TEXT.get(kyc_status, "Unknown status")
+    )
     
     if kyc_status != "APPROVED":
-        kyc_text += "\n\nComplete KYC verification on the Copperx web platform to access all features."
-    
-    keyboard = [
-        [InlineKeyboardButton("Back to Main Menu", callback_data="main_menu")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
+        kyc_text += messages.KYC_INCOMPLETE
     
-    await query.edit_message_text(kyc_text, reply_markup=reply_markup)
+    await edit_view(query, kyc_text, reply_markup=keyboards.BACK_TO_MAIN)
     return MAIN_MENU
 
 # Transaction History Handlers
+async def show_history(query, text: str, reply_markup) -> None:
+    """Show a page of history; one too long for a message continues in new ones, the last carrying the buttons"""
+    chunks = split_text(text)
+    await edit_view(query, chunks[0], reply_markup=reply_markup if len(chunks) == 1 else None)
+    # The rest follow the edited message into its chat, which is a group's rather than the user's in groups
+    chat_id = query.message.chat_id
+    for position, chunk in enumerate(chunks[1:], 2):
+        outbound.send_message(chat_id, chunk, reply_markup=reply_markup if position == len(chunks) else None)
+
+@require_session
 async def view_transaction_history(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    """View transaction history"""
+    """View a page of transaction history"""
     query = update.callback_query
     await query.answer()
     
     user_id = query.from_user.id
-    token = user_data[user_id]["token"]
+    session = user_data[user_id]
+    token = session.token
+    
+    # Prev/Next carry the page to show; the menu buttons open the first
+    action, payload = callbacks.unpack(query.data)
+    page = int(payload) if action == callbacks.HISTORY_PAGE and payload.isdigit() else 1
+    page = max(1, page)
+    
+    # The index answers once it holds the page; until then, and if it can't sync, ask the API
+    indexed = None
+    if transaction_index is not None:
+        owner = history_owner(user_id, session)
+        if await transaction_index.sync(owner, token):
+            indexed = transaction_index.page(owner, page, HISTORY_PAGE_SIZE)
+    
+    if indexed is not None:
+        transactions, has_more = indexed
+    else:
+        transactions_response = await api_request("get", history_endpoint(page), token=token)
+        
+        if "error" in transactions_response:
+            await edit_view(query, messages.HISTORY_FAILED, reply_markup=keyboards.BACK_TO_MAIN)
+            return MAIN_MENU
+        
+        transactions = transactions_response.get("data", [])
+        has_more = transactions_response.get("hasMore", len(transactions) >= HISTORY_PAGE_SIZE)
+        
+        # Fetch the next page while this one is read, so Next is answered from the cache
+        if transactions and has_more:
+            prefetch(api_request("get", history_endpoint(page + 1), token=token))
     
-    # Fetch recent transactions
-    transactions_response = await api_request("get", "/transfers?page=1&limit=10", token=token)
+    if not transactions:
+        if page == 1:
+            await edit_view(query, messages.NO_TRANSACTIONS, reply_markup=keyboards.BACK_TO_MAIN)
+        else:
+            await edit_view(query, messages.NO_MORE_TRANSACTIONS, reply_markup=keyboards.history_keyboard(page, False))
+        return MAIN_MENU
     
-    if "error" in transactions_response:
-        await query.edit_message_text(
-            "Failed to fetch your transaction history. Please try again later.",
-            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back to Main Menu", callback_data="main_menu")]])
-        )
+    header = messages.HISTORY_HEADER if page == 1 else messages.HISTORY_PAGE_HEADER.format(page=page)
+    await show_history(query, history_renderer.render(header, transactions), keyboards.history_keyboard(page, has_more))
+    return MAIN_MENU
+
+@require_session
+async def search_history(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Search indexed transactions: /history <terms> starts a search, its Prev/Next buttons page through it"""
+    query = update.callback_query
+    user_id = update.effective_user.id
+    session = user_data[user_id]
+    
+    if query:
+        await query.answer()
+        _, payload = callbacks.unpack(query.data)
+        page = max(1, int(payload)) if payload.isdigit() else 1
+        terms = session.history_search or ""
+    else:
+        page = 1
+        terms = " ".join(context.args or ())
+        if not terms:
+            await update.message.reply_text(messages.SEARCH_USAGE, reply_markup=keyboards.BACK_TO_MAIN)
+            return MAIN_MENU
+    
+    async def reply(text: str, reply_markup) -> None:
+        if query:
+            await show_history(query, text, reply_markup)
+            return
+        chunks = split_text(text)
+        for position, chunk in enumerate(chunks, 1):
+            await update.message.reply_text(chunk, reply_markup=reply_markup if position == len(chunks) else None)
+    
+    try:
+        search = parse_filter(terms)
+    except ValueError as e:
+        await reply(messages.SEARCH_INVALID.format(error=e) + messages.SEARCH_USAGE, keyboards.BACK_TO_MAIN)
         return MAIN_MENU
     
-    transactions = transactions_response.get("data", [])
+    # A failed sync still leaves what was indexed before to search
+    owner = history_owner(user_id, session)
+    if transaction_index is not None:
+        await transaction_index.sync(owner, session.token)
+    if transaction_index is None or not transaction_index.has_synced(owner):
+        await reply(messages.SEARCH_UNAVAILABLE, keyboards.BACK_TO_MAIN)
+        return MAIN_MENU
     
+    session.history_search = terms
+    transactions, has_more = transaction_index.page(owner, page, HISTORY_PAGE_SIZE, search)
     if not transactions:
-        await query.edit_message_text(
-            "You don't have any transactions yet.",
-            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back to Main Menu", callback_data="main_menu")]])
-        )
+        await reply(messages.NO_MATCHING_TRANSACTIONS, keyboards.history_keyboard(page, False, callbacks.HISTORY_SEARCH_PAGE))
         return MAIN_MENU
     
-    # Format transaction history
-    history_text = "📜 Recent Transactions\n\n"
+    header = messages.SEARCH_HEADER.format(page=page)
+    if not transaction_index.is_complete(owner):
+        header += messages.SEARCH_INDEXING
+    reply_markup = keyboards.history_keyboard(page, has_more, callbacks.HISTORY_SEARCH_PAGE)
+    await reply(history_renderer.render(header, transactions), reply_markup)
+    return MAIN_MENU
+
+# Full statements are built in the background and sent as a document
+exports = ExportJobs(EXPORT_MAX_CONCURRENT)
+metrics.register("exports", exports.stats)
+
+async def fetch_export_page(token: str, page: int, limit: int) -> Dict:
+    # Each page is read once, so caching it would only hold the whole history in memory
+    return await api_request("get", history_endpoint(page, limit), token=token, use_cache=False)
+
+async def run_export(chat_id: int, message_id: int, token: str, fmt: str, period: TransactionFilter, terms: str) -> int:
+    """Write the user's history in period to a temporary file and send it to chat_id, editing its status message as it goes"""
+    def report(text: str) -> None:
+        outbound.edit_message_text(chat_id, message_id, text)
     
-    for tx in transactions:
-        tx_id = tx.get("id", "Unknown")[:8]
-        tx_type = tx.get("type", "Unknown")
-        amount = tx.get("amount", "0")
-        status = tx.get("status", "Unknown")
-        created_at = tx.get("createdAt", "Unknown")
-        
-        # Format date if available
-        if created_at != "Unknown":
-            try:
-                tx_date = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
-                created_at = tx_date.strftime("%m/%d/%Y")
-            except:
-                pass
-        
-        # Determine direction and icon
-        direction = ""
-        if tx_type == "DEPOSIT":
-            direction = "↓ IN"
-            icon = "📥"
-        elif tx_type in ["WITHDRAWAL", "EMAIL_TRANSFER", "WALLET_TRANSFER"]:
-            direction = "↑ OUT"
-            icon = "📤"
-        else:
-            icon = "🔄"
-        
-        history_text += f"{icon} {direction} {amount} USDC - {created_at} - {status}\n"
+    try:
+        output, count = await export_transfers(
+            fetch_export_page, token, fmt,
+            on_progress=lambda count: report(messages.EXPORT_PROGRESS.format(count=count)),
+            page_size=EXPORT_PAGE_SIZE, spool_size=EXPORT_SPOOL_SIZE, progress_interval=EXPORT_PROGRESS_INTERVAL,
+            since=period.since, until=period.until
+        )
+    except ExportError:
+        report(messages.EXPORT_FAILED)
+        raise
+    
+    with output:
+        if count == 0:
+            report(messages.NO_TRANSACTIONS)
+            return 0
+        if file_size(output) > MAX_DOCUMENT_SIZE:
+            # NDJSON repeats every field name per row, so the same rows as CSV may fit
+            if fmt == CSV:
+                report(messages.EXPORT_TRY_PERIOD.format(count=count, fmt=fmt))
+            else:
+                report(messages.EXPORT_TRY_CSV.format(count=count, period=f" {terms}" if terms else ""))
+            return 0
+        report(messages.EXPORT_UPLOADING.format(count=count))
+        filename = f"copperx-transactions-{datetime.now(timezone.utc):%Y-%m-%d}.{fmt}"
+        sent = await outbound.send_document(
+            chat_id, StreamedInputFile(output, filename), caption=messages.EXPORT_CAPTION.format(count=count)
+        )
     
-    keyboard = [
-        [InlineKeyboardButton("Back to Main Menu", callback_data="main_menu")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    report(messages.EXPORT_DONE.format(count=count) if sent else messages.EXPORT_FAILED)
+    return count
+
+@require_session
+async def export_history(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Optional[int]:
+    """Export the transaction history as a document: /export [csv|ndjson] [from:YYYY-MM-DD] [to:YYYY-MM-DD]"""
+    user_id = update.effective_user.id
+    token = user_data[user_id].token
     
-    await query.edit_message_text(history_text, reply_markup=reply_markup)
-    return MAIN_MENU
+    args = list(context.args or [])
+    fmt = args.pop(0).lower() if args and args[0].lower() in FORMATS else CSV
+    terms = " ".join(args)
+    try:
+        period = parse_filter(terms)
+    except ValueError:
+        period = None
+    
+    # Exports take a period; the other search terms are for /history
+    if period is None or period.types or period.statuses or period.min_amount is not None or period.max_amount is not None:
+        await update.message.reply_text(messages.EXPORT_USAGE)
+    elif exports.is_running(user_id):
+        await update.message.reply_text(messages.EXPORT_RUNNING)
+    else:
+        status = await update.message.reply_text(messages.EXPORT_STARTED)
+        exports.start(user_id, lambda: run_export(status.chat_id, status.message_id, token, fmt, period, terms))
+    
+    # The export runs on its own, so whatever the user was doing carries on
+    return None
 
 # Settings and Logout Handlers
+@require_session
 async def settings_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Show settings menu"""
     query = update.callback_query
     await query.answer()
     
-    keyboard = [
-        [InlineKeyboardButton("Enable Notifications", callback_data="toggle_notifications")],
-        [InlineKeyboardButton("Back to Main Menu", callback_data="main_menu")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    
-    await query.edit_message_text(
-        "⚙️ Settings\n\n"
-        "Configure your preferences for the Copperx bot:",
-        reply_markup=reply_markup
-    )
+    await edit_view(query, messages.SETTINGS, reply_markup=keyboards.SETTINGS)
     
     return MAIN_MENU
 
@@ -1064,66 +1136,34 @@ async def logout(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     
     user_id = query.from_user.id
     if user_id in user_data:
+        token = user_data[user_id].token
+        if token:
+            clear_cached_responses(token)
+            wallet_books.forget(token)
         del user_data[user_id]
     
-    await query.edit_message_text(
-        "You have been logged out successfully.\n\n"
-        "Thank you for using the Copperx Payout Bot!",
-        reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Login Again", callback_data="login")]])
-    )
+    await edit_view(query, messages.LOGGED_OUT, reply_markup=keyboards.LOGIN_AGAIN)
     
     return START
 
-# Notification System
-def setup_pusher_notifications(user_id, organization_id, token):
-    """Setup Pusher client for real-time notifications"""
-    if not (PUSHER_APP_ID and PUSHER_KEY and PUSHER_SECRET and PUSHER_CLUSTER):
-        return
-    
-    try:
-        # Get Pusher auth
-        auth_response = requests.post(
-            f"{API_BASE_URL}/notifications/auth",
-            headers={
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "socket_id": f"bot-{user_id}",
-                "channel_name": f"private-org-{organization_id}"
-            }
-        )
-        
-        if auth_response.status_code != 200:
-            logger.error(f"Failed to authenticate with Pusher: {auth_response.text}")
-            return
-        
-        # Initialize Pusher
-        pusher_client = pusher.Pusher(
-            app_id=PUSHER_APP_ID,
-            key=PUSHER_KEY,
-            secret=PUSHER_SECRET,
-            cluster=PUSHER_CLUSTER,
-            ssl=True
-        )
-        
-        # Store in user data for later use
-        user_data[user_id]["pusher"] = pusher_client
-        
-        logger.info(f"Pusher notifications set up for user {user_id}")
-    except Exception as e:
-        logger.error(f"Error setting up Pusher: {e}")
+async def expired_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Answer a button no current menu handles, so its spinner doesn't hang"""
+    await update.callback_query.answer(messages.MENU_EXPIRED, show_alert=True)
 
 # Setup main conversation handler
-def create_conversation_handler():
+def create_conversation_handler(persistent: bool = False):
     """Create the main conversation handler"""
     return ConversationHandler(
+        name="copperx_conversation",
+        persistent=persistent,
         entry_points=[CommandHandler("start", start)],
         states={
             START: [
-                CallbackQueryHandler(initiate_login, pattern="^login$"),
-                CallbackQueryHandler(about_copperx, pattern="^about$"),
-                CallbackQueryHandler(start, pattern="^back_to_start$")
+                CallbackRouter({
+                    callbacks.LOGIN: initiate_login,
+                    callbacks.ABOUT: about_copperx,
+                    callbacks.BACK_TO_START: start
+                })
             ],
             AUTH_EMAIL: [
                 MessageHandler(filters.TEXT & ~filters.COMMAND, process_email)
@@ -1132,27 +1172,36 @@ def create_conversation_handler():
                 MessageHandler(filters.TEXT & ~filters.COMMAND, process_otp)
             ],
             MAIN_MENU: [
-               CallbackQueryHandler(wallet_menu, pattern="^wallet_menu$"),
-                CallbackQueryHandler(transfer_menu, pattern="^transfer_menu$"),
-                CallbackQueryHandler(view_profile, pattern="^profile$"),
-                CallbackQueryHandler(view_kyc_status, pattern="^kyc_status$"),
-                CallbackQueryHandler(view_transaction_history, pattern="^transaction_history$"),
-                CallbackQueryHandler(settings_menu, pattern="^settings$"),
-                CallbackQueryHandler(logout, pattern="^logout$")
+                CallbackRouter({
+                    callbacks.WALLET_MENU: wallet_menu,
+                    callbacks.TRANSFER_MENU: transfer_menu,
+                    callbacks.PROFILE: view_profile,
+                    callbacks.KYC_STATUS: view_kyc_status,
+                    callbacks.TRANSACTION_HISTORY: view_transaction_history,
+                    callbacks.HISTORY_PAGE: view_transaction_history,
+                    callbacks.HISTORY_SEARCH_PAGE: search_history,
+                    callbacks.SETTINGS: settings_menu,
+                    callbacks.LOGOUT: logout,
+                    callbacks.MAIN_MENU: show_main_menu
+                })
             ],
             WALLET_MENU: [
-                CallbackQueryHandler(deposit_funds, pattern="^deposit_funds$"),
-                CallbackQueryHandler(set_default_wallet, pattern="^set_default_wallet$"),
-                CallbackQueryHandler(view_transaction_history, pattern="^transaction_history$"),
-                CallbackQueryHandler(show_main_menu, pattern="^main_menu$"),
-                CallbackQueryHandler(update_default_wallet, pattern="^set_default_.*$")
+                CallbackRouter({
+                    callbacks.DEPOSIT_FUNDS: deposit_funds,
+                    callbacks.SET_DEFAULT_WALLET: set_default_wallet,
+                    callbacks.SET_DEFAULT: update_default_wallet,
+                    callbacks.TRANSACTION_HISTORY: view_transaction_history,
+                    callbacks.MAIN_MENU: show_main_menu
+                })
             ],
             TRANSFER_MENU: [
-                CallbackQueryHandler(email_transfer_start, pattern="^email_transfer$"),
-                CallbackQueryHandler(wallet_transfer_start, pattern="^wallet_transfer$"),
-                CallbackQueryHandler(bank_withdrawal_start, pattern="^bank_withdrawal$"),
-                CallbackQueryHandler(view_transaction_history, pattern="^recent_transfers$"),
-                CallbackQueryHandler(show_main_menu, pattern="^main_menu$")
+                CallbackRouter({
+                    callbacks.EMAIL_TRANSFER: email_transfer_start,
+                    callbacks.WALLET_TRANSFER: wallet_transfer_start,
+                    callbacks.BANK_WITHDRAWAL: bank_withdrawal_start,
+                    callbacks.RECENT_TRANSFERS: view_transaction_history,
+                    callbacks.MAIN_MENU: show_main_menu
+                })
             ],
             EMAIL_TRANSFER_RECIPIENT: [
                 MessageHandler(filters.TEXT & ~filters.COMMAND, email_transfer_recipient)
@@ -1161,87 +1210,146 @@ def create_conversation_handler():
                 MessageHandler(filters.TEXT & ~filters.COMMAND, email_transfer_amount)
             ],
             EMAIL_TRANSFER_CONFIRM: [
-                CallbackQueryHandler(email_transfer_confirm, pattern="^confirm_email_transfer$"),
-                CallbackQueryHandler(transfer_menu, pattern="^transfer_menu$")
+                CallbackRouter({
+                    callbacks.CONFIRM_EMAIL_TRANSFER: email_transfer_confirm,
+                    callbacks.TRANSFER_MENU: transfer_menu
+                })
             ],
             WALLET_TRANSFER_ADDRESS: [
                 MessageHandler(filters.TEXT & ~filters.COMMAND, wallet_transfer_address)
             ],
             WALLET_TRANSFER_AMOUNT: [
-                CallbackQueryHandler(wallet_transfer_network, pattern="^network_.*$"),
-                CallbackQueryHandler(transfer_menu, pattern="^transfer_menu$"),
+                CallbackRouter({
+                    callbacks.NETWORK: wallet_transfer_network,
+                    callbacks.TRANSFER_MENU: transfer_menu
+                }),
                 MessageHandler(filters.TEXT & ~filters.COMMAND, wallet_transfer_amount)
             ],
             WALLET_TRANSFER_CONFIRM: [
-                CallbackQueryHandler(wallet_transfer_confirm, pattern="^confirm_wallet_transfer$"),
-                CallbackQueryHandler(transfer_menu, pattern="^transfer_menu$")
+                CallbackRouter({
+                    callbacks.CONFIRM_WALLET_TRANSFER: wallet_transfer_confirm,
+                    callbacks.TRANSFER_MENU: transfer_menu
+                })
             ],
             BANK_WITHDRAWAL_AMOUNT: [
                 MessageHandler(filters.TEXT & ~filters.COMMAND, bank_withdrawal_amount)
             ],
             BANK_WITHDRAWAL_CONFIRM: [
-                CallbackQueryHandler(bank_withdrawal_confirm, pattern="^confirm_bank_withdrawal$"),
-                CallbackQueryHandler(transfer_menu, pattern="^transfer_menu$")
+                CallbackRouter({
+                    callbacks.CONFIRM_BANK_WITHDRAWAL: bank_withdrawal_confirm,
+                    callbacks.TRANSFER_MENU: transfer_menu
+                })
             ]
         },
-        fallbacks=[CommandHandler("start", start), CommandHandler("help", start)]
+        fallbacks=[
+            CommandHandler("start", start),
+            CommandHandler("help", start),
+            CommandHandler("history", search_history),
+            CommandHandler("export", export_history)
+        ]
     )
 
-# Create webhook handler
-async def webhook(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Receive webhook updates from Pusher"""
-    # Implementation depends on how Copperx webhooks are structured
-    # This is a placeholder for the webhook handling logic
-    user_id = update.effective_user.id
-    message_data = update.message.text
-    
-    try:
-        data = json.loads(message_data)
-        event_type = data.get("event")
-        
-        if event_type == "deposit":
-            amount = data.get("amount")
-            await context.bot.send_message(
-                chat_id=user_id,
-                text=f"🎉 Deposit Received! {amount} USDC has been credited to your account."
-            )
-    except Exception as e:
-        logger.error(f"Error processing webhook: {e}")
-
 # Helper command to display help
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Display help message"""
-    help_text = (
-        "🤖 Copperx Payout Bot Help\n\n"
-        "Commands:\n"
-        "/start - Start or restart the bot\n"
-        "/help - Show this help message\n\n"
-        "Features:\n"
-        "• View wallet balances\n"
-        "• Send funds to email addresses\n"
-        "• Withdraw to external wallets\n"
-        "• Bank withdrawals\n"
-        "• Transaction history\n"
-        "• Account management\n\n"
-        "For support, please contact the Copperx team via https://t.me/copperxcommunity/2991"
-    )
-    await update.message.reply_text(help_text)
+    await update.message.reply_text(messages.HELP)
+
+# Operator command to inspect runtime metrics
+async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Display runtime metrics to admins"""
+    if update.effective_user.id not in ADMIN_USER_IDS:
+        return
+    
+    # Telegram rejects messages longer than 4096 characters
+    await update.message.reply_text(metrics.format_snapshot()[:4096])
+
+# Application lifecycle hooks
+async def on_startup(application: Application) -> None:
+    """Open shared resources once the Application is initialized"""
+    await init_http_client(application)
+    user_data.start_sweeper()
+    if user_data.backend is not None:
+        user_data.backend.start()
+    outbound.start(application.bot)
+    if NOTIFICATIONS_ENABLED:
+        notifications.start()
+    if events is not None:
+        await events.start()
+
+async def on_stop(application: Application) -> None:
+    """Let queued messages go out while the bot can still send them"""
+    await notifications.stop()
+    if events is not None:
+        await events.stop()
+    if transaction_index is not None:
+        await transaction_index.stop()
+    await exports.stop()
+    await outbound.stop()
+
+async def on_shutdown(application: Application) -> None:
+    """Release shared resources when the Application shuts down"""
+    await user_data.stop_sweeper()
+    await transfer_ledger.stop()
+    if user_data.backend is not None:
+        await user_data.backend.stop()
+        user_data.backend.database.close()
+    await close_http_client(application)
 
 # Main function to run the bot
 def main():
     """Start the bot"""
+    global transaction_index
+    # Updates from different users run in parallel; each user's stay in order.
+    # The bounded queue lets the webhook refuse updates instead of buffering without limit
+    builder = (
+        Application.builder()
+        .token(BOT_TOKEN)
+        .application_class(OrderedApplication, kwargs={"max_concurrency": UPDATE_CONCURRENCY})
+        .concurrent_updates(UPDATE_MAX_IN_PROGRESS)
+        .update_queue(UpdateQueue(UPDATE_QUEUE_SIZE, UPDATE_MAX_IN_PROGRESS))
+        .post_init(on_startup)
+        .post_stop(on_stop)
+        .post_shutdown(on_shutdown)
+    )
+    
+    # Keep sessions and conversation states across restarts so users stay logged in
+    if PERSISTENCE_PATH:
+        database = SQLiteDatabase(PERSISTENCE_PATH)
+        session_backend = SQLiteSessionBackend(database, SESSION_FLUSH_INTERVAL, encode=dump_session, decode=load_session)
+        user_data.attach_backend(session_backend)
+        metrics.register("session_persistence", session_backend.stats)
+        builder = builder.persistence(SQLitePersistence(database, CONVERSATION_FLUSH_INTERVAL))
+        # Draft idempotency keys persist, so the outcomes they were submitted with must too
+        transfer_ledger.use_database(database)
+        if TRANSACTION_INDEX_ENABLED:
+            transaction_index = TransactionIndex(
+                database, fetch_transfers, TRANSACTION_SYNC_PAGE_SIZE, TRANSACTION_SYNC_INTERVAL, TRANSACTION_BACKFILL_DELAY
+            )
+            metrics.register("transaction_index", transaction_index.stats)
+    
     # Create the Application
-    application = Application.builder().token(BOT_TOKEN).build()
+    application = builder.build()
+    metrics.register("updates", application.stats)
     
     # Add conversation handler
-    conv_handler = create_conversation_handler()
+    conv_handler = create_conversation_handler(persistent=bool(PERSISTENCE_PATH))
     application.add_handler(conv_handler)
     
     # Add standalone command handlers
     application.add_handler(CommandHandler("help", help_command))
+    application.add_handler(CommandHandler("stats", stats_command))
+    
+    # Buttons of old or finished menus that the conversation no longer routes
+    application.add_handler(CallbackQueryHandler(expired_menu))
     
     # Start the Bot
-    application.run_polling()
+    if BOT_MODE == "webhook":
+        ingress = WebhookIngress(application, WEBHOOK_PATH, WEBHOOK_SECRET_TOKEN, WEBHOOK_LISTEN, WEBHOOK_PORT)
+        metrics.register("webhook", ingress.stats)
+        webhook_url = WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH if WEBHOOK_URL else None
+        asyncio.run(serve_webhook(application, ingress, webhook_url, WEBHOOK_MAX_CONNECTIONS))
+    else:
+        application.run_polling()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
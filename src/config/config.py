@@ -6,12 +6,146 @@ load_dotenv()
 
 # Bot Configuration
 BOT_TOKEN = os.getenv('BOT_TOKEN')
-API_BASE_URL = "https://income-api.copperx.io/api"
+# Override to point the bot at another API, e.g. the local mock used for benchmarks
+API_BASE_URL = os.getenv('API_BASE_URL', 'https://income-api.copperx.io/api')
 
 # Pusher Configuration
 PUSHER_APP_ID = os.getenv('PUSHER_APP_ID')
 PUSHER_KEY = os.getenv('PUSHER_KEY')
 PUSHER_SECRET = os.getenv('PUSHER_SECRET')
+PUSHER_CLUSTER = os.getenv('PUSHER_CLUSTER')
+# Full websocket URL, e.g. a local mock; derived from PUSHER_KEY and PUSHER_CLUSTER when unset
+PUSHER_WS_URL = os.getenv('PUSHER_WS_URL')
+
+# HTTP Client Configuration
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '100'))
+HTTP_MAX_KEEPALIVE = int(os.getenv('HTTP_MAX_KEEPALIVE', '20'))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv('HTTP_KEEPALIVE_EXPIRY', '30'))
+HTTP_PER_HOST_LIMIT = int(os.getenv('HTTP_PER_HOST_LIMIT', '50'))
+HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', '15'))
+HTTP2_ENABLED = os.getenv('HTTP2_ENABLED', 'true').lower() == 'true'
+
+# Per-endpoint request timeouts in seconds (HTTP_TIMEOUT applies to the rest)
+API_TIMEOUTS = {
+    '/auth/me': 10,
+    '/kycs': 10,
+    '/wallets': 10,
+    '/wallets/default': 10,
+    '/wallets/balances': 10,
+    '/transfers/send': 30,
+    '/transfers/wallet-withdraw': 30,
+    '/transfers/offramp': 30
+}
+
+# Retries (idempotent GETs only) and circuit breaking
+API_RETRY_ATTEMPTS = int(os.getenv('API_RETRY_ATTEMPTS', '3'))
+API_RETRY_BASE_DELAY = float(os.getenv('API_RETRY_BASE_DELAY', '0.2'))
+API_RETRY_MAX_DELAY = float(os.getenv('API_RETRY_MAX_DELAY', '2'))
+API_BREAKER_FAILURES = int(os.getenv('API_BREAKER_FAILURES', '5'))
+API_BREAKER_RESET = float(os.getenv('API_BREAKER_RESET', '30'))
+
+# Shared deadline in seconds for screens that fan out several API calls
+FANOUT_TIMEOUT = float(os.getenv('FANOUT_TIMEOUT', '10'))
+
+# API Response Cache Configuration
+def _parse_ttls(value: str) -> dict:
+    """Parse 'endpoint=seconds,endpoint=seconds' overrides"""
+    ttls = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        endpoint, _, seconds = item.partition('=')
+        ttls[endpoint.strip()] = float(seconds)
+    return ttls
+
+API_CACHE_MAX_ENTRIES = int(os.getenv('API_CACHE_MAX_ENTRIES', '10000'))
+API_CACHE_TTLS = {
+    '/auth/me': 300,
+    '/kycs': 300,
+    '/wallets': 60,
+    '/wallets/default': 60,
+    '/wallets/balances': 10,
+    '/transfers': 15,
+    **_parse_ttls(os.getenv('API_CACHE_TTLS', ''))
+}
+
+# Successful writes clear the cached reads they make stale
+API_CACHE_INVALIDATIONS = {
+    '/transfers/send': ('/wallets/balances', '/transfers'),
+    '/transfers/wallet-withdraw': ('/wallets/balances', '/transfers'),
+    '/transfers/offramp': ('/wallets/balances', '/transfers'),
+    '/wallets/default': ('/wallets', '/wallets/default', '/wallets/balances')
+}
+
+# Account events keep cached reads current: a deposit patches the wallet's cached balance
+# and each event clears the cached reads it makes stale
+EVENT_CACHE_INVALIDATIONS = {
+    'deposit': ('/transfers',),
+    'transfer': ('/wallets/balances', '/transfers'),
+    'withdrawal': ('/wallets/balances', '/transfers')
+}
+# With events flowing, balances only need refetching this rarely
+EVENT_DRIVEN_BALANCES_TTL = float(os.getenv('EVENT_DRIVEN_BALANCES_TTL', '300'))
+
+# Submitted transfers are remembered per idempotency key for this long
+IDEMPOTENCY_TTL = float(os.getenv('IDEMPOTENCY_TTL', '86400'))
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv('IDEMPOTENCY_MAX_ENTRIES', '50000'))
+
+# User sessions: idle expiry, size cap and sweep interval in seconds
+SESSION_MAX_ENTRIES = int(os.getenv('SESSION_MAX_ENTRIES', '50000'))
+SESSION_IDLE_TTL = float(os.getenv('SESSION_IDLE_TTL', '86400'))
+SESSION_SWEEP_INTERVAL = float(os.getenv('SESSION_SWEEP_INTERVAL', '300'))
+
+# Sessions and conversation states survive restarts in this SQLite file (empty disables)
+PERSISTENCE_PATH = os.getenv('PERSISTENCE_PATH', 'copperx_bot.sqlite3')
+SESSION_FLUSH_INTERVAL = float(os.getenv('SESSION_FLUSH_INTERVAL', '1'))
+CONVERSATION_FLUSH_INTERVAL = float(os.getenv('CONVERSATION_FLUSH_INTERVAL', '1'))
+
+# Update ingestion: "polling" pulls getUpdates, "webhook" serves Telegram's POSTs
+BOT_MODE = os.getenv('BOT_MODE', 'polling')
+WEBHOOK_URL = os.getenv('WEBHOOK_URL', '')
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/telegram')
+WEBHOOK_LISTEN = os.getenv('WEBHOOK_LISTEN', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', '8443'))
+WEBHOOK_SECRET_TOKEN = os.getenv('WEBHOOK_SECRET_TOKEN', '')
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv('WEBHOOK_MAX_CONNECTIONS', '40'))
+UPDATE_QUEUE_SIZE = int(os.getenv('UPDATE_QUEUE_SIZE', '1000'))
+
+# Updates run concurrently across users and in order per user
+UPDATE_CONCURRENCY = int(os.getenv('UPDATE_CONCURRENCY', '64'))
+UPDATE_MAX_IN_PROGRESS = int(os.getenv('UPDATE_MAX_IN_PROGRESS', '1000'))
+
+# Outbound messages stay within Telegram's limits of ~30/s overall and ~1/s per chat
+OUTBOUND_GLOBAL_RATE = float(os.getenv('OUTBOUND_GLOBAL_RATE', '30'))
+OUTBOUND_CHAT_RATE = float(os.getenv('OUTBOUND_CHAT_RATE', '1'))
+OUTBOUND_MAX_QUEUED = int(os.getenv('OUTBOUND_MAX_QUEUED', '10000'))
+
+# Deposit and other account events POSTed by Copperx/Pusher, signed with this secret (empty disables)
+EVENTS_WEBHOOK_SECRET = os.getenv('EVENTS_WEBHOOK_SECRET', '')
+EVENTS_PATH = os.getenv('EVENTS_PATH', '/events')
+EVENTS_LISTEN = os.getenv('EVENTS_LISTEN', '0.0.0.0')
+EVENTS_PORT = int(os.getenv('EVENTS_PORT', '8444'))
+EVENTS_QUEUE_SIZE = int(os.getenv('EVENTS_QUEUE_SIZE', '10000'))
+EVENTS_WORKERS = int(os.getenv('EVENTS_WORKERS', '4'))
+# Event ids remembered to drop redelivered events
+EVENTS_DEDUP_SIZE = int(os.getenv('EVENTS_DEDUP_SIZE', '100000'))
+
+# Transactions per page of history; the next page is fetched while the user reads the current one
+HISTORY_PAGE_SIZE = int(os.getenv('HISTORY_PAGE_SIZE', '10'))
+
+# Transfers are copied into the persistence file so history pages and /history searches skip the API
+TRANSACTION_INDEX_ENABLED = os.getenv('TRANSACTION_INDEX_ENABLED', 'true').lower() == 'true'
+TRANSACTION_SYNC_INTERVAL = float(os.getenv('TRANSACTION_SYNC_INTERVAL', '30'))
+TRANSACTION_SYNC_PAGE_SIZE = int(os.getenv('TRANSACTION_SYNC_PAGE_SIZE', '100'))
+# Pause between pages while older transfers are backfilled
+TRANSACTION_BACKFILL_DELAY = float(os.getenv('TRANSACTION_BACKFILL_DELAY', '0.5'))
+
+# /export walks every page of /transfers into a temporary file, kept in memory up to EXPORT_SPOOL_SIZE bytes
+EXPORT_PAGE_SIZE = int(os.getenv('EXPORT_PAGE_SIZE', '100'))
+EXPORT_SPOOL_SIZE = int(os.getenv('EXPORT_SPOOL_SIZE', str(1024 * 1024)))
+EXPORT_PROGRESS_INTERVAL = float(os.getenv('EXPORT_PROGRESS_INTERVAL', '2'))
+EXPORT_MAX_CONCURRENT = int(os.getenv('EXPORT_MAX_CONCURRENT', '4'))
+
+# Telegram user IDs allowed to run operator commands such as /stats
+ADMIN_USER_IDS = {int(i) for i in os.getenv('ADMIN_USER_IDS', '').split(',') if i.strip()}
 
 # Conversation States
 (MAIN_MENU, TRANSFER_MENU, WALLET_TRANSFER_AMOUNT, 
@@ -4,6 +4,7 @@ from src.services.api_service import api_request
 from src.config.config import (TRANSFER_MENU, WALLET_TRANSFER_AMOUNT, 
                              BANK_WITHDRAWAL_AMOUNT, BANK_WITHDRAWAL_CONFIRM,
                              WALLET_TRANSFER_CONFIRM)
+from src.ui.callbacks import unpack
 from src.utils.logger import logger
 
 # Store user data (in production, use a proper database)
@@ -15,7 +16,7 @@ async def wallet_transfer_network(update: Update, context: ContextTypes.DEFAULT_
     await query.answer()
     
     user_id = query.from_user.id
-    wallet_id = query.data.split("_")[-1]
+    _, wallet_id = unpack(query.data)
     
     user_data[user_id]["wallet_id"] = wallet_id
     
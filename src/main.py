@@ -1,5 +1,10 @@
-from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, filters, ConversationHandler
-from src.config.config import BOT_TOKEN
+import asyncio
+from telegram.ext import Application, CommandHandler, MessageHandler, filters, ConversationHandler
+from src.config.config import (
+    BOT_TOKEN, BOT_MODE, WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_LISTEN, WEBHOOK_PORT,
+    WEBHOOK_SECRET_TOKEN, WEBHOOK_MAX_CONNECTIONS, UPDATE_QUEUE_SIZE,
+    UPDATE_CONCURRENCY, UPDATE_MAX_IN_PROGRESS
+)
 from src.handlers.transfer_handlers import (
     wallet_transfer_network,
     wallet_transfer_amount,
@@ -11,13 +16,27 @@ from src.handlers.bank_handlers import (
     bank_withdrawal_confirm
 )
 from src.handlers.profile_handlers import view_profile, view_kyc_status
+from src.services.http_client import init_http_client, close_http_client
+from src.services.webhook import WebhookIngress, serve_webhook
+from src.services.concurrency import OrderedApplication, UpdateQueue
+from src.ui import callbacks
+from src.ui.callbacks import CallbackRouter
 from src.utils.logger import logger
 
 def main():
     """Initialize and start the bot"""
     # Create application
-    application = Application.builder().token(BOT_TOKEN).build()
-
+    builder = (
+        Application.builder()
+        .token(BOT_TOKEN)
+        .application_class(OrderedApplication, kwargs={"max_concurrency": UPDATE_CONCURRENCY})
+        .concurrent_updates(UPDATE_MAX_IN_PROGRESS)
+        .update_queue(UpdateQueue(UPDATE_QUEUE_SIZE, UPDATE_MAX_IN_PROGRESS))
+        .post_init(init_http_client)
+        .post_shutdown(close_http_client)
+    )
+    application = builder.build()
+    
     # Add handlers
     conv_handler = ConversationHandler(
         entry_points=[CommandHandler("start", view_profile)],
@@ -26,18 +45,25 @@ def main():
         },
         fallbacks=[CommandHandler("cancel", lambda u, c: ConversationHandler.END)]
     )
-
+    
     application.add_handler(conv_handler)
     
     # Add other handlers
-    application.add_handler(CallbackQueryHandler(wallet_transfer_network, pattern="^network_"))
-    application.add_handler(CallbackQueryHandler(bank_withdrawal_start, pattern="^bank_withdrawal$"))
-    application.add_handler(CallbackQueryHandler(view_profile, pattern="^profile$"))
-    application.add_handler(CallbackQueryHandler(view_kyc_status, pattern="^kyc_status$"))
-
+    application.add_handler(CallbackRouter({
+        callbacks.NETWORK: wallet_transfer_network,
+        callbacks.BANK_WITHDRAWAL: bank_withdrawal_start,
+        callbacks.PROFILE: view_profile,
+        callbacks.KYC_STATUS: view_kyc_status
+    }))
+    
     # Start the bot
-    logger.info("Bot started")
-    application.run_polling()
+    logger.info(f"Bot started in {BOT_MODE} mode")
+    if BOT_MODE == "webhook":
+        ingress = WebhookIngress(application, WEBHOOK_PATH, WEBHOOK_SECRET_TOKEN, WEBHOOK_LISTEN, WEBHOOK_PORT)
+        webhook_url = WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH if WEBHOOK_URL else None
+        asyncio.run(serve_webhook(application, ingress, webhook_url, WEBHOOK_MAX_CONNECTIONS))
+    else:
+        application.run_polling()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
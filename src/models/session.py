@@ -0,0 +1,116 @@
+import json
+import uuid
+from typing import Any, Dict, Optional
+
+class ProfileSummary:
+    """The parts of the /auth/me payload the bot renders"""
+
+    __slots__ = ("name", "email", "organization_id", "organization_name", "created_at")
+
+    def __init__(self, name: Optional[str] = None, email: Optional[str] = None, organization_id: Optional[str] = None,
+                 organization_name: Optional[str] = None, created_at: Optional[str] = None):
+        self.name = name
+        self.email = email
+        self.organization_id = organization_id
+        self.organization_name = organization_name
+        self.created_at = created_at
+
+    @classmethod
+    def from_api(cls, payload: Dict[str, Any]) -> "ProfileSummary":
+        return cls(
+            name=payload.get("name"),
+            email=payload.get("email"),
+            organization_id=payload.get("organizationId"),
+            organization_name=payload.get("organizationName"),
+            created_at=payload.get("createdAt")
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+def new_idempotency_key() -> str:
+    """Generate the key identifying one pending transfer"""
+    return str(uuid.uuid4())
+
+class TransferDraft:
+    """A transfer the user is still filling in, from choosing its type to confirming it"""
+
+    __slots__ = ("transfer_type", "recipient_email", "recipient_address", "wallet_id", "amount", "idempotency_key")
+
+    def __init__(self, transfer_type: str, recipient_email: Optional[str] = None, recipient_address: Optional[str] = None,
+                 wallet_id: Optional[str] = None, amount: Optional[float] = None, idempotency_key: Optional[str] = None):
+        self.transfer_type = transfer_type
+        self.recipient_email = recipient_email
+        self.recipient_address = recipient_address
+        self.wallet_id = wallet_id
+        self.amount = amount
+        self.idempotency_key = idempotency_key
+
+    def renew_idempotency_key(self) -> None:
+        """Every confirmation screen is a new pending transfer with its own idempotency key"""
+        self.idempotency_key = new_idempotency_key()
+
+    def submission_key(self) -> str:
+        """The key the transfer is submitted under, so submitting it again replays the recorded result"""
+        if self.idempotency_key is None:
+            self.idempotency_key = new_idempotency_key()
+        return self.idempotency_key
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+class UserSession:
+    """One Telegram user's login state and in-progress transfer"""
+
+    __slots__ = ("email", "token", "profile", "draft", "history_search")
+
+    def __init__(self, email: Optional[str] = None, token: Optional[str] = None,
+                 profile: Optional[ProfileSummary] = None, draft: Optional[TransferDraft] = None,
+                 history_search: Optional[str] = None):
+        self.email = email
+        self.token = token
+        self.profile = profile
+        self.draft = draft
+        # Terms of the last /history search, re-run when its result pages are turned
+        self.history_search = history_search
+
+    @property
+    def organization_id(self) -> Optional[str]:
+        return self.profile.organization_id if self.profile else None
+
+    def start_draft(self, transfer_type: str) -> TransferDraft:
+        """Replace any unfinished transfer with a new one"""
+        self.draft = TransferDraft(transfer_type)
+        return self.draft
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "email": self.email,
+            "token": self.token,
+            "profile": self.profile.to_dict() if self.profile else None,
+            "draft": self.draft.to_dict() if self.draft else None,
+            "history_search": self.history_search
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "UserSession":
+        profile = data.get("profile")
+        draft = data.get("draft")
+        # Sessions stored before profiles were trimmed hold the raw /auth/me payload
+        if profile and "organizationId" in profile:
+            profile = ProfileSummary.from_api(profile).to_dict()
+        return cls(
+            email=data.get("email"),
+            token=data.get("token"),
+            profile=ProfileSummary(**profile) if profile else None,
+            draft=TransferDraft(**draft) if draft else None,
+            history_search=data.get("history_search")
+        )
+
+def dump_session(session: UserSession) -> str:
+    """Serialize a session for the persistence backend"""
+    return json.dumps(session.to_dict())
+
+def load_session(data: str) -> UserSession:
+    """Rebuild a session stored by dump_session"""
+    return UserSession.from_dict(json.loads(data))
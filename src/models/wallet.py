@@ -0,0 +1,80 @@
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+class WalletBook:
+    """One account's wallets indexed by id, with their balances joined in once
+
+    wallets is None when /wallets failed and balances is None when
+    /wallets/balances did, so each screen can decide which it needs.
+    """
+
+    __slots__ = ("wallets", "by_id", "default", "balances", "total_balance")
+
+    def __init__(self, wallets: Optional[List[Dict]], balances: Optional[List[Dict]]):
+        self.wallets = wallets
+        self.by_id: Dict[Any, Dict] = {}
+        self.default: Optional[Dict] = None
+        for wallet in wallets or ():
+            # The first wallet listed wins, as the linear scans it replaces did
+            self.by_id.setdefault(wallet.get("id"), wallet)
+            if self.default is None and wallet.get("isDefault", False):
+                self.default = wallet
+
+        self.balances: Optional[Dict[Any, Dict]] = None
+        self.total_balance: Optional[float] = None
+        if balances is not None:
+            self.balances = {}
+            for entry in balances:
+                self.balances.setdefault(entry.get("walletId"), entry)
+            self.total_balance = sum(float(entry.get("balance", 0)) for entry in balances)
+
+    @classmethod
+    def from_responses(cls, wallets_response: Dict, balances_response: Dict) -> "WalletBook":
+        return cls(
+            None if "error" in wallets_response else wallets_response.get("data", []),
+            None if "error" in balances_response else balances_response.get("data", [])
+        )
+
+    def balance_of(self, wallet_id: Any) -> str:
+        """The wallet's balance as the API reported it, "0" if it has none"""
+        return (self.balances or {}).get(wallet_id, {}).get("balance", "0")
+
+    def network_of(self, wallet_id: Any) -> str:
+        return self.by_id.get(wallet_id, {}).get("network", "Unknown")
+
+class WalletBooks:
+    """The last WalletBook of each token, rebuilt only when its responses change
+
+    The response cache hands back the same objects until a response is
+    refetched, patched by an account event or invalidated by a write, so
+    comparing identities is enough to know a book is current.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._books: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.builds = 0
+
+    def get(self, token: str, wallets_response: Dict, balances_response: Dict) -> WalletBook:
+        entry = self._books.get(token)
+        if entry is not None and entry[0] is wallets_response and entry[1] is balances_response:
+            self._books.move_to_end(token)
+            self.hits += 1
+            return entry[2]
+        book = WalletBook.from_responses(wallets_response, balances_response)
+        self.builds += 1
+        self._books[token] = (wallets_response, balances_response, book)
+        self._books.move_to_end(token)
+        if len(self._books) > self.max_entries:
+            self._books.popitem(last=False)
+        return book
+
+    def forget(self, token: str) -> None:
+        self._books.pop(token, None)
+
+    def __len__(self) -> int:
+        return len(self._books)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"books": len(self._books), "hits": self.hits, "builds": self.builds}
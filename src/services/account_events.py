@@ -0,0 +1,99 @@
+from collections import OrderedDict
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from src.services.cache import ResponseCache
+
+BALANCES = "/wallets/balances"
+
+def patch_balance(response: Dict, wallet_id: str, balance: Any) -> Optional[Dict]:
+    """A /wallets/balances response with one wallet's balance set to balance
+
+    None if the wallet isn't in the response or the balance doesn't parse;
+    the cached response is then dropped rather than guessed at.
+    """
+    entries = response.get("data")
+    if not isinstance(entries, list):
+        return None
+    for position, entry in enumerate(entries):
+        if entry.get("walletId") != wallet_id:
+            continue
+        try:
+            new_balance = Decimal(str(balance))
+        except (InvalidOperation, TypeError):
+            return None
+        # Cached responses are shared with callers, so copy instead of editing in place
+        patched = list(entries)
+        patched[position] = {**entry, "balance": str(new_balance)}
+        return {**response, "data": patched}
+    return None
+
+class AccountEvents:
+    """Keeps the cached reads of an organization's members in step with its account events
+
+    A deposit carrying the wallet's new absolute balance sets it in the
+    cached balances. One with only an amount drops them instead: the cached
+    response may have been fetched after the API credited the deposit, so
+    adding the amount could count it twice. Each event then clears the
+    cached reads it makes stale; unknown events that name a wallet clear
+    cached balances.
+    """
+
+    def __init__(self, cache: ResponseCache, invalidations: Dict[str, Tuple[str, ...]], remembered_deposits: int = 10000):
+        self.cache = cache
+        self.invalidations = invalidations
+        self.remembered_deposits = remembered_deposits
+        self._applied: OrderedDict = OrderedDict()
+        self.events = 0
+        self.patched = 0
+        self.invalidated = 0
+        self.repeated = 0
+
+    def apply(self, tokens: Iterable[str], event: str, data: Any) -> bool:
+        """Apply one event to the cached responses of every token; False for a deposit already applied"""
+        if not isinstance(data, dict):
+            data = {}
+        self.events += 1
+        stale = self.invalidations.get(event)
+        if stale is None:
+            stale = (BALANCES,) if data.get("walletId") else ()
+
+        if event == "deposit":
+            deposit_id = data.get("id")
+            if deposit_id is not None and self._seen(deposit_id):
+                self.repeated += 1
+                return False
+            if data.get("walletId") and data.get("balance") is not None:
+                for token in tokens:
+                    patched = self.cache.update(
+                        token, BALANCES, lambda response: patch_balance(response, data["walletId"], data["balance"])
+                    )
+                    if patched:
+                        self.patched += 1
+                    elif patched is False:
+                        self.invalidated += 1
+                    self.invalidated += self.cache.invalidate(token, stale)
+                return True
+            # Only an amount: the cached balance may already include it
+            stale = (BALANCES, *stale)
+
+        if stale:
+            for token in tokens:
+                self.invalidated += self.cache.invalidate(token, stale)
+        return True
+
+    def _seen(self, deposit_id: Any) -> bool:
+        if deposit_id in self._applied:
+            return True
+        self._applied[deposit_id] = None
+        if len(self._applied) > self.remembered_deposits:
+            self._applied.popitem(last=False)
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "events": self.events,
+            "balances_patched": self.patched,
+            "entries_invalidated": self.invalidated,
+            "repeated_deposits": self.repeated
+        }
@@ -1,20 +1,135 @@
-import requests
+import asyncio
+from typing import Dict, Optional
+
+import httpx
+from src.utils import metrics
 from src.utils.logger import logger
-from src.config.config import API_BASE_URL
+from src.config.config import (API_BASE_URL, API_CACHE_MAX_ENTRIES, API_CACHE_TTLS, API_CACHE_INVALIDATIONS,
+                               API_TIMEOUTS, HTTP_TIMEOUT, API_RETRY_ATTEMPTS, API_RETRY_BASE_DELAY,
+                               API_RETRY_MAX_DELAY, API_BREAKER_FAILURES, API_BREAKER_RESET)
+from src.services.cache import ResponseCache, endpoint_path
+from src.services.http_client import get_http_client, host_limit
+from src.services.resilience import BreakerRegistry, RetryPolicy
+from src.services.singleflight import SingleFlight
+
+# Per-token cache of read endpoints
+response_cache = ResponseCache(API_CACHE_MAX_ENTRIES, API_CACHE_TTLS)
+metrics.register("api_cache", response_cache.stats)
+
+# Identical GETs already in flight share one upstream request
+inflight_requests = SingleFlight()
+metrics.register("api_singleflight", inflight_requests.stats)
+
+# Timeouts, retries and circuit breakers per endpoint
+retry_policy = RetryPolicy(API_RETRY_ATTEMPTS, API_RETRY_BASE_DELAY, API_RETRY_MAX_DELAY)
+breakers = BreakerRegistry(API_BREAKER_FAILURES, API_BREAKER_RESET)
+metrics.register("api_resilience", breakers.stats)
 
-async def api_request(method: str, endpoint: str, token: str = None, data: dict = None):
-    """Make API requests to the Copperx API"""
+DEGRADED_ERROR = "Copperx service is temporarily degraded. Please try again in a few minutes."
+
+async def api_request(method: str, endpoint: str, token: Optional[str] = None, data: Optional[Dict] = None,
+                      headers: Optional[Dict] = None, use_cache: bool = True) -> Dict:
+    """Make a request to the Copperx API; use_cache=False keeps one-off reads such as exports out of the cache"""
     url = f"{API_BASE_URL}{endpoint}"
-    headers = {'Authorization': f'Bearer {token}'} if token else {}
+    headers = dict(headers or {})
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    
+    method = method.lower()
+    if method not in ("get", "post", "put"):
+        return {"error": "Invalid method"}
     
-    try:
-        if method.lower() == 'get':
-            response = requests.get(url, headers=headers)
-        elif method.lower() == 'post':
-            response = requests.post(url, headers=headers, json=data)
+    if method == "get" and token and use_cache:
+        cached = response_cache.get(token, endpoint)
+        if cached is not None:
+            return cached
+    
+    if method == "get":
+        return await inflight_requests.do(
+            (token, method, url),
+            lambda: _send(method, endpoint, url, headers, token, data, use_cache)
+        )
+    return await _send(method, endpoint, url, headers, token, data)
+
+async def _send(method: str, endpoint: str, url: str, headers: Dict, token: Optional[str], data: Optional[Dict],
+                use_cache: bool = True) -> Dict:
+    """Perform the HTTP call and keep the response cache in step with it"""
+    path = endpoint_path(endpoint)
+    breaker = breakers.get(path)
+    timeout = API_TIMEOUTS.get(path, HTTP_TIMEOUT)
+    # Only idempotent reads are safe to send twice
+    attempts = retry_policy.max_attempts if method == "get" else 1
+    generation = response_cache.generation(token) if token else 0
+    
+    for attempt in range(attempts):
+        if not breaker.allow():
+            return _degraded_response(method, endpoint, token)
+        
+        try:
+            async with host_limit(url):
+                response = await get_http_client().request(
+                    method.upper(),
+                    url,
+                    headers=headers,
+                    json=data if method != "get" else None,
+                    timeout=timeout
+                )
+            
+            response.raise_for_status()  # Raise exception for 4XX/5XX responses
+            result = response.json()
+        except (httpx.TransportError, httpx.HTTPStatusError) as e:
+            if isinstance(e, httpx.HTTPStatusError) and not _is_transient(e.response):
+                # The API answered; a client error says nothing about its health
+                breaker.record_success()
+                logger.error(f"API request failed: {str(e)}")
+                return {"error": str(e)}
+            
+            breaker.record_failure()
+            logger.warning(f"API request to {path} failed (attempt {attempt + 1}/{attempts}): {str(e)}")
+            if attempt + 1 < attempts:
+                breakers.record_retry(path)
+                await asyncio.sleep(retry_policy.delay(attempt))
+                continue
+            
+            if method == "get" and token:
+                stale = response_cache.get_stale(token, endpoint)
+                if stale is not None:
+                    breakers.stale_served += 1
+                    return stale
+            return {"error": str(e) or type(e).__name__}
+        except (httpx.HTTPError, ValueError) as e:
+            breaker.record_success()
+            logger.error(f"API request failed: {str(e)}")
+            return {"error": str(e)}
         
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        logger.error(f"API request failed: {str(e)}")
-        return {"error": str(e)}
\ No newline at end of file
+        breaker.record_success()
+        break
+    
+    if token:
+        if method == "get":
+            if use_cache:
+                response_cache.set(token, endpoint, result, generation)
+        else:
+            stale = API_CACHE_INVALIDATIONS.get(path)
+            if stale:
+                response_cache.invalidate(token, stale)
+    
+    return result
+
+def _is_transient(response: httpx.Response) -> bool:
+    """Server errors and rate limiting are worth retrying; other statuses are not"""
+    return response.status_code >= 500 or response.status_code == 429
+
+def _degraded_response(method: str, endpoint: str, token: Optional[str]) -> Dict:
+    """Fail fast while a breaker is open, serving the last cached read when there is one"""
+    breakers.fast_failures += 1
+    if method == "get" and token:
+        stale = response_cache.get_stale(token, endpoint)
+        if stale is not None:
+            breakers.stale_served += 1
+            return stale
+    return {"error": DEGRADED_ERROR}
+
+def clear_cached_responses(token: str) -> None:
+    """Forget every cached response of a token, e.g. on logout"""
+    response_cache.invalidate_token(token)
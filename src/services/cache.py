@@ -0,0 +1,136 @@
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+
+def endpoint_path(endpoint: str) -> str:
+    """Strip the query string from an endpoint"""
+    return endpoint.split("?", 1)[0]
+
+class ResponseCache:
+    """Bounded LRU cache of API responses keyed by token and endpoint, with a TTL per endpoint"""
+
+    def __init__(self, max_entries: int, ttls: Dict[str, float], default_ttl: float = 0):
+        self.max_entries = max_entries
+        self.ttls = ttls
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Dict]]" = OrderedDict()
+        self._endpoints_by_token: Dict[str, Set[str]] = defaultdict(set)
+        # Bumped whenever a token's cached responses change outside set(), so a
+        # response fetched before the change isn't stored over it
+        self._generations: Dict[str, int] = {}
+        self.hits: Dict[str, int] = defaultdict(int)
+        self.misses: Dict[str, int] = defaultdict(int)
+        self.evictions = 0
+        self.invalidations = 0
+
+    def ttl_for(self, endpoint: str) -> float:
+        """Return the TTL in seconds for an endpoint (0 disables caching)"""
+        return self.ttls.get(endpoint_path(endpoint), self.default_ttl)
+
+    def get(self, token: str, endpoint: str) -> Optional[Dict]:
+        """Return a fresh cached response or None"""
+        path = endpoint_path(endpoint)
+        key = (token, endpoint)
+        entry = self._entries.get(key)
+
+        # Expired entries stay until evicted so they can still be served stale
+        if entry is None or entry[0] <= time.monotonic():
+            self.misses[path] += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits[path] += 1
+        return entry[1]
+
+    def get_stale(self, token: str, endpoint: str) -> Optional[Dict]:
+        """Return the last cached response even if expired, for use when the API is unavailable"""
+        entry = self._entries.get((token, endpoint))
+        return entry[1] if entry is not None else None
+
+    def generation(self, token: str) -> int:
+        """Pass to set() to store a response only if nothing invalidated or patched the token meanwhile"""
+        return self._generations.get(token, 0)
+
+    def set(self, token: str, endpoint: str, response: Dict, generation: Optional[int] = None) -> None:
+        """Store a response if its endpoint is cacheable"""
+        ttl = self.ttl_for(endpoint)
+        if ttl <= 0:
+            return
+        if generation is not None and generation != self.generation(token):
+            return
+
+        key = (token, endpoint)
+        self._entries[key] = (time.monotonic() + ttl, response)
+        self._entries.move_to_end(key)
+        self._endpoints_by_token[token].add(endpoint)
+
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def update(self, token: str, endpoint: str, patch: Callable[[Dict], Optional[Dict]]) -> Optional[bool]:
+        """Replace a fresh cached response with patch(response), keeping its expiry, or drop it if patch returns None
+
+        Returns None if nothing fresh was cached, otherwise whether the response was patched.
+        """
+        key = (token, endpoint)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        patched = patch(entry[1])
+        self._bump(token)
+        if patched is None:
+            self._remove(key)
+            self.invalidations += 1
+            return False
+        self._entries[key] = (entry[0], patched)
+        return True
+
+    def invalidate(self, token: str, paths: Iterable[str]) -> int:
+        """Drop every cached endpoint of a token whose path is in paths"""
+        paths = set(paths)
+        self._bump(token)
+        stale = [e for e in self._endpoints_by_token.get(token, ()) if endpoint_path(e) in paths]
+        for endpoint in stale:
+            self._remove((token, endpoint))
+        self.invalidations += len(stale)
+        return len(stale)
+
+    def invalidate_token(self, token: str) -> int:
+        """Drop every cached response of a token"""
+        self._generations.pop(token, None)
+        stale = list(self._endpoints_by_token.get(token, ()))
+        for endpoint in stale:
+            self._remove((token, endpoint))
+        self.invalidations += len(stale)
+        return len(stale)
+
+    def _bump(self, token: str) -> None:
+        self._generations[token] = self._generations.get(token, 0) + 1
+
+    def _remove(self, key: Tuple[str, str]) -> None:
+        token, endpoint = key
+        self._entries.pop(key, None)
+        endpoints = self._endpoints_by_token.get(token)
+        if endpoints is not None:
+            endpoints.discard(endpoint)
+            if not endpoints:
+                del self._endpoints_by_token[token]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters per endpoint plus size and eviction totals"""
+        stats: Dict[str, Any] = {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+        for path in sorted(set(self.hits) | set(self.misses)):
+            hits, misses = self.hits[path], self.misses[path]
+            ratio = hits / (hits + misses) if hits + misses else 0
+            stats[path] = f"{hits} hits / {misses} misses ({ratio:.0%})"
+        return stats
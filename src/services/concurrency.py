@@ -0,0 +1,120 @@
+import asyncio
+from typing import Any, Dict, Hashable, Optional
+
+from telegram import Update
+from telegram.ext import Application
+
+class UpdateQueue(asyncio.Queue):
+    """Update queue that also bounds how many taken updates may still be in progress
+
+    With concurrent updates the Application turns every update it takes into a
+    task straight away, which would drain any queue bound into an unbounded
+    set of tasks. get() therefore waits for a free slot, and the slot is given
+    back by the task_done() the Application calls once the update is processed.
+    """
+
+    def __init__(self, maxsize: int = 0, max_in_progress: int = 1000):
+        super().__init__(maxsize)
+        self.max_in_progress = max_in_progress
+        self.in_progress = 0
+        self._slots = asyncio.Semaphore(max_in_progress)
+
+    async def get(self) -> Any:
+        await self._slots.acquire()
+        try:
+            item = await super().get()
+        except BaseException:
+            self._slots.release()
+            raise
+        self.in_progress += 1
+        return item
+
+    def task_done(self) -> None:
+        super().task_done()
+        # The Application also calls task_done for updates it drops when stopping
+        if self.in_progress:
+            self.in_progress -= 1
+            self._slots.release()
+
+class OrderedApplication(Application):
+    """Application that runs updates from different users in parallel and each user's updates in order
+
+    Sessions and conversation state are mutated across a user's steps, so
+    updates are serialised per user with a FIFO lock. At most max_concurrency
+    updates run at once; updates waiting for their user's earlier update
+    don't hold one of those slots.
+    """
+
+    def __init__(self, *, max_concurrency: int = 64, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.max_concurrency = max_concurrency
+        self._update_slots = asyncio.Semaphore(max_concurrency)
+        # user key -> [lock, number of updates holding or waiting for it]
+        self._user_locks: Dict[Hashable, list] = {}
+        self.active = 0
+        self.waiting_for_user = 0
+        self.waiting_for_slot = 0
+        self.processed = 0
+
+    @staticmethod
+    def ordering_key(update: object) -> Optional[Hashable]:
+        if isinstance(update, Update):
+            if update.effective_user:
+                return ("user", update.effective_user.id)
+            if update.effective_chat:
+                return ("chat", update.effective_chat.id)
+        return None
+
+    async def process_update(self, update: object) -> None:
+        key = self.ordering_key(update)
+        if key is None:
+            await self._process_limited(update)
+            return
+
+        entry = self._user_locks.get(key)
+        if entry is None:
+            entry = self._user_locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            self.waiting_for_user += 1
+            try:
+                await entry[0].acquire()
+            finally:
+                self.waiting_for_user -= 1
+            try:
+                await self._process_limited(update)
+            finally:
+                entry[0].release()
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._user_locks[key]
+
+    async def _process_limited(self, update: object) -> None:
+        self.waiting_for_slot += 1
+        try:
+            await self._update_slots.acquire()
+        finally:
+            self.waiting_for_slot -= 1
+
+        self.active += 1
+        try:
+            await super().process_update(update)
+        finally:
+            self.active -= 1
+            self.processed += 1
+            self._update_slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {
+            "running": self.active,
+            "max_concurrency": self.max_concurrency,
+            "waiting_for_user": self.waiting_for_user,
+            "waiting_for_slot": self.waiting_for_slot,
+            "users_in_progress": len(self._user_locks),
+            "processed": self.processed,
+            "queued": self.update_queue.qsize()
+        }
+        if isinstance(self.update_queue, UpdateQueue):
+            stats["taken_in_progress"] = self.update_queue.in_progress
+        return stats
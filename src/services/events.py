@@ -0,0 +1,175 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import time
+from collections import OrderedDict, deque
+from http import HTTPStatus
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from src.services.realtime import CHANNEL_PREFIX
+from src.utils.http_server import HTTPServer, Request, Response
+from src.utils.logger import logger
+from src.utils.metrics import percentile
+
+SIGNATURE_HEADER = "x-pusher-signature"
+
+# Logged-in user ids of an organization
+Recipients = Callable[[str], Set[int]]
+# Called with (organization_id, event name, event data, user ids); the same shape as realtime.EventListener
+EventListener = Callable[[str, str, Any, Set[int]], None]
+
+def sign(secret: str, body: bytes) -> str:
+    """Hex HMAC-SHA256 of a request body, as sent in the X-Pusher-Signature header"""
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+def _parse_event(event: Dict[str, Any]) -> Optional[Tuple[str, str, str, Any]]:
+    """(id, organization id, name, data) of one webhook event, or None if it isn't for an organization"""
+    organization_id = event.get("organizationId")
+    if organization_id is None:
+        channel = event.get("channel", "")
+        if not channel.startswith(CHANNEL_PREFIX):
+            return None
+        organization_id = channel[len(CHANNEL_PREFIX):]
+    name = event.get("event") or event.get("name")
+    data = event.get("data")
+    if isinstance(data, str):
+        try:
+            data = json.loads(data)
+        except ValueError:
+            pass
+    # An event id is only unique within its event name. Pusher webhook events have none, and the id
+    # inside data names the deposit or transfer that later events share, so a digest of the payload
+    # stands in: retries resend it unchanged
+    if event.get("id"):
+        event_id = f"{name}:{event['id']}"
+    else:
+        event_id = hashlib.blake2b(
+            json.dumps([organization_id, name, data], sort_keys=True).encode(), digest_size=16
+        ).hexdigest()
+    return event_id, str(organization_id), name, data
+
+class EventIngress:
+    """Accepts signed Copperx/Pusher event webhooks over HTTP and delivers them from a bounded queue
+
+    The body is either one event or {"events": [...]}, Pusher's webhook
+    batch. A batch is queued whole or refused with 503 so the sender retries
+    it; worker tasks drop events whose id was already seen, look up the
+    organization's logged-in chats and hand the event to the listener.
+    """
+
+    def __init__(self, secret: str, recipients: Recipients, on_event: EventListener, path: str = "/events",
+                 host: str = "0.0.0.0", port: int = 8444, queue_size: int = 10000, workers: int = 4,
+                 dedup_size: int = 100000, max_body_size: int = 1024 * 1024, latency_samples: int = 1000):
+        if not secret:
+            raise ValueError("The events endpoint requires a signing secret")
+        self.secret = secret
+        self.recipients = recipients
+        self.on_event = on_event
+        self.path = path
+        self.server = HTTPServer(host, port, max_body_size)
+        self.server.route("POST", path, self.receive)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.worker_count = workers
+        self.dedup_size = dedup_size
+        self._seen: OrderedDict = OrderedDict()
+        self._workers: List[asyncio.Task] = []
+        self._latencies: Deque[float] = deque(maxlen=latency_samples)
+        self.received = 0
+        self.duplicates = 0
+        self.delivered = 0
+        self.deliveries = 0
+        self.no_recipients = 0
+        self.ignored = 0
+        self.failed = 0
+        self.rejected_full = 0
+        self.unauthorized = 0
+        self.malformed = 0
+
+    async def receive(self, request: Request) -> Response:
+        supplied = request.headers.get(SIGNATURE_HEADER, "")
+        if not hmac.compare_digest(supplied.encode(), sign(self.secret, request.body).encode()):
+            self.unauthorized += 1
+            return Response(HTTPStatus.UNAUTHORIZED)
+
+        try:
+            payload = request.json()
+            raw_events = payload["events"] if "events" in payload else [payload]
+            parsed = [_parse_event(event) for event in raw_events]
+        except Exception as e:
+            self.malformed += 1
+            logger.error(f"Rejected malformed event webhook: {e}")
+            return Response(HTTPStatus.BAD_REQUEST)
+
+        events = [event for event in parsed if event is not None]
+        self.ignored += len(parsed) - len(events)
+        if self.queue.maxsize - self.queue.qsize() < len(events):
+            self.rejected_full += 1
+            return Response(HTTPStatus.SERVICE_UNAVAILABLE, headers={"Retry-After": "1"})
+
+        received_at = time.perf_counter()
+        for event in events:
+            self.queue.put_nowait((*event, received_at))
+        self.received += len(events)
+        return Response(HTTPStatus.OK)
+
+    def _first_sighting(self, event_id: str) -> bool:
+        if event_id in self._seen:
+            self._seen.move_to_end(event_id)
+            return False
+        self._seen[event_id] = None
+        if len(self._seen) > self.dedup_size:
+            self._seen.popitem(last=False)
+        return True
+
+    async def _work(self) -> None:
+        while True:
+            event_id, organization_id, name, data, received_at = await self.queue.get()
+            try:
+                if not self._first_sighting(event_id):
+                    self.duplicates += 1
+                    continue
+                user_ids = self.recipients(organization_id)
+                if not user_ids:
+                    self.no_recipients += 1
+                    continue
+                self.on_event(organization_id, name, data, user_ids)
+                self.delivered += 1
+                self.deliveries += len(user_ids)
+                self._latencies.append(time.perf_counter() - received_at)
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Failed to deliver event {event_id} for {organization_id}: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def start(self) -> None:
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.worker_count)]
+        await self.server.start()
+
+    async def stop(self) -> None:
+        """Stop accepting events, then deliver the ones already queued"""
+        await self.server.stop()
+        await self.queue.join()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "received": self.received,
+            "duplicates": self.duplicates,
+            "delivered": self.delivered,
+            "deliveries": self.deliveries,
+            "no_recipients": self.no_recipients,
+            "ignored": self.ignored,
+            "failed": self.failed,
+            "rejected_queue_full": self.rejected_full,
+            "unauthorized": self.unauthorized,
+            "malformed": self.malformed,
+            "delivery_p50_ms": round(percentile(self._latencies, 0.50) * 1000, 2),
+            "delivery_p95_ms": round(percentile(self._latencies, 0.95) * 1000, 2)
+        }
@@ -0,0 +1,204 @@
+import asyncio
+import csv
+import io
+import json
+import tempfile
+import time
+from typing import IO, Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from telegram import InputFile
+
+from src.services.transaction_index import created_timestamp
+from src.utils.logger import logger
+
+CSV = "csv"
+NDJSON = "ndjson"
+FORMATS = (CSV, NDJSON)
+
+# Largest document a bot may upload
+MAX_DOCUMENT_SIZE = 50 * 1024 * 1024
+
+# CSV columns and the transfer fields they come from; nested fields are dotted
+CSV_COLUMNS = (
+    ("id", "id"),
+    ("created_at", "createdAt"),
+    ("type", "type"),
+    ("status", "status"),
+    ("amount", "amount"),
+    ("currency", "currency"),
+    ("fee", "totalFee"),
+    ("fee_currency", "feeCurrency"),
+    ("from_wallet", "sourceAccount.walletAddress"),
+    ("to_wallet", "destinationAccount.walletAddress"),
+    ("to_email", "destinationAccount.payeeEmail"),
+    ("to_country", "destinationCountry"),
+    ("note", "note")
+)
+
+# Fetches one page of /transfers: (token, page, limit) -> API response
+FetchPage = Callable[[str, int, int], Awaitable[Dict[str, Any]]]
+# Called with the number of transfers written so far
+Progress = Callable[[int], None]
+
+class ExportError(Exception):
+    """The API failed part way through an export"""
+
+def _field(transfer: Dict, path: str) -> Any:
+    value: Any = transfer
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return ""
+        value = value.get(key)
+    return "" if value is None else value
+
+async def iter_transfers(fetch_page: FetchPage, token: str, page_size: int = 100, since: Optional[float] = None,
+                         until: Optional[float] = None) -> AsyncIterator[List[Dict]]:
+    """Every transfer of the token's account created in [since, until), a page at a time, newest first"""
+    page = 1
+    while True:
+        response = await fetch_page(token, page, page_size)
+        if "error" in response:
+            raise ExportError(f"page {page}: {response['error']}")
+        transfers = response.get("data", [])
+        done = not transfers or not response.get("hasMore", len(transfers) >= page_size)
+        if transfers and (since is not None or until is not None):
+            created = [created_timestamp(transfer.get("createdAt")) for transfer in transfers]
+            # Pages are newest first, so a page ending before since is the last with anything in range
+            done = done or (since is not None and 0 < created[-1] < since)
+            transfers = [
+                transfer for transfer, at in zip(transfers, created)
+                if (since is None or at >= since) and (until is None or at < until)
+            ]
+        if transfers:
+            yield transfers
+        if done:
+            return
+        page += 1
+
+async def encode_csv(pages: AsyncIterator[List[Dict]]) -> AsyncIterator[bytes]:
+    """CSV bytes for pages of transfers, one chunk per page, header first"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(column for column, _ in CSV_COLUMNS)
+    async for transfers in pages:
+        writer.writerows([_field(transfer, path) for _, path in CSV_COLUMNS] for transfer in transfers)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+async def encode_ndjson(pages: AsyncIterator[List[Dict]]) -> AsyncIterator[bytes]:
+    """One JSON object per line for pages of transfers, one chunk per page"""
+    async for transfers in pages:
+        yield "".join(json.dumps(transfer, separators=(",", ":")) + "\n" for transfer in transfers).encode()
+
+ENCODERS = {CSV: encode_csv, NDJSON: encode_ndjson}
+
+async def export_transfers(fetch_page: FetchPage, token: str, fmt: str, on_progress: Optional[Progress] = None,
+                           page_size: int = 100, spool_size: int = 1024 * 1024, progress_interval: float = 2,
+                           since: Optional[float] = None, until: Optional[float] = None) -> Tuple[IO[bytes], int]:
+    """Write every transfer of an account, or those created in [since, until), to a temporary file as CSV or NDJSON
+
+    Pages flow from the API through the encoder into the file as they
+    arrive, so memory holds one page however long the history is; the file
+    stays in memory up to spool_size bytes, then moves to disk. Returns the
+    file rewound to its start and the number of transfers in it.
+    on_progress is called at most once per progress_interval seconds.
+    """
+    count = 0
+    reported_at = time.monotonic()
+
+    async def counted(pages: AsyncIterator[List[Dict]]) -> AsyncIterator[List[Dict]]:
+        nonlocal count, reported_at
+        async for transfers in pages:
+            yield transfers
+            count += len(transfers)
+            if on_progress is not None and time.monotonic() - reported_at >= progress_interval:
+                reported_at = time.monotonic()
+                on_progress(count)
+
+    output = tempfile.SpooledTemporaryFile(max_size=spool_size, mode="w+b")
+    try:
+        async for chunk in ENCODERS[fmt](counted(iter_transfers(fetch_page, token, page_size, since, until))):
+            output.write(chunk)
+    except BaseException:
+        output.close()
+        raise
+    output.seek(0)
+    return output, count
+
+def file_size(file: IO[bytes]) -> int:
+    """Size of an open file, leaving its position at the start"""
+    size = file.seek(0, io.SEEK_END)
+    file.seek(0)
+    return size
+
+class StreamedInputFile(InputFile):
+    """An upload read from its open file in chunks while it is sent
+
+    InputFile reads a file object whole before the request is built; httpx
+    streams any binary file it is given in a multipart body, rewinding it
+    first, so a retried upload sends the same bytes.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, file: IO[bytes], filename: str):
+        super().__init__(b"", filename=filename)
+        self.input_file_content = file  # type: ignore[assignment]
+
+class ExportJobs:
+    """Runs exports in the background, one per user and at most max_concurrent at once"""
+
+    def __init__(self, max_concurrent: int = 4):
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._running: Dict[int, asyncio.Task] = {}
+        self._waiting: Set[int] = set()
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self.rows = 0
+
+    def is_running(self, user_id: int) -> bool:
+        return user_id in self._running
+
+    def start(self, user_id: int, job: Callable[[], Awaitable[int]]) -> bool:
+        """Run job, which returns the rows it exported, unless the user already has an export going"""
+        if user_id in self._running:
+            return False
+        self.started += 1
+        self._running[user_id] = asyncio.create_task(self._run(user_id, job))
+        return True
+
+    async def _run(self, user_id: int, job: Callable[[], Awaitable[int]]) -> None:
+        try:
+            self._waiting.add(user_id)
+            async with self._slots:
+                self._waiting.discard(user_id)
+                self.rows += await job()
+            self.completed += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Export for user {user_id} failed: {e}")
+        finally:
+            self._waiting.discard(user_id)
+            self._running.pop(user_id, None)
+
+    async def stop(self) -> None:
+        tasks = list(self._running.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": len(self._running) - len(self._waiting),
+            "waiting": len(self._waiting),
+            "started": self.started,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rows_exported": self.rows
+        }
@@ -0,0 +1,44 @@
+import asyncio
+from typing import Awaitable, Dict, Optional, Set
+
+from src.config.config import FANOUT_TIMEOUT
+from src.utils.logger import logger
+
+async def fan_out(calls: Dict[str, Awaitable[Dict]], timeout: Optional[float] = None) -> Dict[str, Dict]:
+    """Run independent API calls concurrently under one shared deadline
+    
+    Every name in calls is present in the result. Calls that failed or missed
+    the deadline come back as {"error": ...} like any failed api_request, so
+    handlers can render what arrived and mark what didn't.
+    """
+    tasks = {name: asyncio.ensure_future(call) for name, call in calls.items()}
+    done, pending = await asyncio.wait(tasks.values(), timeout=timeout or FANOUT_TIMEOUT)
+    
+    for task in pending:
+        task.cancel()
+    
+    results = {}
+    for name, task in tasks.items():
+        if task in pending:
+            logger.warning(f"Fan-out call '{name}' missed the deadline")
+            results[name] = {"error": "Request timed out"}
+        elif task.exception() is not None:
+            logger.error(f"Fan-out call '{name}' failed: {task.exception()}")
+            results[name] = {"error": str(task.exception())}
+        else:
+            results[name] = task.result()
+    return results
+
+# Background calls are referenced here until they finish so they aren't garbage collected
+_prefetches: Set[asyncio.Future] = set()
+
+def prefetch(call: Awaitable[Dict]) -> None:
+    """Start an API call without waiting for it, so its response is cached by the time it is asked for"""
+    task = asyncio.ensure_future(call)
+    _prefetches.add(task)
+    task.add_done_callback(_prefetch_done)
+
+def _prefetch_done(task: asyncio.Future) -> None:
+    _prefetches.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Prefetch failed: {task.exception()}")
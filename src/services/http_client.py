@@ -0,0 +1,73 @@
+import asyncio
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+from telegram.ext import Application
+
+from src.config.config import (HTTP_POOL_SIZE, HTTP_MAX_KEEPALIVE, HTTP_KEEPALIVE_EXPIRY,
+                               HTTP_PER_HOST_LIMIT, HTTP_TIMEOUT, HTTP2_ENABLED)
+from src.utils.logger import logger
+
+# Shared connection pool, owned by the Application lifecycle
+_client: Optional[httpx.AsyncClient] = None
+_host_limits: Dict[str, asyncio.Semaphore] = {}
+
+def _http2_available() -> bool:
+    """Check whether the optional h2 package is installed"""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def create_http_client() -> httpx.AsyncClient:
+    """Build a keep-alive client with the configured pool limits"""
+    http2 = HTTP2_ENABLED and _http2_available()
+    if HTTP2_ENABLED and not http2:
+        logger.warning("HTTP/2 requested but the h2 package is missing, falling back to HTTP/1.1")
+    
+    limits = httpx.Limits(
+        max_connections=HTTP_POOL_SIZE,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+    )
+    return httpx.AsyncClient(
+        limits=limits,
+        http2=http2,
+        timeout=HTTP_TIMEOUT,
+        headers={"Content-Type": "application/json"}
+    )
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it lazily if the Application has not opened it yet"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_http_client()
+    return _client
+
+def use_http_client(client: httpx.AsyncClient) -> None:
+    """Install a preconfigured client, e.g. one backed by a mock transport"""
+    global _client
+    _client = client
+
+def host_limit(url: str) -> asyncio.Semaphore:
+    """Return the semaphore capping concurrent requests to the host of the given URL"""
+    host = urlsplit(url).netloc
+    semaphore = _host_limits.get(host)
+    if semaphore is None:
+        semaphore = _host_limits[host] = asyncio.Semaphore(HTTP_PER_HOST_LIMIT)
+    return semaphore
+
+async def init_http_client(application: Application) -> None:
+    """Open the shared connection pool (Application post_init hook)"""
+    get_http_client()
+    logger.info(f"HTTP client ready (pool size {HTTP_POOL_SIZE}, per-host limit {HTTP_PER_HOST_LIMIT})")
+
+async def close_http_client(application: Application) -> None:
+    """Close the shared connection pool (Application post_shutdown hook)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    _host_limits.clear()
@@ -0,0 +1,135 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from src.config.config import IDEMPOTENCY_MAX_ENTRIES, IDEMPOTENCY_TTL
+from src.services.api_service import api_request
+from src.services.persistence import SQLiteDatabase
+from src.utils import metrics
+from src.utils.logger import logger
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS idempotency (
+    key TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL,
+    result TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idempotency_expiry ON idempotency (expires_at);
+"""
+
+class IdempotencyLedger:
+    """Remember the outcome of each submitted write so it runs at most once per key
+
+    Outcomes live in memory and, once use_database is called, in the
+    persistence file too. Draft keys survive restarts, so without the file
+    a transfer confirmed again after a restart would be POSTed a second time,
+    relying on the API alone to honour the Idempotency-Key header.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.database: Optional[SQLiteDatabase] = None
+        self._results: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._writes: Set[asyncio.Task] = set()
+        self.submitted = 0
+        self.replayed = 0
+        self.joined = 0
+        self.write_failures = 0
+
+    def use_database(self, database: SQLiteDatabase) -> None:
+        """Also keep recorded outcomes in database, so they outlive the process"""
+        database.executescript(SCHEMA)
+        self.database = database
+
+    async def run(self, key: str, fn: Callable[[], Awaitable[Dict]]) -> Dict:
+        """Run fn for a new key, or return the recorded/in-flight result of a key seen before"""
+        recorded = self._recorded(key)
+        if recorded is not None:
+            self.replayed += 1
+            return recorded
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            # Finished by the task itself, so a cancelled caller can't leave it in flight or unrecorded
+            task.add_done_callback(lambda done: self._finish(key, done))
+            self.submitted += 1
+        else:
+            self.joined += 1
+        return await asyncio.shield(task)
+
+    def _recorded(self, key: str) -> Optional[Dict]:
+        entry = self._results.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        if self.database is not None:
+            rows = self.database.read("SELECT result FROM idempotency WHERE key = ? AND expires_at > ?", (key, time.time()))
+            if rows:
+                return json.loads(rows[0][0])
+        return None
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        # Failures are not recorded, so the user can retry with the same key
+        result = task.result()
+        if "error" not in result:
+            self._record(key, result)
+
+    def _record(self, key: str, result: Dict) -> None:
+        self._results[key] = (time.monotonic() + self.ttl, result)
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+        if self.database is not None:
+            now = time.time()
+            write = asyncio.ensure_future(self.database.write_async([
+                ("INSERT OR REPLACE INTO idempotency (key, expires_at, result) VALUES (?, ?, ?)",
+                 [(key, now + self.ttl, json.dumps(result))]),
+                ("DELETE FROM idempotency WHERE expires_at <= ?", [(now,)])
+            ]))
+            self._writes.add(write)
+            write.add_done_callback(self._written)
+
+    def _written(self, write: asyncio.Task) -> None:
+        self._writes.discard(write)
+        if not write.cancelled() and write.exception() is not None:
+            self.write_failures += 1
+            logger.error(f"Failed to record a transfer outcome: {write.exception()}")
+
+    async def stop(self) -> None:
+        """Wait for outcomes still being written, before the database closes"""
+        await asyncio.gather(*self._writes, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "recorded": len(self._results),
+            "in_flight": len(self._inflight),
+            "submitted": self.submitted,
+            "replayed": self.replayed,
+            "joined": self.joined,
+            "write_failures": self.write_failures
+        }
+
+transfer_ledger = IdempotencyLedger(IDEMPOTENCY_MAX_ENTRIES, IDEMPOTENCY_TTL)
+metrics.register("transfer_idempotency", transfer_ledger.stats)
+
+async def submit_transfer(idempotency_key: str, endpoint: str, token: str, data: Dict) -> Dict:
+    """POST a transfer at most once per idempotency key"""
+    return await transfer_ledger.run(
+        idempotency_key,
+        lambda: api_request(
+            "post",
+            endpoint,
+            token=token,
+            data=data,
+            headers={"Idempotency-Key": idempotency_key}
+        )
+    )
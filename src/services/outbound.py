@@ -0,0 +1,328 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from telegram.error import BadRequest, NetworkError, RetryAfter
+
+from src.utils.logger import logger
+
+# Lanes, highest priority first
+TRANSFER = 0
+INTERACTIVE = 1
+NOTIFICATION = 2
+LANES = (TRANSFER, INTERACTIVE, NOTIFICATION)
+LANE_NAMES = {TRANSFER: "transfer", INTERACTIVE: "interactive", NOTIFICATION: "notification"}
+
+MAX_MESSAGE_LENGTH = 4096
+
+class TokenBucket:
+    """Allows rate operations per second with bursts of up to capacity"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def ready_at(self, now: float) -> float:
+        """Earliest time a token is available"""
+        self._refill(now)
+        if self.tokens >= 1:
+            return now
+        return now + (1 - self.tokens) / self.rate
+
+    def consume(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+    def pause(self, now: float, seconds: float) -> None:
+        """Hold back every token for seconds, as Telegram asks with retry_after"""
+        self._refill(now)
+        self.tokens = min(self.tokens, 0) - seconds * self.rate
+
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+class OutboundMessage:
+    """A queued Bot API call and the future its caller may await"""
+
+    __slots__ = ("chat_id", "method", "kwargs", "lane", "future", "queued_at", "attempts")
+
+    def __init__(self, chat_id: int, method: str, kwargs: Dict[str, Any], lane: int):
+        self.chat_id = chat_id
+        self.method = method
+        self.kwargs = kwargs
+        self.lane = lane
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.queued_at = time.monotonic()
+        self.attempts = 0
+
+    def can_merge(self, other: "OutboundMessage") -> bool:
+        """Plain text sends to the same chat can be joined into one message"""
+        return (
+            self.method == other.method == "send_message"
+            and set(self.kwargs) == set(other.kwargs) == {"text"}
+            and len(self.kwargs["text"]) + len(other.kwargs["text"]) + 2 <= MAX_MESSAGE_LENGTH
+        )
+
+    def supersedes(self, other: "OutboundMessage") -> bool:
+        """A later edit of the same message makes a queued earlier one pointless"""
+        return (
+            self.method == other.method == "edit_message_text"
+            and self.kwargs.get("message_id") == other.kwargs.get("message_id")
+        )
+
+class OutboundScheduler:
+    """Sends Bot API messages within Telegram's global and per-chat rate limits
+
+    Messages wait in per-chat queues inside three priority lanes. A chat is
+    served when both the global bucket and its own bucket have a token,
+    higher lanes first. Queued plain sends to one chat are coalesced into a
+    single message, queued edits of one message collapse into the latest, and
+    a RetryAfter pauses both the chat and the global bucket for as long as
+    Telegram asks, then retries the message first in its chat's queue.
+    """
+
+    def __init__(self, global_rate: float = 30, chat_rate: float = 1, global_burst: float = 1, chat_burst: float = 1,
+                 max_queued: int = 10000, max_in_flight: int = 30, max_attempts: int = 3):
+        # Telegram counts over a sliding second, so a burst on top of the rate would overshoot it
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_queued = max_queued
+        self.max_attempts = max_attempts
+        self.bot = None
+        self._chat_buckets: Dict[int, TokenBucket] = {}
+        self._pending: Dict[Tuple[int, int], Deque[OutboundMessage]] = {}
+        # Per lane: heap of (ready_at, seq, chat_id) for chats with pending messages
+        self._ready: Dict[int, List[Tuple[float, int, int]]] = {lane: [] for lane in LANES}
+        self._seq = itertools.count()
+        self._queued = 0
+        self._in_flight: set = set()
+        self._send_slots = asyncio.Semaphore(max_in_flight)
+        self._wakeup = asyncio.Event()
+        self._worker: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.coalesced = 0
+        self.superseded = 0
+        self.retried = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+    def send_message(self, chat_id: int, text: str, lane: int = INTERACTIVE, **kwargs: Any) -> asyncio.Future:
+        """Queue a sendMessage; await the returned future for the sent Message (None if dropped)"""
+        return self._enqueue(OutboundMessage(chat_id, "send_message", {"text": text, **kwargs}, lane))
+
+    def send_document(self, chat_id: int, document: Any, lane: int = INTERACTIVE, **kwargs: Any) -> asyncio.Future:
+        """Queue a sendDocument; await the returned future for the sent Message (None if dropped or failed)"""
+        return self._enqueue(OutboundMessage(chat_id, "send_document", {"document": document, **kwargs}, lane))
+
+    def edit_message_text(self, chat_id: int, message_id: int, text: str, lane: int = INTERACTIVE,
+                          **kwargs: Any) -> asyncio.Future:
+        """Queue an editMessageText; await the returned future for the edited Message (None if dropped)"""
+        return self._enqueue(OutboundMessage(chat_id, "edit_message_text",
+                                             {"message_id": message_id, "text": text, **kwargs}, lane))
+
+    def _enqueue(self, message: OutboundMessage) -> asyncio.Future:
+        queue = self._pending.get((message.lane, message.chat_id))
+        if queue:
+            last = queue[-1]
+            if message.can_merge(last):
+                last.kwargs["text"] += "\n\n" + message.kwargs["text"]
+                self.coalesced += 1
+                return last.future
+            if message.supersedes(last):
+                queue.pop()
+                last.future.set_result(None)
+                self._queued -= 1
+                self.superseded += 1
+
+        if self._queued >= self.max_queued and not self._evict_below(message.lane):
+            self.dropped += 1
+            message.future.set_result(None)
+            return message.future
+
+        if not queue:
+            queue = self._pending[(message.lane, message.chat_id)] = deque()
+            self._schedule(message.lane, message.chat_id)
+        queue.append(message)
+        self._queued += 1
+        self._wakeup.set()
+        return message.future
+
+    def _evict_below(self, lane: int) -> bool:
+        """Make room by dropping the oldest message of a lower priority lane"""
+        for lower in reversed(LANES):
+            if lower <= lane:
+                return False
+            for (queue_lane, _), queue in self._pending.items():
+                if queue_lane == lower and queue:
+                    queue.popleft().future.set_result(None)
+                    self._queued -= 1
+                    self.dropped += 1
+                    return True
+        return False
+
+    def _schedule(self, lane: int, chat_id: int) -> None:
+        now = time.monotonic()
+        heapq.heappush(self._ready[lane], (self._chat_bucket(chat_id).ready_at(now), next(self._seq), chat_id))
+
+    def _next_message(self, now: float) -> Tuple[Optional[OutboundMessage], Optional[float]]:
+        """Pop the highest-priority message whose chat may send now, or say when to look again"""
+        earliest = None
+        for lane in LANES:
+            heap = self._ready[lane]
+            while heap:
+                ready_at, _, chat_id = heap[0]
+                queue = self._pending.get((lane, chat_id))
+                if not queue:
+                    heapq.heappop(heap)
+                    self._pending.pop((lane, chat_id), None)
+                    continue
+
+                # Another lane may have used the chat's token since this entry was pushed
+                actual = self._chat_bucket(chat_id).ready_at(now)
+                if actual > ready_at:
+                    heapq.heapreplace(heap, (actual, next(self._seq), chat_id))
+                    continue
+                if ready_at > now:
+                    earliest = ready_at if earliest is None else min(earliest, ready_at)
+                    break
+
+                heapq.heappop(heap)
+                message = queue.popleft()
+                self._queued -= 1
+                self._chat_bucket(chat_id).consume(now)
+                if queue:
+                    self._schedule(lane, chat_id)
+                else:
+                    del self._pending[(lane, chat_id)]
+                return message, None
+        return None, earliest
+
+    async def _run(self) -> None:
+        while True:
+            now = time.monotonic()
+            global_ready = self.global_bucket.ready_at(now)
+            if global_ready > now:
+                await asyncio.sleep(global_ready - now)
+                continue
+
+            message, retry_at = self._next_message(now)
+            if message is None:
+                self._wakeup.clear()
+                self._prune_buckets(now)
+                timeout = None if retry_at is None else max(0.0, retry_at - now)
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self.global_bucket.consume(now)
+            await self._send_slots.acquire()
+            task = asyncio.create_task(self._deliver(message))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _deliver(self, message: OutboundMessage) -> None:
+        message.attempts += 1
+        try:
+            result = await getattr(self.bot, message.method)(chat_id=message.chat_id, **message.kwargs)
+        except RetryAfter as e:
+            # Flood control can be bot-wide, so the other chats wait out retry_after too
+            self.global_bucket.pause(time.monotonic(), float(e.retry_after))
+            self._retry(message, float(e.retry_after))
+        except BadRequest as e:
+            self._fail(message, e)
+        except NetworkError:
+            # Timeouts and dropped connections are worth another try
+            self._retry(message, 1.0)
+        except Exception as e:
+            self._fail(message, e)
+        else:
+            self.sent += 1
+            if not message.future.done():
+                message.future.set_result(result)
+        finally:
+            self._send_slots.release()
+
+    def _retry(self, message: OutboundMessage, delay: float) -> None:
+        if message.attempts >= self.max_attempts:
+            self._fail(message, RuntimeError(f"gave up after {message.attempts} attempts"))
+            return
+
+        self.retried += 1
+        self._chat_bucket(message.chat_id).pause(time.monotonic(), delay)
+        queue = self._pending.get((message.lane, message.chat_id))
+        if not queue:
+            queue = self._pending[(message.lane, message.chat_id)] = deque()
+            self._schedule(message.lane, message.chat_id)
+        queue.appendleft(message)
+        self._queued += 1
+        self._wakeup.set()
+
+    def _fail(self, message: OutboundMessage, error: Exception) -> None:
+        self.failed += 1
+        logger.error(f"Failed to {message.method} to chat {message.chat_id}: {error}")
+        if not message.future.done():
+            message.future.set_result(None)
+
+    def _prune_buckets(self, now: float) -> None:
+        """Forget buckets of idle chats; a full bucket is the same as a new one"""
+        idle = [chat_id for chat_id, bucket in self._chat_buckets.items() if bucket.is_full(now)]
+        for chat_id in idle:
+            del self._chat_buckets[chat_id]
+
+    def start(self, bot) -> None:
+        self.bot = bot
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self, drain_timeout: float = 5) -> None:
+        """Give queued messages up to drain_timeout seconds to go out, then stop"""
+        deadline = time.monotonic() + drain_timeout
+        while (self._queued or self._in_flight) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        if self._in_flight:
+            await asyncio.wait(self._in_flight, timeout=max(0.0, deadline - time.monotonic()))
+
+    def stats(self) -> Dict[str, Any]:
+        queued = {name: 0 for name in LANE_NAMES.values()}
+        for (lane, _), queue in self._pending.items():
+            queued[LANE_NAMES[lane]] += len(queue)
+        return {
+            "queued": queued,
+            "chats_waiting": len(self._pending),
+            "in_flight": len(self._in_flight),
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "superseded": self.superseded,
+            "retried": self.retried,
+            "dropped": self.dropped,
+            "failed": self.failed
+        }
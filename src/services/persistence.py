@@ -0,0 +1,287 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from telegram.ext import BasePersistence, PersistenceInput
+
+from src.utils.logger import logger
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    user_id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at);
+CREATE TABLE IF NOT EXISTS conversations (
+    name TEXT NOT NULL,
+    key TEXT NOT NULL,
+    state TEXT NOT NULL,
+    PRIMARY KEY (name, key)
+);
+"""
+
+Statement = Tuple[str, Iterable[Iterable[Any]]]
+
+class SQLiteDatabase:
+    """SQLite file in WAL mode: point reads on the event loop, batched writes on a worker thread"""
+
+    def __init__(self, path: str):
+        self.path = path
+        # The file holds API tokens, so keep it private to the bot's user. This has to happen
+        # before connecting: SQLite creates the -wal and -shm files with the main file's mode
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_WRONLY, 0o600))
+            for private in (path, f"{path}-wal", f"{path}-shm"):
+                if os.path.exists(private):
+                    os.chmod(private, 0o600)
+        except OSError:
+            pass
+        self._reader = self._connect()
+        self._writer = self._connect()
+        self._write_lock = threading.Lock()
+        self.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA busy_timeout=5000")
+        return connection
+
+    def executescript(self, script: str) -> None:
+        """Run schema statements such as CREATE TABLE IF NOT EXISTS"""
+        with self._write_lock:
+            self._writer.executescript(script)
+
+    def read(self, sql: str, params: Iterable[Any] = ()) -> List[tuple]:
+        return self._reader.execute(sql, tuple(params)).fetchall()
+
+    def write(self, statements: List[Statement]) -> None:
+        """Run the statements in one transaction"""
+        with self._write_lock, self._writer:
+            for sql, rows in statements:
+                self._writer.executemany(sql, rows)
+
+    async def write_async(self, statements: List[Statement]) -> None:
+        await asyncio.to_thread(self.write, statements)
+
+    def close(self) -> None:
+        self._reader.close()
+        with self._write_lock:
+            self._writer.close()
+
+def encode_session(session: Any) -> str:
+    """JSON-encode a session, dropping values that can't be stored such as client objects"""
+    return json.dumps(session, default=lambda value: None)
+
+class SQLiteSessionBackend:
+    """Write-behind SQLite storage for SessionStore
+
+    Touched sessions are collected and written in one transaction per flush
+    interval; sessions are read back lazily the first time a user is seen.
+    """
+
+    def __init__(self, database: SQLiteDatabase, flush_interval: float,
+                 encode: Callable[[Any], str] = encode_session, decode: Callable[[str], Any] = json.loads):
+        self.database = database
+        self.flush_interval = flush_interval
+        self.encode = encode
+        self.decode = decode
+        self._dirty: Dict[int, Any] = {}
+        self._deleted: Set[int] = set()
+        self._flushing: Dict[int, Any] = {}
+        self._flushing_deleted: Set[int] = set()
+        self._expire_before: Optional[float] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self.loads = 0
+        self.writes = 0
+        self.flushes = 0
+
+    def load(self, user_id: int) -> Optional[Tuple[float, Any]]:
+        """Return (last write time, session) for a user, including writes not yet flushed"""
+        for deleted, pending in ((self._deleted, self._dirty), (self._flushing_deleted, self._flushing)):
+            if user_id in deleted:
+                return None
+            if user_id in pending:
+                return time.time(), pending[user_id]
+
+        rows = self.database.read("SELECT data, updated_at FROM sessions WHERE user_id = ?", (user_id,))
+        if not rows:
+            return None
+        self.loads += 1
+        data, updated_at = rows[0]
+        return updated_at, self.decode(data)
+
+    def mark_dirty(self, user_id: int, session: Any) -> None:
+        self._deleted.discard(user_id)
+        self._dirty[user_id] = session
+
+    def mark_deleted(self, user_id: int) -> None:
+        self._dirty.pop(user_id, None)
+        self._deleted.add(user_id)
+
+    def expire_before(self, cutoff: float) -> None:
+        """Delete stored sessions last written before cutoff on the next flush"""
+        self._expire_before = cutoff
+
+    async def flush(self) -> int:
+        """Write every pending change in a single transaction"""
+        if not (self._dirty or self._deleted or self._expire_before):
+            return 0
+
+        self._flushing, self._dirty = self._dirty, {}
+        self._flushing_deleted, self._deleted = self._deleted, set()
+        cutoff, self._expire_before = self._expire_before, None
+
+        try:
+            # Encoding runs on the writer thread too, so a large flush doesn't stall the event loop
+            await asyncio.to_thread(self._write, self._flushing, self._flushing_deleted, cutoff)
+        except sqlite3.Error as e:
+            logger.error(f"Session flush failed, retrying next interval: {e}")
+            for user_id, session in self._flushing.items():
+                self._dirty.setdefault(user_id, session)
+            self._deleted |= self._flushing_deleted - set(self._dirty)
+            return 0
+        finally:
+            written = len(self._flushing) + len(self._flushing_deleted)
+            self._flushing, self._flushing_deleted = {}, set()
+
+        self.writes += written
+        self.flushes += 1
+        return written
+
+    def _write(self, sessions: Dict[int, Any], deleted: Set[int], cutoff: Optional[float]) -> None:
+        now = time.time()
+        statements: List[Statement] = [
+            (
+                "INSERT INTO sessions (user_id, data, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+                [(user_id, self.encode(session), now) for user_id, session in sessions.items()]
+            ),
+            ("DELETE FROM sessions WHERE user_id = ?", [(user_id,) for user_id in deleted])
+        ]
+        if cutoff is not None:
+            statements.append(("DELETE FROM sessions WHERE updated_at < ?", [(cutoff,)]))
+        self.database.write(statements)
+
+    async def _flush_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self) -> None:
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_forever())
+
+    async def stop(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending_writes": len(self._dirty) + len(self._deleted),
+            "lazy_loads": self.loads,
+            "rows_written": self.writes,
+            "flushes": self.flushes
+        }
+
+class SQLitePersistence(BasePersistence):
+    """Keeps ConversationHandler states in SQLite; the bot stores no other PTB data"""
+
+    def __init__(self, database: SQLiteDatabase, update_interval: float):
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=False, user_data=False, callback_data=False),
+            update_interval=update_interval
+        )
+        self.database = database
+        self._pending: Dict[Tuple[str, str], Optional[str]] = {}
+        self._write_task: Optional[asyncio.Task] = None
+
+    async def get_conversations(self, name: str) -> Dict:
+        rows = self.database.read("SELECT key, state FROM conversations WHERE name = ?", (name,))
+        return {tuple(json.loads(key)): json.loads(state) for key, state in rows}
+
+    async def update_conversation(self, name: str, key: Tuple[int, ...], new_state: Optional[object]) -> None:
+        self._pending[(name, json.dumps(list(key)))] = None if new_state is None else json.dumps(new_state)
+        # The Application hands over all changed keys at once; write them as one batch
+        if self._write_task is None or self._write_task.done():
+            self._write_task = asyncio.create_task(self._write_pending())
+
+    async def _write_pending(self) -> None:
+        await asyncio.sleep(0)
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+
+        try:
+            await self.database.write_async([
+                (
+                    "INSERT INTO conversations (name, key, state) VALUES (?, ?, ?) "
+                    "ON CONFLICT(name, key) DO UPDATE SET state = excluded.state",
+                    [(name, key, state) for (name, key), state in pending.items() if state is not None]
+                ),
+                (
+                    "DELETE FROM conversations WHERE name = ? AND key = ?",
+                    [(name, key) for (name, key), state in pending.items() if state is None]
+                )
+            ])
+        except sqlite3.Error as e:
+            logger.error(f"Conversation state write failed, retrying with the next batch: {e}")
+            # States changed while the write ran are newer than the failed batch's
+            for conversation, state in pending.items():
+                self._pending.setdefault(conversation, state)
+
+    async def flush(self) -> None:
+        if self._write_task is not None:
+            await self._write_task
+        await self._write_pending()
+
+    async def get_user_data(self) -> Dict:
+        return {}
+
+    async def get_chat_data(self) -> Dict:
+        return {}
+
+    async def get_bot_data(self) -> Dict:
+        return {}
+
+    async def get_callback_data(self) -> None:
+        return None
+
+    async def update_user_data(self, user_id: int, data: Dict) -> None:
+        pass
+
+    async def update_chat_data(self, chat_id: int, data: Dict) -> None:
+        pass
+
+    async def update_bot_data(self, data: Dict) -> None:
+        pass
+
+    async def update_callback_data(self, data: Any) -> None:
+        pass
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        pass
+
+    async def drop_user_data(self, user_id: int) -> None:
+        pass
+
+    async def refresh_user_data(self, user_id: int, user_data: Dict) -> None:
+        pass
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: Dict) -> None:
+        pass
+
+    async def refresh_bot_data(self, bot_data: Dict) -> None:
+        pass
@@ -0,0 +1,303 @@
+import asyncio
+import json
+import random
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+import websockets
+from websockets.client import WebSocketClientProtocol
+from websockets.exceptions import ConnectionClosed, WebSocketException
+
+from src.utils.logger import logger
+
+CHANNEL_PREFIX = "private-org-"
+
+# Returns the channel signature for a socket id, or None if the token may not subscribe
+Authorizer = Callable[[str, str, str], Awaitable[Optional[str]]]
+# Called with (organization_id, event name, event data, user ids of the organization's members)
+EventListener = Callable[[str, str, Any, Set[int]], None]
+
+def pusher_url(key: str, cluster: str) -> str:
+    return f"wss://ws-{cluster}.pusher.com/app/{key}?protocol=7&client=copperx-bot&version=1.0"
+
+class PusherError(Exception):
+    """A pusher:error message; the code says whether and when to reconnect"""
+
+    def __init__(self, code: Optional[int], message: str):
+        super().__init__(f"{code}: {message}")
+        self.code = code
+
+def _close_code(error: Exception) -> int:
+    """The Pusher code of a pusher:error or of the close frame the server sent, 0 if there is none"""
+    if isinstance(error, ConnectionClosed):
+        return error.rcvd.code if error.rcvd is not None else 0
+    return getattr(error, "code", None) or 0
+
+class PusherSubscriber:
+    """One Pusher websocket per process, shared by the organization channels of every logged-in user
+
+    A private-org channel is subscribed while at least one logged-in user
+    belongs to the organization and unsubscribed when the last one leaves.
+    Private channels are authorised per connection through the Copperx API
+    with a member's token, so after a reconnect every channel is authorised
+    and subscribed again.
+    """
+
+    def __init__(self, url: str, authorize: Authorizer, on_event: EventListener,
+                 activity_timeout: float = 120, pong_timeout: float = 30, max_reconnect_delay: float = 60,
+                 max_concurrent_auth: int = 10):
+        self.url = url
+        self.authorize = authorize
+        self.on_event = on_event
+        self.activity_timeout = activity_timeout
+        self.pong_timeout = pong_timeout
+        self.max_reconnect_delay = max_reconnect_delay
+        # organization id -> user id -> token
+        self.members: Dict[str, Dict[int, str]] = {}
+        self._user_orgs: Dict[int, str] = {}
+        self._subscribed: Set[str] = set()
+        self._changes: asyncio.Queue = asyncio.Queue()
+        self._auth_slots = asyncio.Semaphore(max_concurrent_auth)
+        self._worker: Optional[asyncio.Task] = None
+        self.socket_id: Optional[str] = None
+        self.connects = 0
+        self.events = 0
+        self.deliveries = 0
+        self.auth_failures = 0
+        self.subscription_errors = 0
+
+    def subscribe(self, user_id: int, organization_id: str, token: str) -> None:
+        """Receive the organization's events for user_id until unsubscribe"""
+        if self._user_orgs.get(user_id) not in (None, organization_id):
+            self.unsubscribe(user_id)
+        members = self.members.get(organization_id)
+        if members is None:
+            members = self.members[organization_id] = {}
+        # A new member's token is another chance for a channel whose authorisation failed
+        if organization_id not in self._subscribed:
+            self._notify_change(organization_id)
+        members[user_id] = token
+        self._user_orgs[user_id] = organization_id
+
+    def unsubscribe(self, user_id: int) -> None:
+        organization_id = self._user_orgs.pop(user_id, None)
+        if organization_id is None:
+            return
+        members = self.members.get(organization_id)
+        if members is None:
+            return
+        members.pop(user_id, None)
+        if not members:
+            del self.members[organization_id]
+            self._notify_change(organization_id)
+
+    def is_subscribed(self, user_id: int) -> bool:
+        return user_id in self._user_orgs
+
+    def members_of(self, organization_id: str) -> Set[int]:
+        """User ids logged in to the organization"""
+        return set(self.members.get(organization_id, ()))
+
+    def tokens_of(self, organization_id: str) -> List[str]:
+        """Session tokens of the users logged in to the organization"""
+        return list(self.members.get(organization_id, {}).values())
+
+    def _notify_change(self, organization_id: str) -> None:
+        # Membership is tracked without a connection too; every channel is synced when one opens
+        if self._worker is not None:
+            self._changes.put_nowait(organization_id)
+
+    def start(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def _run(self) -> None:
+        attempt = 0
+        while True:
+            ws = None
+            try:
+                # Pusher has its own ping messages, sent by _serve when the connection goes quiet
+                ws = await websockets.connect(self.url, ping_interval=None, open_timeout=10)
+                established = json.loads(await asyncio.wait_for(ws.recv(), self.pong_timeout))
+                if established.get("event") != "pusher:connection_established":
+                    raise ConnectionError(f"Unexpected first Pusher message: {established.get('event')}")
+                data = json.loads(established["data"])
+                self.socket_id = data["socket_id"]
+                activity_timeout = min(self.activity_timeout, data.get("activity_timeout", self.activity_timeout))
+                self.connects += 1
+                attempt = 0
+                logger.info(f"Pusher connected as {self.socket_id}, resubscribing {len(self.members)} channels")
+
+                self._subscribed.clear()
+                for organization_id in self.members:
+                    self._changes.put_nowait(organization_id)
+                await self._serve(ws, activity_timeout)
+            except asyncio.CancelledError:
+                if ws is not None:
+                    await ws.close()
+                raise
+            except (PusherError, ConnectionClosed) as e:
+                # Pusher codes, sent as pusher:error or as the close code:
+                # 4000-4099 don't reconnect, 4100-4199 back off, 4200-4299 reconnect now
+                code = _close_code(e)
+                if 4000 <= code < 4100:
+                    logger.error(f"Pusher refused the connection, not reconnecting: {e}")
+                    return
+                logger.warning(f"Pusher connection ended: {e}")
+                if 4200 <= code < 4300 and attempt == 0:
+                    attempt = 1
+                    continue
+            except (WebSocketException, ConnectionError, OSError, asyncio.TimeoutError, ValueError, KeyError) as e:
+                logger.warning(f"Pusher connection lost: {e!r}")
+            finally:
+                self.socket_id = None
+                if ws is not None:
+                    await ws.close()
+
+            delay = min(self.max_reconnect_delay, 2 ** attempt) * random.uniform(0.5, 1)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def _serve(self, ws: WebSocketClientProtocol, activity_timeout: float) -> None:
+        """Read events and apply subscription changes until the connection ends"""
+        sync = asyncio.create_task(self._sync_channels(ws))
+        # One receive stays pending across timeouts, raced against the channel sync
+        receiving: Optional[asyncio.Future] = None
+        pinged = False
+        try:
+            while True:
+                if receiving is None:
+                    receiving = asyncio.ensure_future(ws.recv())
+                done, _ = await asyncio.wait({receiving, sync}, timeout=self.pong_timeout if pinged else activity_timeout,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if sync in done:
+                    sync.result()
+                if receiving not in done:
+                    if pinged:
+                        raise ConnectionError("Pusher did not answer our ping")
+                    # Quiet for too long: make sure the connection is still alive
+                    await ws.send(json.dumps({"event": "pusher:ping", "data": {}}))
+                    pinged = True
+                    continue
+
+                raw = receiving.result()
+                receiving = None
+                pinged = False
+                await self._handle(ws, raw)
+        finally:
+            if receiving is not None:
+                receiving.cancel()
+            sync.cancel()
+            try:
+                await sync
+            except (asyncio.CancelledError, ConnectionClosed, ConnectionError):
+                pass
+
+    async def _handle(self, ws: WebSocketClientProtocol, raw: str) -> None:
+        message = json.loads(raw)
+        event = message.get("event", "")
+        if event == "pusher:ping":
+            await ws.send(json.dumps({"event": "pusher:pong", "data": {}}))
+            return
+        if event == "pusher:error":
+            data = message.get("data") or {}
+            raise PusherError(data.get("code"), data.get("message", ""))
+        if event == "pusher:subscription_error":
+            self.subscription_errors += 1
+            self._subscribed.discard(message.get("channel", "")[len(CHANNEL_PREFIX):])
+            logger.error(f"Pusher subscription to {message.get('channel')} failed: {message.get('data')}")
+            return
+        if event.startswith("pusher"):
+            return
+
+        channel = message.get("channel", "")
+        if not channel.startswith(CHANNEL_PREFIX):
+            return
+        organization_id = channel[len(CHANNEL_PREFIX):]
+        members = self.members.get(organization_id)
+        if not members:
+            return
+
+        data = message.get("data")
+        if isinstance(data, str):
+            try:
+                data = json.loads(data)
+            except ValueError:
+                pass
+        self.events += 1
+        self.deliveries += len(members)
+        try:
+            self.on_event(organization_id, event, data, self.members_of(organization_id))
+        except Exception as e:
+            logger.error(f"Failed to dispatch Pusher event {event} for {organization_id}: {e}")
+
+    async def _sync_channels(self, ws: WebSocketClientProtocol) -> None:
+        """Bring subscriptions in line with membership as organizations gain or lose members"""
+        pending: Set[asyncio.Task] = set()
+        in_progress: Set[str] = set()
+        try:
+            while True:
+                organization_id = await self._changes.get()
+                if organization_id in in_progress:
+                    continue
+                in_progress.add(organization_id)
+                task = asyncio.create_task(self._reconcile(ws, organization_id))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+                task.add_done_callback(lambda _, org=organization_id: in_progress.discard(org))
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _reconcile(self, ws: WebSocketClientProtocol, organization_id: str) -> None:
+        channel = CHANNEL_PREFIX + organization_id
+        while (organization_id in self.members) != (organization_id in self._subscribed):
+            if organization_id not in self.members:
+                await ws.send(json.dumps({"event": "pusher:unsubscribe", "data": {"channel": channel}}))
+                self._subscribed.discard(organization_id)
+                continue
+
+            auth = await self._authorize_channel(organization_id, channel)
+            if auth is None:
+                self.auth_failures += 1
+                logger.error(f"No member of {organization_id} could authorise its Pusher channel")
+                return
+            if organization_id not in self.members:
+                continue
+            await ws.send(json.dumps({"event": "pusher:subscribe", "data": {"channel": channel, "auth": auth}}))
+            self._subscribed.add(organization_id)
+
+    async def _authorize_channel(self, organization_id: str, channel: str) -> Optional[str]:
+        """Try the members' tokens in turn; a logged-out token is refused"""
+        socket_id = self.socket_id
+        async with self._auth_slots:
+            for token in list(self.members.get(organization_id, {}).values()):
+                try:
+                    auth = await self.authorize(socket_id, channel, token)
+                except Exception as e:
+                    logger.error(f"Pusher channel authorisation failed: {e}")
+                    continue
+                if auth:
+                    return auth
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connected": self.socket_id is not None,
+            "connects": self.connects,
+            "organizations": len(self.members),
+            "users": len(self._user_orgs),
+            "channels_subscribed": len(self._subscribed),
+            "events": self.events,
+            "deliveries": self.deliveries,
+            "auth_failures": self.auth_failures,
+            "subscription_errors": self.subscription_errors
+        }
@@ -0,0 +1,102 @@
+import random
+import time
+from typing import Any, Dict
+
+class CircuitBreaker:
+    """Stop calling an endpoint after repeated transient failures, then probe it again after a cool-down"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+
+    def allow(self) -> bool:
+        """Return whether a request may be sent now"""
+        if self.state == self.CLOSED:
+            return True
+
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+
+        # Half-open lets a single probe through; its outcome closes or re-opens the breaker.
+        # A probe that never reported back (e.g. cancelled) is replaced after another cool-down.
+        if self.state == self.HALF_OPEN and (
+            not self._probe_in_flight or time.monotonic() - self._probe_started >= self.reset_timeout
+        ):
+            self._probe_in_flight = True
+            self._probe_started = time.monotonic()
+            return True
+
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+class RetryPolicy:
+    """Exponential backoff with full jitter"""
+
+    def __init__(self, max_attempts: int, base_delay: float, max_delay: float):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait before retry number attempt (starting at 0)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+class BreakerRegistry:
+    """One circuit breaker per endpoint path, plus retry and fast-fail counters"""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self.retries: Dict[str, int] = {}
+        self.fast_failures = 0
+        self.stale_served = 0
+
+    def get(self, path: str) -> CircuitBreaker:
+        breaker = self._breakers.get(path)
+        if breaker is None:
+            breaker = self._breakers[path] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        return breaker
+
+    def record_retry(self, path: str) -> None:
+        self.retries[path] = self.retries.get(path, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Breaker state per endpoint and retry counts"""
+        stats: Dict[str, Any] = {
+            "fast_failures": self.fast_failures,
+            "stale_served": self.stale_served,
+            "retries": sum(self.retries.values())
+        }
+        for path, breaker in sorted(self._breakers.items()):
+            stats[path] = (
+                f"{breaker.state}, {breaker.consecutive_failures} failures, "
+                f"opened {breaker.times_opened}x, {self.retries.get(path, 0)} retries"
+            )
+        return stats
@@ -0,0 +1,197 @@
+import asyncio
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, MutableMapping, Optional, Tuple
+
+from src.utils.logger import logger
+
+EvictionListener = Callable[[int, Any, str], None]
+
+def _deep_sizeof(obj: Any, seen: Optional[set] = None) -> int:
+    """Approximate memory held by an object and everything it references"""
+    seen = seen if seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_sizeof(k, seen) + _deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, "__slots__"):
+        size += sum(_deep_sizeof(getattr(obj, slot), seen) for slot in obj.__slots__ if hasattr(obj, slot))
+    elif hasattr(obj, "__dict__"):
+        size += _deep_sizeof(vars(obj), seen)
+    return size
+
+class SessionStore(MutableMapping):
+    """User sessions keyed by Telegram user ID, with idle expiry, an LRU size cap and background sweeping
+
+    Reads that hit an expired or evicted session raise KeyError like a plain
+    dict, so callers can send the user back to login. With a backend attached,
+    sessions missing from memory are loaded from it on first access and every
+    change is handed to it for write-behind storage.
+    """
+
+    def __init__(self, max_entries: int, idle_ttl: float, sweep_interval: float, backend=None):
+        self.max_entries = max_entries
+        self.idle_ttl = idle_ttl
+        self.sweep_interval = sweep_interval
+        self.backend = backend
+        self._sessions: "OrderedDict[int, Tuple[float, Any]]" = OrderedDict()
+        self._listeners: List[EvictionListener] = []
+        self._sweeper: Optional[asyncio.Task] = None
+        self.expired = 0
+        self.evicted = 0
+        self.sweeps = 0
+
+    def add_eviction_listener(self, listener: EvictionListener) -> None:
+        """Call listener(user_id, session, reason) whenever a session is dropped"""
+        self._listeners.append(listener)
+
+    def attach_backend(self, backend) -> None:
+        """Persist sessions through backend, which must offer load, mark_dirty, mark_deleted and expire_before"""
+        self.backend = backend
+
+    def _is_expired(self, last_access: float, now: float) -> bool:
+        return now - last_access > self.idle_ttl
+
+    def __getitem__(self, user_id: int) -> Any:
+        entry = self._sessions.get(user_id)
+        if entry is None:
+            session = self._load(user_id)
+            if session is None:
+                raise KeyError(user_id)
+            self[user_id] = session
+            return session
+
+        now = time.monotonic()
+        if self._is_expired(entry[0], now):
+            self._drop(user_id, "expired")
+            raise KeyError(user_id)
+
+        self._sessions[user_id] = (now, entry[1])
+        self._sessions.move_to_end(user_id)
+        # Handlers mutate the returned dict in place, so any read may be a write
+        if self.backend is not None:
+            self.backend.mark_dirty(user_id, entry[1])
+        return entry[1]
+
+    def __setitem__(self, user_id: int, session: Any) -> None:
+        self._sessions[user_id] = (time.monotonic(), session)
+        self._sessions.move_to_end(user_id)
+        if self.backend is not None:
+            self.backend.mark_dirty(user_id, session)
+        while len(self._sessions) > self.max_entries:
+            oldest = next(iter(self._sessions))
+            self._drop(oldest, "evicted")
+
+    def _load(self, user_id: int) -> Optional[Any]:
+        """Fetch a session that isn't in memory from the backend, honouring the idle TTL"""
+        if self.backend is None:
+            return None
+        loaded = self.backend.load(user_id)
+        if loaded is None:
+            return None
+
+        updated_at, session = loaded
+        if time.time() - updated_at > self.idle_ttl:
+            self.backend.mark_deleted(user_id)
+            self.expired += 1
+            return None
+        return session
+
+    def __delitem__(self, user_id: int) -> None:
+        if user_id not in self._sessions:
+            raise KeyError(user_id)
+        self._drop(user_id, "removed")
+
+    def __contains__(self, user_id: object) -> bool:
+        entry = self._sessions.get(user_id)
+        if entry is None:
+            try:
+                self[user_id]
+            except KeyError:
+                return False
+            return True
+        return not self._is_expired(entry[0], time.monotonic())
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(list(self._sessions))
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _drop(self, user_id: int, reason: str) -> None:
+        _, session = self._sessions.pop(user_id)
+        if reason == "expired":
+            self.expired += 1
+        elif reason == "evicted":
+            self.evicted += 1
+
+        # Evicting only frees memory; the stored copy stays so the user can come back
+        if self.backend is not None and reason != "evicted":
+            self.backend.mark_deleted(user_id)
+
+        for listener in self._listeners:
+            try:
+                listener(user_id, session, reason)
+            except Exception as e:
+                logger.error(f"Session eviction listener failed: {e}")
+
+    def sweep(self) -> int:
+        """Drop every session idle for longer than the TTL"""
+        now = time.monotonic()
+        # Oldest access first, so stop at the first session still fresh
+        stale = []
+        for user_id, (last_access, _) in self._sessions.items():
+            if not self._is_expired(last_access, now):
+                break
+            stale.append(user_id)
+
+        for user_id in stale:
+            self._drop(user_id, "expired")
+        if self.backend is not None:
+            self.backend.expire_before(time.time() - self.idle_ttl)
+        self.sweeps += 1
+        return len(stale)
+
+    async def _sweep_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            dropped = self.sweep()
+            if dropped:
+                logger.info(f"Session sweep dropped {dropped} idle sessions")
+
+    def start_sweeper(self) -> None:
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep_forever())
+
+    async def stop_sweeper(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+
+    def memory_usage(self, sample_size: int = 100) -> int:
+        """Estimated bytes held by all sessions, extrapolated from the most recent ones"""
+        if not self._sessions:
+            return 0
+        sample = list(self._sessions.values())[-sample_size:]
+        per_session = sum(_deep_sizeof(session) for _, session in sample) / len(sample)
+        return int(per_session * len(self._sessions)) + sys.getsizeof(self._sessions)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._sessions),
+            "max_entries": self.max_entries,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "sweeps": self.sweeps,
+            "memory_bytes": self.memory_usage()
+        }
@@ -0,0 +1,326 @@
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from src.services.persistence import SQLiteDatabase
+from src.services.singleflight import SingleFlight
+from src.utils.logger import logger
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    owner TEXT NOT NULL,
+    id TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    type TEXT,
+    status TEXT,
+    amount REAL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (owner, id)
+);
+CREATE INDEX IF NOT EXISTS transactions_owner_created_at ON transactions (owner, created_at DESC);
+CREATE INDEX IF NOT EXISTS transactions_owner_type ON transactions (owner, type, created_at DESC);
+CREATE TABLE IF NOT EXISTS transaction_sync (
+    owner TEXT PRIMARY KEY,
+    newest_at REAL,
+    newest_id TEXT,
+    backfill_page INTEGER,
+    synced_at REAL NOT NULL
+);
+"""
+
+# Fetches one page of /transfers: (token, page, limit) -> API response
+FetchPage = Callable[[str, int, int], Awaitable[Dict[str, Any]]]
+
+TYPE_ALIASES = {
+    "deposit": "DEPOSIT",
+    "withdrawal": "WITHDRAWAL",
+    "email": "EMAIL_TRANSFER",
+    "wallet": "WALLET_TRANSFER"
+}
+TYPE_ALIASES.update({value.lower(): value for value in TYPE_ALIASES.values()})
+
+def created_timestamp(created_at: Any) -> float:
+    """POSIX time of a transfer's createdAt, 0 if it doesn't parse"""
+    try:
+        return datetime.fromisoformat(str(created_at).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return 0.0
+
+def _amount(amount: Any) -> Optional[float]:
+    try:
+        return float(amount)
+    except (TypeError, ValueError):
+        return None
+
+def _day(value: str) -> datetime:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    except ValueError:
+        raise ValueError(f"'{value}' is not a date like 2025-01-31") from None
+
+class TransactionFilter:
+    """Which indexed transfers a history search shows"""
+
+    __slots__ = ("types", "statuses", "since", "until", "min_amount", "max_amount")
+
+    def __init__(self, types: Optional[Set[str]] = None, statuses: Optional[Set[str]] = None,
+                 since: Optional[float] = None, until: Optional[float] = None,
+                 min_amount: Optional[float] = None, max_amount: Optional[float] = None):
+        self.types = types or set()
+        self.statuses = statuses or set()
+        self.since = since
+        self.until = until
+        self.min_amount = min_amount
+        self.max_amount = max_amount
+
+    def __bool__(self) -> bool:
+        bounds = (self.since, self.until, self.min_amount, self.max_amount)
+        return bool(self.types or self.statuses) or any(bound is not None for bound in bounds)
+
+    def where(self) -> Tuple[str, List[Any]]:
+        """SQL conditions and parameters, to follow "WHERE owner = ?" """
+        clauses, params = [], []
+        if self.types:
+            clauses.append(f"type IN ({', '.join('?' * len(self.types))})")
+            params.extend(sorted(self.types))
+        if self.statuses:
+            clauses.append(f"status IN ({', '.join('?' * len(self.statuses))})")
+            params.extend(sorted(self.statuses))
+        for clause, value in (
+            ("created_at >= ?", self.since), ("created_at < ?", self.until),
+            ("amount >= ?", self.min_amount), ("amount <= ?", self.max_amount)
+        ):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        return "".join(f" AND {clause}" for clause in clauses), params
+
+def parse_filter(text: str) -> TransactionFilter:
+    """Parse search terms such as "deposit success from:2025-01-01 to:2025-01-31 min:10 max:500"
+
+    Type names (deposit, withdrawal, email, wallet) and other bare words,
+    taken as statuses, may repeat; from/to are inclusive UTC days. Raises
+    ValueError naming the term that doesn't parse.
+    """
+    search = TransactionFilter()
+    for term in text.split():
+        key, separator, value = term.partition(":")
+        key = key.lower()
+        if not separator:
+            if key in TYPE_ALIASES:
+                search.types.add(TYPE_ALIASES[key])
+            else:
+                search.statuses.add(term.upper())
+        elif key == "type" and value.lower() in TYPE_ALIASES:
+            search.types.add(TYPE_ALIASES[value.lower()])
+        elif key == "status" and value:
+            search.statuses.add(value.upper())
+        elif key == "from":
+            search.since = _day(value).timestamp()
+        elif key == "to":
+            search.until = (_day(value) + timedelta(days=1)).timestamp()
+        elif key in ("min", "max"):
+            amount = _amount(value)
+            if amount is None:
+                raise ValueError(f"'{value}' is not an amount")
+            setattr(search, f"{key}_amount", amount)
+        else:
+            raise ValueError(f"'{term}' is not a search term")
+    return search
+
+class TransactionIndex:
+    """Per-organization copy of /transfers in SQLite, so history pages and searches skip the API
+
+    A sync fetches pages from the newest until it reaches a transfer already
+    indexed, so it usually costs one request, and rewrites everything it
+    fetched, refreshing the status of recent transfers. The first sync of an
+    owner indexes one page and leaves the older ones to a background
+    backfill that resumes after restarts. Syncs run at most once per
+    sync_interval unless mark_stale() is called, e.g. on an account event.
+    """
+
+    def __init__(self, database: SQLiteDatabase, fetch_page: FetchPage, page_size: int = 100,
+                 sync_interval: float = 30, backfill_delay: float = 0.5):
+        self.database = database
+        self.fetch_page = fetch_page
+        self.page_size = page_size
+        self.sync_interval = sync_interval
+        self.backfill_delay = backfill_delay
+        database.executescript(SCHEMA)
+        self._synced: Dict[str, float] = {}
+        self._flights = SingleFlight()
+        self._backfills: Dict[str, asyncio.Task] = {}
+        self.syncs = 0
+        self.pages_fetched = 0
+        self.rows_written = 0
+        self.sync_failures = 0
+        self.queries = 0
+
+    def _state(self, owner: str) -> Optional[Tuple[Optional[float], Optional[str], Optional[int]]]:
+        rows = self.database.read(
+            "SELECT newest_at, newest_id, backfill_page FROM transaction_sync WHERE owner = ?", (owner,)
+        )
+        return rows[0] if rows else None
+
+    def has_synced(self, owner: str) -> bool:
+        """Whether owner's transfers have been indexed at all"""
+        return self._state(owner) is not None
+
+    def is_complete(self, owner: str) -> bool:
+        """Whether every transfer of owner has been indexed at least once"""
+        state = self._state(owner)
+        return state is not None and state[2] is None
+
+    def mark_stale(self, owner: str) -> None:
+        """Make the next sync of owner go to the API even within sync_interval"""
+        self._synced.pop(owner, None)
+
+    async def sync(self, owner: str, token: str) -> bool:
+        """Bring owner's newest transfers into the index; False if the API couldn't be reached"""
+        synced_at = self._synced.get(owner)
+        if synced_at is not None and time.monotonic() - synced_at < self.sync_interval:
+            return True
+        return await self._flights.do(owner, lambda: self._sync(owner, token))
+
+    async def _fetch(self, token: str, page: int) -> Optional[Tuple[List[Dict], bool]]:
+        response = await self.fetch_page(token, page, self.page_size)
+        if "error" in response:
+            return None
+        self.pages_fetched += 1
+        transfers = [t for t in response.get("data", []) if isinstance(t, dict) and t.get("id") is not None]
+        return transfers, response.get("hasMore", len(response.get("data", [])) >= self.page_size)
+
+    async def _sync(self, owner: str, token: str) -> bool:
+        state = self._state(owner)
+        fetched: List[Dict] = []
+        page = 1
+        while True:
+            result = await self._fetch(token, page)
+            if result is None:
+                self.sync_failures += 1
+                return False
+            transfers, has_more = result
+            fetched.extend(transfers)
+            # A first sync stops after one page; the backfill fetches the rest
+            if state is None or not has_more or self._reaches(transfers, state[0], state[1]):
+                break
+            page += 1
+
+        if state is None:
+            backfill_page = page + 1 if has_more else None
+        else:
+            backfill_page = state[2]
+        newest = max(fetched, key=lambda t: created_timestamp(t.get("createdAt")), default=None)
+        if newest is not None and (state is None or state[0] is None or created_timestamp(newest.get("createdAt")) >= state[0]):
+            newest_at, newest_id = created_timestamp(newest.get("createdAt")), str(newest["id"])
+        else:
+            newest_at, newest_id = (state[0], state[1]) if state else (None, None)
+        await self._write(owner, fetched, (owner, newest_at, newest_id, backfill_page, time.time()))
+
+        self.syncs += 1
+        self._synced[owner] = time.monotonic()
+        if backfill_page is not None:
+            self._start_backfill(owner, token)
+        return True
+
+    @staticmethod
+    def _reaches(transfers: List[Dict], newest_at: Optional[float], newest_id: Optional[str]) -> bool:
+        return any(
+            str(t["id"]) == newest_id or (newest_at is not None and created_timestamp(t.get("createdAt")) < newest_at)
+            for t in transfers
+        )
+
+    async def _write(self, owner: str, transfers: List[Dict], state: Optional[tuple] = None,
+                     backfill: Optional[Tuple[Optional[int], str]] = None) -> None:
+        statements = [(
+            "INSERT INTO transactions (owner, id, created_at, type, status, amount, data) VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(owner, id) DO UPDATE SET created_at = excluded.created_at, type = excluded.type, "
+            "status = excluded.status, amount = excluded.amount, data = excluded.data",
+            [
+                (owner, str(t["id"]), created_timestamp(t.get("createdAt")), t.get("type"), t.get("status"),
+                 _amount(t.get("amount")), json.dumps(t))
+                for t in transfers
+            ]
+        )]
+        if state is not None:
+            statements.append((
+                "INSERT INTO transaction_sync (owner, newest_at, newest_id, backfill_page, synced_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(owner) DO UPDATE SET newest_at = excluded.newest_at, newest_id = excluded.newest_id, "
+                "backfill_page = excluded.backfill_page, synced_at = excluded.synced_at",
+                [state]
+            ))
+        if backfill is not None:
+            statements.append(("UPDATE transaction_sync SET backfill_page = ? WHERE owner = ?", [backfill]))
+        await self.database.write_async(statements)
+        self.rows_written += len(transfers)
+
+    def _start_backfill(self, owner: str, token: str) -> None:
+        task = self._backfills.get(owner)
+        if task is None or task.done():
+            self._backfills[owner] = asyncio.create_task(self._backfill(owner, token))
+
+    async def _backfill(self, owner: str, token: str) -> None:
+        """Index older pages one at a time until the oldest transfer; stops on an API error"""
+        try:
+            while True:
+                state = self._state(owner)
+                if state is None or state[2] is None:
+                    return
+                page = state[2]
+                await asyncio.sleep(self.backfill_delay)
+                result = await self._fetch(token, page)
+                if result is None:
+                    logger.warning(f"Transaction backfill of {owner} paused at page {page}")
+                    return
+                transfers, has_more = result
+                # New transfers push older ones to later pages, so pages may overlap but never skip
+                await self._write(owner, transfers, backfill=(page + 1 if has_more and transfers else None, owner))
+        except Exception as e:
+            logger.error(f"Transaction backfill of {owner} failed: {e}")
+        finally:
+            self._backfills.pop(owner, None)
+
+    def query(self, owner: str, search: Optional[TransactionFilter] = None, limit: int = 10,
+              offset: int = 0) -> List[Dict]:
+        """Indexed transfers of owner matching search, newest first"""
+        conditions, params = search.where() if search else ("", [])
+        rows = self.database.read(
+            f"SELECT data FROM transactions WHERE owner = ?{conditions} "
+            f"ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+            (owner, *params, limit, offset)
+        )
+        self.queries += 1
+        return [json.loads(data) for data, in rows]
+
+    def page(self, owner: str, page: int, page_size: int,
+             search: Optional[TransactionFilter] = None) -> Optional[Tuple[List[Dict], bool]]:
+        """(transfers, has_more) for a page of history, or None while the index can't answer it in full
+
+        A search on an index that is still backfilling answers from what is
+        indexed so far; see is_complete().
+        """
+        offset = (page - 1) * page_size
+        transfers = self.query(owner, search, page_size + 1, offset)
+        has_more = len(transfers) > page_size
+        if not search and not has_more and not self.is_complete(owner):
+            return None
+        return transfers[:page_size], has_more
+
+    async def stop(self) -> None:
+        """Cancel running backfills; they resume from their saved page on the next sync"""
+        tasks = list(self._backfills.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "syncs": self.syncs,
+            "sync_failures": self.sync_failures,
+            "pages_fetched": self.pages_fetched,
+            "rows_written": self.rows_written,
+            "backfills_running": len(self._backfills),
+            "queries": self.queries
+        }
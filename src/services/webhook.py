@@ -0,0 +1,140 @@
+import asyncio
+import hmac
+import signal
+import time
+from collections import deque
+from http import HTTPStatus
+from typing import Any, Deque, Dict, Optional
+
+from telegram import Update
+from telegram.ext import Application, ContextTypes, TypeHandler
+
+from src.utils.http_server import HTTPServer, Request, Response
+from src.utils.logger import logger
+from src.utils.metrics import percentile
+
+SECRET_HEADER = "x-telegram-bot-api-secret-token"
+
+class WebhookIngress:
+    """Accepts Telegram updates over HTTP and feeds them into the Application's update queue
+
+    The queue is bounded: when it is full the update is refused with 503 so
+    Telegram retries it later, instead of the process buffering without limit.
+    """
+
+    def __init__(self, application: Application, path: str, secret_token: str,
+                 host: str = "0.0.0.0", port: int = 8443, latency_samples: int = 1000):
+        if not secret_token:
+            raise ValueError("Webhook mode requires a secret token")
+        self.application = application
+        self.path = path
+        self.secret_token = secret_token
+        self.server = HTTPServer(host, port)
+        self.server.route("POST", path, self.receive)
+        self.server.route("GET", "/healthz", self.health)
+        self._received_at: Dict[int, float] = {}
+        self._queue_waits: Deque[float] = deque(maxlen=latency_samples)
+        self.received = 0
+        self.rejected_full = 0
+        self.unauthorized = 0
+        self.malformed = 0
+
+        # Runs before every other handler, so the wait measured is time spent queued
+        application.add_handler(TypeHandler(Update, self._record_queue_wait), group=-1000)
+
+    @property
+    def queue(self) -> asyncio.Queue:
+        return self.application.update_queue
+
+    async def receive(self, request: Request) -> Response:
+        supplied = request.headers.get(SECRET_HEADER, "")
+        if not hmac.compare_digest(supplied.encode(), self.secret_token.encode()):
+            self.unauthorized += 1
+            return Response(HTTPStatus.FORBIDDEN)
+
+        try:
+            update = Update.de_json(request.json(), self.application.bot)
+        except Exception as e:
+            self.malformed += 1
+            logger.error(f"Rejected malformed webhook update: {e}")
+            return Response(HTTPStatus.BAD_REQUEST)
+        if update is None:
+            self.malformed += 1
+            return Response(HTTPStatus.BAD_REQUEST)
+
+        try:
+            self.queue.put_nowait(update)
+        except asyncio.QueueFull:
+            self.rejected_full += 1
+            return Response(HTTPStatus.SERVICE_UNAVAILABLE, headers={"Retry-After": "1"})
+
+        self.received += 1
+        self._received_at[update.update_id] = time.perf_counter()
+        return Response(HTTPStatus.OK)
+
+    async def health(self, request: Request) -> Response:
+        return Response.json({"status": "ok", "queue_depth": self.queue.qsize()})
+
+    async def _record_queue_wait(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        received_at = self._received_at.pop(update.update_id, None)
+        if received_at is not None:
+            self._queue_waits.append(time.perf_counter() - received_at)
+
+    async def start(self) -> None:
+        await self.server.start()
+
+    async def stop(self) -> None:
+        await self.server.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "received": self.received,
+            "rejected_queue_full": self.rejected_full,
+            "unauthorized": self.unauthorized,
+            "malformed": self.malformed,
+            "queue_wait_p50_ms": round(percentile(self._queue_waits, 0.50) * 1000, 2),
+            "queue_wait_p95_ms": round(percentile(self._queue_waits, 0.95) * 1000, 2),
+            "queue_wait_max_ms": round(max(self._queue_waits, default=0) * 1000, 2)
+        }
+
+async def serve_webhook(application: Application, ingress: WebhookIngress, webhook_url: Optional[str] = None,
+                        max_connections: Optional[int] = None) -> None:
+    """Run the Application behind the webhook ingress until SIGINT or SIGTERM
+
+    Mirrors the lifecycle of Application.run_polling, including the post_init,
+    post_stop and post_shutdown hooks. Queued updates are processed before stopping.
+    """
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await application.initialize()
+    try:
+        if application.post_init:
+            await application.post_init(application)
+        await application.start()
+        await ingress.start()
+
+        # Only one instance behind a load balancer needs to register the URL
+        if webhook_url:
+            await application.bot.set_webhook(
+                webhook_url,
+                max_connections=max_connections,
+                allowed_updates=Update.ALL_TYPES,
+                secret_token=ingress.secret_token
+            )
+            logger.info(f"Webhook registered at {webhook_url}")
+
+        await stop.wait()
+    finally:
+        await ingress.stop()
+        if application.running:
+            await application.stop()
+        if application.post_stop:
+            await application.post_stop(application)
+        await application.shutdown()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
@@ -0,0 +1,79 @@
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from telegram import Update
+from telegram.ext import CallbackQueryHandler, ContextTypes
+
+# Callback data is "action" or "action:payload"; Telegram allows at most 64 bytes
+SEPARATOR = ":"
+MAX_CALLBACK_DATA = 64
+
+# Actions
+LOGIN = "login"
+ABOUT = "about"
+BACK_TO_START = "back_to_start"
+MAIN_MENU = "main_menu"
+WALLET_MENU = "wallet_menu"
+DEPOSIT_FUNDS = "deposit_funds"
+SET_DEFAULT_WALLET = "set_default_wallet"
+SET_DEFAULT = "set_default"  # payload: wallet id
+TRANSFER_MENU = "transfer_menu"
+EMAIL_TRANSFER = "email_transfer"
+WALLET_TRANSFER = "wallet_transfer"
+BANK_WITHDRAWAL = "bank_withdrawal"
+RECENT_TRANSFERS = "recent_transfers"
+NETWORK = "network"  # payload: wallet id
+CONFIRM_EMAIL_TRANSFER = "confirm_email_transfer"
+CONFIRM_WALLET_TRANSFER = "confirm_wallet_transfer"
+CONFIRM_BANK_WITHDRAWAL = "confirm_bank_withdrawal"
+PROFILE = "profile"
+KYC_STATUS = "kyc_status"
+TRANSACTION_HISTORY = "transaction_history"
+HISTORY_PAGE = "history_page"  # payload: page number
+HISTORY_SEARCH_PAGE = "history_search_page"  # payload: page number
+SETTINGS = "settings"
+TOGGLE_NOTIFICATIONS = "toggle_notifications"
+LOGOUT = "logout"
+
+# Payload actions as packed before the "action:payload" format, e.g. "network_<wallet id>";
+# keyboards sent by earlier versions still carry them
+LEGACY_PREFIXES = (("set_default_", SET_DEFAULT), ("network_", NETWORK))
+
+HandlerCallback = Callable[[Update, ContextTypes.DEFAULT_TYPE], Awaitable[object]]
+
+def pack(action: str, payload: str = "") -> str:
+    """Callback data for action with an optional payload"""
+    data = f"{action}{SEPARATOR}{payload}" if payload else action
+    if len(data.encode()) > MAX_CALLBACK_DATA:
+        raise ValueError(f"Callback data for {action} exceeds {MAX_CALLBACK_DATA} bytes")
+    return data
+
+def unpack(data: str) -> Tuple[str, str]:
+    """Split callback data into its action and payload"""
+    action, separator, payload = data.partition(SEPARATOR)
+    if not separator and action != SET_DEFAULT_WALLET:
+        for prefix, legacy_action in LEGACY_PREFIXES:
+            if action.startswith(prefix):
+                return legacy_action, action[len(prefix):]
+    return action, payload
+
+class CallbackRouter(CallbackQueryHandler):
+    """Routes a state's callback queries to handlers by action with one dict lookup
+
+    Replaces a list of regex-pattern handlers, which are tried one by one and
+    let an earlier prefix pattern shadow a later action.
+    """
+
+    def __init__(self, routes: Dict[str, HandlerCallback]):
+        self.routes = dict(routes)
+        super().__init__(self._dispatch, pattern=self.route)
+
+    def route(self, data: object) -> Optional[HandlerCallback]:
+        if not isinstance(data, str):
+            return None
+        handler = self.routes.get(data.partition(SEPARATOR)[0])
+        if handler is None:
+            handler = self.routes.get(unpack(data)[0])
+        return handler
+
+    async def _dispatch(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> object:
+        return await self.route(update.callback_query.data)(update, context)
@@ -0,0 +1,99 @@
+import functools
+from typing import Iterable, Tuple
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+from src.ui import callbacks
+
+# Buttons and markups are frozen by python-telegram-bot, so one instance can be
+# shared by every update instead of being rebuilt per call
+Row = Tuple[InlineKeyboardButton, ...]
+
+@functools.lru_cache(maxsize=4096)
+def button_row(text: str, callback_data: str) -> Row:
+    """Row with a single callback button, shared by every keyboard that shows it"""
+    return (InlineKeyboardButton(text, callback_data=callback_data),)
+
+def choice_keyboard(choices: Iterable[Tuple[str, str]], *tail: Row) -> InlineKeyboardMarkup:
+    """One row per (label, callback_data) choice, followed by the tail rows"""
+    return InlineKeyboardMarkup([*(button_row(label, data) for label, data in choices), *tail])
+
+# Rows used by several keyboards
+LOGIN_ROW = button_row("Login", callbacks.LOGIN)
+BACK_TO_MAIN_ROW = button_row("Back to Main Menu", callbacks.MAIN_MENU)
+BACK_TO_WALLET_ROW = button_row("Back to Wallet Menu", callbacks.WALLET_MENU)
+BACK_TO_TRANSFER_ROW = button_row("Back to Transfer Menu", callbacks.TRANSFER_MENU)
+CANCEL_TRANSFER_ROW = button_row("Cancel", callbacks.TRANSFER_MENU)
+
+LOGIN = InlineKeyboardMarkup((LOGIN_ROW,))
+LOGIN_AGAIN = InlineKeyboardMarkup((button_row("Login Again", callbacks.LOGIN),))
+BACK_TO_MAIN = InlineKeyboardMarkup((BACK_TO_MAIN_ROW,))
+BACK_TO_WALLET = InlineKeyboardMarkup((BACK_TO_WALLET_ROW,))
+BACK_TO_TRANSFER = InlineKeyboardMarkup((BACK_TO_TRANSFER_ROW,))
+
+START = InlineKeyboardMarkup((
+    LOGIN_ROW,
+    button_row("About Copperx", callbacks.ABOUT)
+))
+
+ABOUT = InlineKeyboardMarkup((
+    LOGIN_ROW,
+    button_row("Back to Start", callbacks.BACK_TO_START)
+))
+
+MAIN_MENU = InlineKeyboardMarkup((
+    button_row("👛 Wallet Management", callbacks.WALLET_MENU),
+    button_row("💸 Fund Transfers", callbacks.TRANSFER_MENU),
+    button_row("👤 My Profile", callbacks.PROFILE),
+    button_row("🔑 KYC Status", callbacks.KYC_STATUS),
+    button_row("📜 Transaction History", callbacks.TRANSACTION_HISTORY),
+    button_row("⚙️ Settings", callbacks.SETTINGS),
+    button_row("Logout", callbacks.LOGOUT)
+))
+
+WALLET_MENU = InlineKeyboardMarkup((
+    button_row("Deposit Funds", callbacks.DEPOSIT_FUNDS),
+    button_row("Set Default Wallet", callbacks.SET_DEFAULT_WALLET),
+    button_row("View Transaction History", callbacks.TRANSACTION_HISTORY),
+    BACK_TO_MAIN_ROW
+))
+
+TRANSFER_MENU = InlineKeyboardMarkup((
+    button_row("Send to Email Address", callbacks.EMAIL_TRANSFER),
+    button_row("Send to External Wallet", callbacks.WALLET_TRANSFER),
+    button_row("Withdraw to Bank Account", callbacks.BANK_WITHDRAWAL),
+    button_row("View Recent Transfers", callbacks.RECENT_TRANSFERS),
+    BACK_TO_MAIN_ROW
+))
+
+CONFIRM_EMAIL_TRANSFER = InlineKeyboardMarkup((
+    button_row("Confirm", callbacks.CONFIRM_EMAIL_TRANSFER),
+    CANCEL_TRANSFER_ROW
+))
+
+CONFIRM_WALLET_TRANSFER = InlineKeyboardMarkup((
+    button_row("Confirm", callbacks.CONFIRM_WALLET_TRANSFER),
+    CANCEL_TRANSFER_ROW
+))
+
+CONFIRM_BANK_WITHDRAWAL = InlineKeyboardMarkup((
+    button_row("Confirm", callbacks.CONFIRM_BANK_WITHDRAWAL),
+    CANCEL_TRANSFER_ROW
+))
+
+@functools.lru_cache(maxsize=1024)
+def history_keyboard(page: int, has_more: bool, action: str = callbacks.HISTORY_PAGE) -> InlineKeyboardMarkup:
+    """Prev/Next buttons for a page of transaction history or search results, then back to the main menu"""
+    navigation = []
+    if page > 1:
+        navigation.append(InlineKeyboardButton("⬅️ Prev", callback_data=callbacks.pack(action, str(page - 1))))
+    if has_more:
+        navigation.append(InlineKeyboardButton("Next ➡️", callback_data=callbacks.pack(action, str(page + 1))))
+    if not navigation:
+        return BACK_TO_MAIN
+    return InlineKeyboardMarkup((tuple(navigation), BACK_TO_MAIN_ROW))
+
+SETTINGS = InlineKeyboardMarkup((
+    button_row("Enable Notifications", callbacks.TOGGLE_NOTIFICATIONS),
+    BACK_TO_MAIN_ROW
+))
@@ -0,0 +1,182 @@
+# Message texts, built once at import. Templates are filled with str.format
+
+# Start and login
+WELCOME = (
+    "Welcome to Copperx Payout Bot! 🚀\n\n"
+    "This bot allows you to manage your Copperx account, view balances, and transfer funds directly from Telegram."
+)
+ABOUT = (
+    "Copperx is building a stablecoin bank for individuals and businesses.\n\n"
+    "Our platform allows you to manage USDC transactions easily and securely.\n\n"
+    "Visit https://copperx.io for more information."
+)
+SESSION_EXPIRED = "Your session has expired. Please log in again."
+MENU_EXPIRED = "This menu has expired. Please send /start to open a new one."
+LOGGED_OUT = (
+    "You have been logged out successfully.\n\n"
+    "Thank you for using the Copperx Payout Bot!"
+)
+MAIN_MENU = "Hello {name}! 👋\n\nWelcome to your Copperx dashboard. What would you like to do today?"
+
+# Input validation
+INVALID_EMAIL = "Invalid email format. Please enter a valid email address:"
+INVALID_AMOUNT = "Invalid amount. Please enter a valid number:"
+
+# Wallets
+WALLETS_HEADER = "Your Wallets:\n\n"
+WALLET_ENTRY = "{marker}Network: {network}\nAddress: {address_start}...{address_end}\nBalance: {balance}\n\n"
+BALANCES_UNAVAILABLE = "⚠️ Balances could not be loaded right now. Please try again shortly."
+WALLET_INFO_FAILED = "Failed to fetch wallet information. Please try again later."
+WALLETS_FAILED = "Failed to fetch your wallets. Please try again later."
+DEFAULT_WALLET_FAILED = "Failed to fetch your default wallet. Please try again later."
+SELECT_DEFAULT_WALLET = "Select your default wallet for transactions:"
+DEFAULT_WALLET_UPDATE_FAILED = "Failed to update default wallet: {error}"
+DEFAULT_WALLET_UPDATED = "Default wallet updated successfully!"
+DEPOSIT_INSTRUCTIONS = (
+    "To deposit funds to your Copperx account, please send USDC to your wallet address:\n\n"
+    "Network: {network}\n"
+    "Address: `{address}`\n\n"
+    "Important notes:\n"
+    "• Only send USDC to this address\n"
+    "• Ensure you're sending on the correct network\n"
+    "• Deposits typically reflect in your account within minutes\n"
+    "• You'll receive a notification when your deposit arrives"
+)
+
+# Transfers
+TRANSFER_MENU = "Select a transfer option:"
+BALANCE_FAILED = "Failed to fetch your balance. Please try again later."
+INSUFFICIENT_FUNDS = "Insufficient funds. Your current balance is {balance} USDC."
+TRANSFER_FAILED = "Transfer failed: {error}"
+CONFIRM_EMAIL_TRANSFER = (
+    "Please confirm the transfer:\n\n"
+    "To: {recipient}\n"
+    "Amount: {amount} USDC\n"
+    "Fee: 0 USDC\n"
+    "Total: {amount} USDC"
+)
+EMAIL_TRANSFER_SENT = (
+    "Success! {amount} USDC has been sent to {recipient}\n"
+    "Transfer ID: {transfer_id}"
+)
+CONFIRM_WALLET_TRANSFER = (
+    "Please confirm the transfer:\n\n"
+    "To address: {address_start}...{address_end}\n"
+    "Network: {network}\n"
+    "Amount: {amount} USDC\n"
+    "Fee: Varies by network\n"
+    "Total: ~{amount} USDC + network fees"
+)
+WALLET_TRANSFER_SENT = (
+    "Success! {amount} USDC has been sent to the wallet address\n"
+    "Transfer ID: {transfer_id}"
+)
+KYC_CHECK_FAILED = "Failed to verify KYC status. Please try again later."
+KYC_REQUIRED = (
+    "Bank withdrawals require completed KYC verification.\n\n"
+    "Please complete your KYC on the Copperx web platform first."
+)
+MINIMUM_WITHDRAWAL = "Minimum withdrawal amount is 10 USDC. Please enter a higher amount:"
+CONFIRM_BANK_WITHDRAWAL = (
+    "Please confirm the bank withdrawal:\n\n"
+    "Amount: {amount} USDC\n"
+    "Estimated Fee: {fee} USDC\n"
+    "Total to Receive: ~{receive} USDC\n\n"
+    "Funds will be sent to your default bank account."
+)
+WITHDRAWAL_FAILED = "Withdrawal failed: {error}"
+WITHDRAWAL_STARTED = (
+    "Success! Your bank withdrawal of {amount} USDC has been initiated.\n"
+    "Transfer ID: {transfer_id}\n\n"
+    "Funds should arrive in your bank account within 1-3 business days."
+)
+
+# Profile and KYC
+PROFILE_FAILED = "Failed to fetch your profile. Please try again later."
+PROFILE = (
+    "📋 Your Profile\n\n"
+    "👤 Name: {name}\n"
+    "📧 Email: {email}\n"
+    "🏢 Organization: {organization}\n"
+    "📅 Member Since: {created_at}\n"
+)
+KYC_FAILED = "Failed to fetch your KYC status. Please try again later."
+KYC_STATUS = (
+    "🔐 KYC Status\n\n"
+    "{emoji} Status: {status}\n"
+    "📋 Type: {kyc_type}\n\n"
+    "{description}"
+)
+KYC_STATUS_EMOJI = {
+    "APPROVED": "✅",
+    "PENDING": "⏳",
+    "REJECTED": "❌",
+    "NOT_STARTED": "🔴"
+}
+KYC_STATUS_TEXT = {
+    "APPROVED": "Your KYC verification has been approved.",
+    "PENDING": "Your KYC verification is being reviewed.",
+    "REJECTED": "Your KYC verification was rejected. Please check the web platform for details.",
+    "NOT_STARTED": "You haven't started the KYC verification process yet."
+}
+KYC_INCOMPLETE = "\n\nComplete KYC verification on the Copperx web platform to access all features."
+
+# Transaction history
+HISTORY_FAILED = "Failed to fetch your transaction history. Please try again later."
+NO_TRANSACTIONS = "You don't have any transactions yet."
+HISTORY_HEADER = "📜 Recent Transactions\n\n"
+HISTORY_PAGE_HEADER = "📜 Transactions, page {page}\n\n"
+NO_MORE_TRANSACTIONS = "There are no older transactions."
+HISTORY_ENTRY = "{icon} {direction} {amount} USDC - {created_at} - {status}\n"
+SEARCH_HEADER = "🔎 Matching transactions, page {page}\n\n"
+SEARCH_INDEXING = "Older transactions are still being indexed; results may be incomplete.\n\n"
+NO_MATCHING_TRANSACTIONS = "No transactions match your search."
+SEARCH_USAGE = (
+    "Search your transactions with /history followed by any of:\n\n"
+    "• deposit, withdrawal, email or wallet\n"
+    "• a status such as success, pending or failed\n"
+    "• from:2025-01-01 and to:2025-01-31\n"
+    "• min:10 and max:500 (USDC)\n\n"
+    "Example: /history deposit success from:2025-01-01 min:10"
+)
+SEARCH_INVALID = "I couldn't read that search: {error}\n\n"
+SEARCH_UNAVAILABLE = "Transaction search is not available right now. Use Transaction History from the main menu."
+EXPORT_USAGE = (
+    "Export your transaction history with /export csv or /export ndjson.\n\n"
+    "Add from:/to: dates for one period only, e.g. /export csv from:2025-01-01 to:2025-03-31"
+)
+EXPORT_STARTED = "📤 Preparing your transaction export..."
+EXPORT_PROGRESS = "📤 Exporting transactions... {count} so far"
+EXPORT_UPLOADING = "📤 Uploading {count} transactions..."
+EXPORT_DONE = "✅ Exported {count} transactions."
+EXPORT_CAPTION = "Copperx transactions, {count} rows"
+EXPORT_RUNNING = "Your previous export is still running. You'll get the file when it's ready."
+EXPORT_TOO_LARGE = "Your {count} transactions make a file larger than Telegram allows."
+EXPORT_TRY_CSV = EXPORT_TOO_LARGE + " Try /export csv{period}, which is smaller."
+EXPORT_TRY_PERIOD = EXPORT_TOO_LARGE + " Try a shorter period, e.g. /export {fmt} from:2025-01-01 to:2025-03-31"
+EXPORT_FAILED = "Failed to export your transaction history. Please try again later."
+
+# Notifications
+DEPOSIT_RECEIVED = "🎉 Deposit Received! {amount} USDC has been credited to your account."
+
+# Settings and help
+SETTINGS = (
+    "⚙️ Settings\n\n"
+    "Configure your preferences for the Copperx bot:"
+)
+HELP = (
+    "🤖 Copperx Payout Bot Help\n\n"
+    "Commands:\n"
+    "/start - Start or restart the bot\n"
+    "/history - Search your transactions\n"
+    "/export - Download your transaction history as CSV or NDJSON, optionally from:/to: a date\n"
+    "/help - Show this help message\n\n"
+    "Features:\n"
+    "• View wallet balances\n"
+    "• Send funds to email addresses\n"
+    "• Withdraw to external wallets\n"
+    "• Bank withdrawals\n"
+    "• Transaction history\n"
+    "• Account management\n\n"
+    "For support, please contact the Copperx team via https://t.me/copperxcommunity/2991"
+)
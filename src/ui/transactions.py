@@ -0,0 +1,109 @@
+import functools
+import string
+from datetime import date, datetime
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Tuple
+
+from src.ui import messages
+
+UNKNOWN = "Unknown"
+HISTORY_DATE_FORMAT = "%m/%d/%Y"
+
+# Icon and direction shown for each transaction type
+KINDS = {
+    "DEPOSIT": ("📥", "↓ IN"),
+    "WITHDRAWAL": ("📤", "↑ OUT"),
+    "EMAIL_TRANSFER": ("📤", "↑ OUT"),
+    "WALLET_TRANSFER": ("📤", "↑ OUT")
+}
+OTHER_KIND = ("🔄", "")
+
+# Per-row fields a template may use besides {icon} and {direction}, in the order rows supply them
+ROW_FIELDS = ("amount", "created_at", "status")
+
+@functools.lru_cache(maxsize=4096)
+def _format_day(day: date, date_format: str) -> str:
+    return day.strftime(date_format)
+
+def format_dates(values: Iterable[Any], date_format: str = HISTORY_DATE_FORMAT) -> List[Any]:
+    """Reformat a batch of ISO 8601 timestamps as date_format, keeping values that don't parse
+
+    Parsing is cheap but strftime is not, and a history holds many
+    timestamps per day, so the formatted text is memoized per day.
+    """
+    result = []
+    for value in values:
+        try:
+            value = _format_day(datetime.fromisoformat(value.replace("Z", "+00:00")).date(), date_format)
+        except (AttributeError, TypeError, ValueError):
+            pass
+        result.append(value)
+    return result
+
+def compile_template(template: str, icon: str, direction: str) -> Tuple[str, Tuple[int, ...]]:
+    """template with icon and direction filled in, as a %-format string and the ROW_FIELDS it takes in order
+
+    Raises ValueError for fields outside ROW_FIELDS or with a format spec.
+    """
+    parts, order = [], []
+    for literal, field, spec, conversion in string.Formatter().parse(template):
+        parts.append(literal.replace("%", "%%"))
+        if field is None:
+            continue
+        if spec or conversion:
+            raise ValueError(f"Transaction templates can't format {{{field}}} with a spec or conversion")
+        if field == "icon":
+            parts.append(icon.replace("%", "%%"))
+        elif field == "direction":
+            parts.append(direction.replace("%", "%%"))
+        elif field in ROW_FIELDS:
+            parts.append("%s")
+            order.append(ROW_FIELDS.index(field))
+        else:
+            raise ValueError(f"Transaction templates can't use {{{field}}}")
+    return "".join(parts), tuple(order)
+
+class TransactionRenderer:
+    """Renders lists of transactions through a template compiled once per transaction type
+
+    Each type's copy of the template has its icon and direction filled in
+    and becomes a %-format string, which is several times cheaper per row
+    than str.format with keywords. Dates are only parsed if the template
+    shows them, in one batch, and the rows are joined once.
+    """
+
+    def __init__(self, template: str, date_format: str = HISTORY_DATE_FORMAT):
+        self.date_format = date_format
+        self._templates = {}
+        for tx_type, (icon, direction) in KINDS.items():
+            self._templates[tx_type], order = compile_template(template, icon, direction)
+        self._other, order = compile_template(template, *OTHER_KIND)
+        self._shows_dates = ROW_FIELDS.index("created_at") in order
+        # Rows supply every field in ROW_FIELDS order; other templates pick theirs out
+        if order == tuple(range(len(ROW_FIELDS))):
+            self._pick = None
+        else:
+            self._pick = itemgetter(*order) if len(order) > 1 else lambda row: tuple(row[i] for i in order)
+
+    def rows(self, transactions: List[Dict]) -> List[str]:
+        """One formatted line per transaction"""
+        if self._shows_dates:
+            dates: Iterable[Any] = format_dates([tx.get("createdAt", UNKNOWN) for tx in transactions], self.date_format)
+        else:
+            dates = (None for _ in transactions)
+        templates, other, pick = self._templates, self._other, self._pick
+        if pick is None:
+            return [
+                templates.get(tx.get("type"), other) % (tx.get("amount", "0"), created_at, tx.get("status", UNKNOWN))
+                for tx, created_at in zip(transactions, dates)
+            ]
+        return [
+            templates.get(tx.get("type"), other) % pick((tx.get("amount", "0"), created_at, tx.get("status", UNKNOWN)))
+            for tx, created_at in zip(transactions, dates)
+        ]
+
+    def render(self, header: str, transactions: List[Dict]) -> str:
+        """The header followed by a line per transaction"""
+        return header + "".join(self.rows(transactions))
+
+history_renderer = TransactionRenderer(messages.HISTORY_ENTRY)
@@ -0,0 +1,123 @@
+import functools
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from telegram import CallbackQuery, InlineKeyboardMarkup, Message
+from telegram.error import BadRequest
+
+ViewKey = Tuple[int, int]
+
+# Telegram's limit on message text, counted in UTF-16 code units
+MAX_MESSAGE_LENGTH = 4096
+
+def _utf16_length(text: str) -> int:
+    return len(text.encode("utf-16-le")) // 2
+
+def split_text(text: str, limit: int = MAX_MESSAGE_LENGTH) -> List[str]:
+    """Split text into messages Telegram accepts, breaking between lines where possible"""
+    if _utf16_length(text) <= limit:
+        return [text]
+
+    chunks: List[str] = []
+    current, current_length = [], 0
+    for line in text.splitlines(keepends=True):
+        line_length = _utf16_length(line)
+        if current and current_length + line_length > limit:
+            chunks.append("".join(current))
+            current, current_length = [], 0
+        # A single line over the limit is cut wherever it has to be
+        while line_length > limit:
+            cut = limit
+            while _utf16_length(line[:cut]) > limit:
+                cut -= 1
+            chunks.append(line[:cut])
+            line = line[cut:]
+            line_length = _utf16_length(line)
+        current.append(line)
+        current_length += line_length
+    if current:
+        chunks.append("".join(current))
+    return chunks
+
+@functools.lru_cache(maxsize=4096)
+def _markup_json(reply_markup: InlineKeyboardMarkup) -> str:
+    # Markups hash and compare by their buttons, so prebuilt keyboards and the
+    # copies Telegram sends back in callbacks share one entry
+    return json.dumps(reply_markup.to_dict(), sort_keys=True)
+
+def render_digest(text: Optional[str], reply_markup: Optional[InlineKeyboardMarkup] = None) -> bytes:
+    """Fingerprint of a message's text and inline keyboard"""
+    markup = _markup_json(reply_markup) if reply_markup else ""
+    return hashlib.blake2b(f"{text}\0{markup}".encode(), digest_size=16).digest()
+
+class ViewCache:
+    """Digest of the last view rendered into each message, to skip edits that would change nothing
+
+    Each entry records the digest of what we rendered, of the message Telegram
+    returned (it trims whitespace and drops formatting, so the two can differ)
+    and of the message as it was before that edit. A callback's message shows
+    one of the latter two: the current view, or the old one when the user
+    tapped again before our edit landed. Any other content means the message
+    was changed elsewhere and the entry isn't trusted.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._views: "OrderedDict[ViewKey, Tuple[bytes, bytes, bytes]]" = OrderedDict()
+        self.edits = 0
+        self.skipped = 0
+        self.not_modified = 0
+
+    def is_current(self, key: ViewKey, shown: bytes, rendered: bytes) -> bool:
+        """Whether a message showing digest shown already displays the rendered view"""
+        if shown == rendered:
+            return True
+        entry = self._views.get(key)
+        return entry is not None and entry[0] == rendered and shown in entry[1:]
+
+    def remember(self, key: ViewKey, rendered: bytes, shown: bytes, previous: bytes) -> None:
+        self._views[key] = (rendered, shown, previous)
+        self._views.move_to_end(key)
+        while len(self._views) > self.max_entries:
+            self._views.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._views),
+            "edits_sent": self.edits,
+            "edits_skipped": self.skipped,
+            "not_modified_errors": self.not_modified
+        }
+
+view_cache = ViewCache(100000)
+
+async def edit_view(query: CallbackQuery, text: str, reply_markup: Optional[InlineKeyboardMarkup] = None,
+                    **kwargs: Any) -> Any:
+    """Edit the callback's message to show text and reply_markup, unless it already does"""
+    message = query.message
+    if message is None:
+        return await query.edit_message_text(text, reply_markup=reply_markup, **kwargs)
+
+    key = (message.chat_id, message.message_id)
+    rendered = render_digest(text, reply_markup)
+    shown = render_digest(message.text, message.reply_markup)
+    if view_cache.is_current(key, shown, rendered):
+        view_cache.skipped += 1
+        return message
+
+    try:
+        result = await query.edit_message_text(text, reply_markup=reply_markup, **kwargs)
+    except BadRequest as e:
+        # Formatting can make the view look different to us but not to Telegram
+        if "not modified" not in str(e).lower():
+            raise
+        view_cache.not_modified += 1
+        view_cache.remember(key, rendered, shown, shown)
+        return message
+
+    view_cache.edits += 1
+    if isinstance(result, Message):
+        view_cache.remember(key, rendered, render_digest(result.text, result.reply_markup), shown)
+    return result
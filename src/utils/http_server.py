@@ -0,0 +1,180 @@
+import asyncio
+import json
+from http import HTTPStatus
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from src.utils.logger import logger
+
+class Request:
+    """An HTTP request as seen by a route handler"""
+
+    __slots__ = ("method", "path", "query", "headers", "body")
+
+    def __init__(self, method: str, path: str, query: Dict[str, str], headers: Dict[str, str], body: bytes):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+
+    def json(self) -> Any:
+        return json.loads(self.body or b"null")
+
+class Response:
+    """An HTTP response returned by a route handler"""
+
+    __slots__ = ("status", "body", "headers")
+
+    def __init__(self, status: int = 200, body: bytes = b"", headers: Optional[Dict[str, str]] = None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+    @classmethod
+    def json(cls, data: Any, status: int = 200, headers: Optional[Dict[str, str]] = None) -> "Response":
+        return cls(status, json.dumps(data).encode(), {"Content-Type": "application/json", **(headers or {})})
+
+Handler = Callable[[Request], Awaitable[Response]]
+
+class HTTPServer:
+    """Minimal asyncio HTTP/1.1 server with keep-alive and exact-path routing
+
+    Every read is bounded in time and size, so a client that trickles its
+    headers or body, or holds an idle keep-alive connection, is dropped
+    instead of holding a connection open indefinitely.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, max_body_size: int = 1024 * 1024,
+                 header_timeout: float = 10, body_timeout: float = 30, idle_timeout: float = 60,
+                 max_headers: int = 100, max_header_bytes: int = 16 * 1024):
+        self.host = host
+        self.port = port
+        self.max_body_size = max_body_size
+        self.header_timeout = header_timeout
+        self.body_timeout = body_timeout
+        self.idle_timeout = idle_timeout
+        self.max_headers = max_headers
+        self.max_header_bytes = max_header_bytes
+        self._routes: Dict[Tuple[str, str], Handler] = {}
+        self._server: Optional[asyncio.base_events.Server] = None
+        self._connections: Set[asyncio.StreamWriter] = set()
+
+    def route(self, method: str, path: str, handler: Handler) -> None:
+        """Register a handler for a method and exact path"""
+        self._routes[(method.upper(), path)] = handler
+
+    async def start(self) -> None:
+        # The stream limit caps each line, so one oversized header fails before it is buffered whole
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port, limit=self.max_header_bytes
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"HTTP server listening on {self.host}:{self.port}")
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            # Idle keep-alive connections would otherwise hold wait_closed() open
+            for writer in list(self._connections):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._connections.add(writer)
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                if isinstance(request, Response):
+                    await self._write_response(writer, request, keep_alive=False)
+                    break
+
+                response = await self._dispatch(request)
+                keep_alive = request.headers.get("connection", "").lower() != "close"
+                await self._write_response(writer, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        # Waiting for the next request is how a keep-alive connection idles; close it quietly
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+        except asyncio.TimeoutError:
+            return None
+        except ValueError:
+            return Response(HTTPStatus.REQUEST_URI_TOO_LONG)
+        if not request_line.strip():
+            return None
+
+        try:
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            return Response(HTTPStatus.BAD_REQUEST)
+
+        try:
+            headers = await asyncio.wait_for(self._read_headers(reader), self.header_timeout)
+        except asyncio.TimeoutError:
+            return Response(HTTPStatus.REQUEST_TIMEOUT)
+        if headers is None:
+            return Response(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            return Response(HTTPStatus.BAD_REQUEST)
+        if length > self.max_body_size:
+            return Response(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        try:
+            body = await asyncio.wait_for(reader.readexactly(length), self.body_timeout) if length else b""
+        except asyncio.TimeoutError:
+            return Response(HTTPStatus.REQUEST_TIMEOUT)
+
+        url = urlsplit(target)
+        return Request(method.upper(), url.path, dict(parse_qsl(url.query)), headers, body)
+
+    async def _read_headers(self, reader: asyncio.StreamReader) -> Optional[Dict[str, str]]:
+        """The request's headers, or None once they exceed max_headers or max_header_bytes"""
+        headers: Dict[str, str] = {}
+        count = size = 0
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError:
+                return None
+            if line in (b"\r\n", b"\n", b""):
+                return headers
+            count += 1
+            size += len(line)
+            if count > self.max_headers or size > self.max_header_bytes:
+                return None
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+    async def _dispatch(self, request: Request) -> Response:
+        handler = self._routes.get((request.method, request.path))
+        if handler is None:
+            allowed = any(path == request.path for _, path in self._routes)
+            return Response(HTTPStatus.METHOD_NOT_ALLOWED if allowed else HTTPStatus.NOT_FOUND)
+
+        try:
+            return await handler(request)
+        except Exception as e:
+            logger.error(f"Error handling {request.method} {request.path}: {e}")
+            return Response(HTTPStatus.INTERNAL_SERVER_ERROR)
+
+    async def _write_response(self, writer: asyncio.StreamWriter, response: Response, keep_alive: bool) -> None:
+        status = HTTPStatus(response.status)
+        head = [f"HTTP/1.1 {status.value} {status.phrase}", f"Content-Length: {len(response.body)}"]
+        head.extend(f"{name}: {value}" for name, value in response.headers.items())
+        if not keep_alive:
+            head.append("Connection: close")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + response.body)
+        await writer.drain()
@@ -0,0 +1,29 @@
+from typing import Any, Callable, Dict, Iterable
+
+# Named metric sources; each returns a flat dict of current values
+_sources: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+def register(name: str, source: Callable[[], Dict[str, Any]]) -> None:
+    """Register a metrics source under a name"""
+    _sources[name] = source
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    """Collect the current values of every registered source"""
+    return {name: source() for name, source in _sources.items()}
+
+def percentile(samples: Iterable[float], fraction: float) -> float:
+    """The sample below which fraction of the samples fall, 0 when there are none"""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def format_snapshot() -> str:
+    """Render the metrics snapshot as plain text"""
+    lines = []
+    for name, values in snapshot().items():
+        lines.append(f"[{name}]")
+        for key, value in values.items():
+            lines.append(f"{key}: {value}")
+        lines.append("")
+    return "\n".join(lines).strip() or "No metrics registered"
@@ -0,0 +1,87 @@
+from src.config.config import EVENT_CACHE_INVALIDATIONS
+from src.services.account_events import BALANCES, AccountEvents
+from src.services.cache import ResponseCache
+
+def balances(entries):
+    return {"data": [{"walletId": wallet_id, "balance": balance} for wallet_id, balance in entries.items()]}
+
+def make_events():
+    cache = ResponseCache(100, {BALANCES: 300, "/transfers": 300})
+    return cache, AccountEvents(cache, EVENT_CACHE_INVALIDATIONS)
+
+def test_repeated_deposit_is_reported_and_not_reapplied():
+    cache, events = make_events()
+    cache.set("t1", BALANCES, balances({"w1": "10.00"}))
+    deposit = {"id": "d1", "walletId": "w1", "balance": "12.50"}
+
+    assert events.apply(["t1"], "deposit", deposit) is True
+    cache.set("t1", BALANCES, balances({"w1": "20.00"}))
+    assert events.apply(["t1"], "deposit", deposit) is False
+    assert cache.get("t1", BALANCES) == balances({"w1": "20.00"})
+    assert events.stats()["repeated_deposits"] == 1
+
+def test_events_without_an_id_are_always_new():
+    _, events = make_events()
+    assert events.apply(["t1"], "deposit", {"walletId": "w1", "balance": "1"}) is True
+    assert events.apply(["t1"], "deposit", {"walletId": "w1", "balance": "1"}) is True
+    assert events.apply(["t1"], "transfer", {"id": "x1"}) is True
+    assert events.apply(["t1"], "transfer", {"id": "x1"}) is True
+
+def test_deposit_with_balance_patches_that_wallet_for_every_token():
+    cache, events = make_events()
+    cache.set("t1", BALANCES, balances({"w1": "10.00", "w2": "5.00"}))
+    cache.set("t2", BALANCES, balances({"w1": "10.00"}))
+    cache.set("t1", "/transfers?page=1&limit=10", {"data": []})
+
+    events.apply(["t1", "t2"], "deposit", {"id": "d1", "walletId": "w1", "amount": "2.5", "balance": "12.50"})
+
+    assert cache.get("t1", BALANCES) == balances({"w1": "12.50", "w2": "5.00"})
+    assert cache.get("t2", BALANCES) == balances({"w1": "12.50"})
+    assert cache.get("t1", "/transfers?page=1&limit=10") is None, "a deposit makes the history stale"
+
+def test_already_credited_deposit_is_not_counted_twice():
+    cache, events = make_events()
+    # Fetched after the API credited the 2.50 deposit, before its event arrived
+    cache.set("t1", BALANCES, balances({"w1": "12.50"}))
+
+    events.apply(["t1"], "deposit", {"id": "d1", "walletId": "w1", "amount": "2.5"})
+
+    assert cache.get("t1", BALANCES) is None, "an amount alone must drop the balances, not add to them"
+
+def test_deposit_to_unknown_wallet_or_bad_balance_drops_balances():
+    cache, events = make_events()
+    cache.set("t1", BALANCES, balances({"w1": "10.00"}))
+    events.apply(["t1"], "deposit", {"id": "d1", "walletId": "w9", "balance": "1"})
+    assert cache.get("t1", BALANCES) is None
+
+    cache.set("t1", BALANCES, balances({"w1": "10.00"}))
+    events.apply(["t1"], "deposit", {"id": "d2", "walletId": "w1", "balance": "lots"})
+    assert cache.get("t1", BALANCES) is None
+
+def test_transfers_and_wallet_events_clear_balances():
+    cache, events = make_events()
+    cache.set("t1", BALANCES, balances({"w1": "12.50"}))
+    cache.set("t1", "/transfers?page=1&limit=10", {"data": []})
+    events.apply(["t1"], "withdrawal", {"walletId": "w1", "amount": "3"})
+    assert cache.get("t1", BALANCES) is None
+    assert cache.get("t1", "/transfers?page=1&limit=10") is None
+
+    cache.set("t1", BALANCES, balances({"w1": "12.50"}))
+    events.apply(["t1"], "wallet_updated", {"walletId": "w1"})
+    assert cache.get("t1", BALANCES) is None, "an unknown event naming a wallet clears balances"
+
+def test_event_about_no_wallet_leaves_balances_alone():
+    cache, events = make_events()
+    cache.set("t1", BALANCES, balances({"w1": "12.50"}))
+    events.apply(["t1"], "kyc_updated", {"status": "APPROVED"})
+    assert cache.get("t1", BALANCES) == balances({"w1": "12.50"})
+
+def test_fetch_in_flight_during_event_is_not_stored_over_it():
+    cache, events = make_events()
+    cache.set("t1", BALANCES, balances({"w1": "12.50"}))
+    generation = cache.generation("t1")
+
+    events.apply(["t1"], "deposit", {"id": "d3", "walletId": "w1", "balance": "13.50"})
+    cache.set("t1", BALANCES, balances({"w1": "12.50"}), generation)
+
+    assert cache.get("t1", BALANCES) == balances({"w1": "13.50"})
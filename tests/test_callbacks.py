@@ -0,0 +1,38 @@
+from src.ui import callbacks
+from src.ui.callbacks import CallbackRouter
+
+async def set_default(update, context):
+    return "set_default"
+
+async def set_default_wallet(update, context):
+    return "set_default_wallet"
+
+async def network(update, context):
+    return "network"
+
+ROUTER = CallbackRouter({
+    callbacks.SET_DEFAULT_WALLET: set_default_wallet,
+    callbacks.SET_DEFAULT: set_default,
+    callbacks.NETWORK: network
+})
+
+def test_pack_and_unpack_round_trip():
+    data = callbacks.pack(callbacks.NETWORK, "0b3c-wallet")
+    assert data == "network:0b3c-wallet"
+    assert callbacks.unpack(data) == (callbacks.NETWORK, "0b3c-wallet")
+    assert callbacks.unpack(callbacks.SET_DEFAULT_WALLET) == (callbacks.SET_DEFAULT_WALLET, "")
+
+def test_legacy_callback_data_unpacks_to_current_actions():
+    assert callbacks.unpack("set_default_0b3c-wallet") == (callbacks.SET_DEFAULT, "0b3c-wallet")
+    assert callbacks.unpack("network_0b3c-wallet") == (callbacks.NETWORK, "0b3c-wallet")
+
+def test_router_routes_current_and_legacy_data():
+    assert ROUTER.route("set_default_wallet") is set_default_wallet
+    assert ROUTER.route("set_default:0b3c-wallet") is set_default
+    assert ROUTER.route("set_default_0b3c-wallet") is set_default
+    assert ROUTER.route("network_0b3c-wallet") is network
+
+def test_router_ignores_unknown_data():
+    assert ROUTER.route("wallet_menu") is None
+    assert ROUTER.route("history_page_3") is None
+    assert ROUTER.route(None) is None
@@ -0,0 +1,15 @@
+from src.services.events import _parse_event
+
+def event_id(**event):
+    return _parse_event({"organizationId": "org", "event": "deposit", **event})[0]
+
+def test_event_ids_are_scoped_to_the_event_name():
+    assert event_id(id="1") == event_id(id="1")
+    assert event_id(id="1") != event_id(id="1", event="transfer.updated")
+
+def test_events_without_an_id_are_told_apart_by_payload():
+    pending = {"id": "tx-1", "status": "pending"}
+    assert event_id(data=pending) == event_id(data=dict(pending))
+    # Later events about the same transfer share its data id but are not retries
+    assert event_id(data=pending) != event_id(data={**pending, "status": "success"})
+    assert event_id(data=pending) != event_id(data=pending, event="transfer.updated")
@@ -0,0 +1,48 @@
+import asyncio
+import csv
+import io
+
+from src.services.export import CSV, export_transfers
+from src.services.transaction_index import parse_filter
+
+def make_api(days: int, per_day: int = 3):
+    """Newest-first /transfers with per_day transfers on each day of 2025 up to days"""
+    transfers = [
+        {"id": f"{day}-{n}", "createdAt": f"2025-{1 + day // 28:02d}-{1 + day % 28:02d}T{12 - n:02d}:00:00.000Z"}
+        for day in reversed(range(days)) for n in range(per_day)
+    ]
+    pages = []
+
+    async def fetch(token, page, limit):
+        pages.append(page)
+        start = (page - 1) * limit
+        return {"data": transfers[start:start + limit], "hasMore": start + limit < len(transfers)}
+
+    return fetch, pages
+
+def export_ids(fetch, terms: str = ""):
+    period = parse_filter(terms)
+    output, count = asyncio.run(export_transfers(fetch, "token", CSV, page_size=10, since=period.since, until=period.until))
+    rows = list(csv.DictReader(io.TextIOWrapper(output, encoding="utf-8", newline="")))
+    assert len(rows) == count
+    return [row["id"] for row in rows]
+
+def test_export_without_period_has_every_transfer():
+    fetch, pages = make_api(days=20)
+    assert len(export_ids(fetch)) == 60
+    assert pages == list(range(1, 7))
+
+def test_export_period_is_inclusive_of_both_days():
+    fetch, _ = make_api(days=20)
+    ids = export_ids(fetch, "from:2025-01-05 to:2025-01-07")
+    assert ids == [f"{day}-{n}" for day in (6, 5, 4) for n in range(3)]
+
+def test_export_stops_paging_once_past_the_start_of_the_period():
+    fetch, pages = make_api(days=20)
+    export_ids(fetch, "from:2025-01-15")
+    # Days 19..14 are the first 18 transfers; page 2 ends on day 13, before the period
+    assert pages == [1, 2]
+
+def test_export_period_with_nothing_in_it_is_empty():
+    fetch, _ = make_api(days=5)
+    assert export_ids(fetch, "from:2026-01-01") == []
@@ -0,0 +1,50 @@
+import asyncio
+
+from src.utils.http_server import HTTPServer, Response
+
+async def ok(request):
+    return Response(200, b"ok")
+
+def exchange(chunks, **limits):
+    """Send chunks to a fresh server on one connection and return everything it answers before closing"""
+    async def run():
+        server = HTTPServer(**limits)
+        server.route("POST", "/hook", ok)
+        await server.start()
+        reader, writer = await asyncio.open_connection(server.host, server.port)
+        for chunk in chunks:
+            if isinstance(chunk, float):
+                await asyncio.sleep(chunk)
+            else:
+                writer.write(chunk)
+        answer = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+        await server.stop()
+        return answer
+
+    return asyncio.run(run())
+
+def test_request_within_limits_is_answered():
+    answer = exchange([b"POST /hook HTTP/1.1\r\nContent-Length: 2\r\nConnection: close\r\n\r\nhi"])
+    assert answer.startswith(b"HTTP/1.1 200 OK") and answer.endswith(b"ok")
+
+def test_trickled_headers_time_out():
+    answer = exchange([b"POST /hook HTTP/1.1\r\nX-Slow: 1\r\n", 0.3, b"\r\n"], header_timeout=0.1)
+    assert answer.startswith(b"HTTP/1.1 408")
+
+def test_trickled_body_times_out():
+    answer = exchange([b"POST /hook HTTP/1.1\r\nContent-Length: 10\r\n\r\nhi"], body_timeout=0.1)
+    assert answer.startswith(b"HTTP/1.1 408")
+
+def test_too_many_headers_are_refused():
+    headers = b"".join(b"X-%d: 1\r\n" % n for n in range(20))
+    answer = exchange([b"POST /hook HTTP/1.1\r\n" + headers + b"\r\n"], max_headers=10)
+    assert answer.startswith(b"HTTP/1.1 431")
+
+def test_oversized_headers_are_refused():
+    answer = exchange([b"POST /hook HTTP/1.1\r\nX-Big: " + b"a" * 4096 + b"\r\n\r\n"], max_header_bytes=1024)
+    assert answer.startswith(b"HTTP/1.1 431")
+
+def test_idle_keep_alive_connection_is_closed():
+    answer = exchange([b"POST /hook HTTP/1.1\r\nContent-Length: 0\r\n\r\n"], idle_timeout=0.1)
+    assert answer.startswith(b"HTTP/1.1 200 OK") and answer.count(b"HTTP/1.1") == 1
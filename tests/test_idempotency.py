@@ -0,0 +1,79 @@
+import asyncio
+
+from src.services.idempotency import IdempotencyLedger
+from src.services.persistence import SQLiteDatabase
+
+def make_submit(results):
+    """A POST returning the next of results, counting how often it really ran"""
+    calls = []
+
+    async def submit():
+        calls.append(len(calls))
+        await asyncio.sleep(0.01)
+        return results[len(calls) - 1]
+
+    return submit, calls
+
+def test_same_key_is_submitted_once():
+    ledger = IdempotencyLedger(100, 60)
+    submit, calls = make_submit([{"data": {"id": "t1"}}])
+
+    async def run():
+        concurrent = await asyncio.gather(*(ledger.run("k", submit) for _ in range(3)))
+        return concurrent + [await ledger.run("k", submit)]
+
+    assert asyncio.run(run()) == [{"data": {"id": "t1"}}] * 4
+    assert len(calls) == 1
+    assert ledger.stats()["joined"] == 2 and ledger.stats()["replayed"] == 1
+
+def test_cancelled_caller_still_records_the_outcome():
+    ledger = IdempotencyLedger(100, 60)
+    submit, calls = make_submit([{"data": {"id": "t1"}}])
+
+    async def run():
+        caller = asyncio.ensure_future(ledger.run("k", submit))
+        await asyncio.sleep(0)
+        caller.cancel()
+        await asyncio.sleep(0.05)
+        assert ledger.stats()["in_flight"] == 0
+        return await ledger.run("k", submit)
+
+    assert asyncio.run(run()) == {"data": {"id": "t1"}}
+    assert len(calls) == 1
+
+def test_failure_of_a_cancelled_caller_is_not_replayed():
+    ledger = IdempotencyLedger(100, 60)
+    submit, calls = make_submit([{"error": "timeout"}, {"data": {"id": "t1"}}])
+
+    async def run():
+        caller = asyncio.ensure_future(ledger.run("k", submit))
+        await asyncio.sleep(0)
+        caller.cancel()
+        await asyncio.sleep(0.05)
+        return await ledger.run("k", submit)
+
+    assert asyncio.run(run()) == {"data": {"id": "t1"}}
+    assert len(calls) == 2
+
+def test_recorded_outcome_survives_a_restart(tmp_path):
+    path = str(tmp_path / "bot.sqlite3")
+    submit, calls = make_submit([{"data": {"id": "t1"}}, {"data": {"id": "t2"}}])
+
+    async def first_process():
+        ledger = IdempotencyLedger(100, 60)
+        ledger.use_database(SQLiteDatabase(path))
+        result = await ledger.run("k", submit)
+        await ledger.stop()
+        ledger.database.close()
+        return result
+
+    async def second_process():
+        ledger = IdempotencyLedger(100, 60)
+        ledger.use_database(SQLiteDatabase(path))
+        result = await ledger.run("k", submit)
+        ledger.database.close()
+        return result
+
+    assert asyncio.run(first_process()) == {"data": {"id": "t1"}}
+    assert asyncio.run(second_process()) == {"data": {"id": "t1"}}
+    assert len(calls) == 1
@@ -0,0 +1,37 @@
+import asyncio
+import time
+
+from telegram.error import RetryAfter
+
+from src.services.outbound import OutboundScheduler
+
+class FloodedBot:
+    """Answers the first sendMessage with RetryAfter, then records when each chat is sent to"""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        self.sent_at = {}
+
+    async def send_message(self, chat_id, text):
+        if not self.sent_at and self.retry_after:
+            retry_after, self.retry_after = self.retry_after, 0
+            raise RetryAfter(retry_after)
+        self.sent_at[chat_id] = time.monotonic()
+        return text
+
+def test_retry_after_holds_back_every_chat():
+    async def run():
+        scheduler = OutboundScheduler(global_rate=100, chat_rate=100)
+        bot = FloodedBot(retry_after=1)
+        scheduler.start(bot)
+        started = time.monotonic()
+        first = scheduler.send_message(1, "first")
+        await asyncio.sleep(0.05)
+        second = scheduler.send_message(2, "second")
+        results = await asyncio.gather(first, second)
+        await scheduler.stop()
+        return results, {chat_id: at - started for chat_id, at in bot.sent_at.items()}
+
+    results, sent_after = asyncio.run(run())
+    assert results == ["first", "second"]
+    assert sent_after[1] >= 1 and sent_after[2] >= 1
@@ -0,0 +1,56 @@
+import asyncio
+import json
+import os
+import sqlite3
+import stat
+
+from src.services.persistence import SQLiteDatabase, SQLitePersistence
+
+def mode(path: str) -> int:
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+def test_database_and_wal_files_are_private(tmp_path):
+    path = str(tmp_path / "bot.sqlite3")
+    old_umask = os.umask(0o022)
+    try:
+        database = SQLiteDatabase(path)
+        database.write([("INSERT OR REPLACE INTO sessions (user_id, data, updated_at) VALUES (?, ?, ?)", [(1, "{}", 0.0)])])
+        files = [path, f"{path}-wal", f"{path}-shm"]
+        assert all(os.path.exists(file) for file in files)
+        assert [mode(file) for file in files] == [0o600] * 3
+        database.close()
+    finally:
+        os.umask(old_umask)
+
+def test_existing_readable_files_are_made_private(tmp_path):
+    path = str(tmp_path / "bot.sqlite3")
+    SQLiteDatabase(path).close()
+    for file in (path, f"{path}-wal"):
+        open(file, "ab").close()
+        os.chmod(file, 0o644)
+
+    database = SQLiteDatabase(path)
+    assert mode(path) == 0o600 and mode(f"{path}-wal") == 0o600
+    database.close()
+
+def test_failed_conversation_write_is_retried_without_losing_newer_states(tmp_path):
+    database = SQLiteDatabase(str(tmp_path / "bot.sqlite3"))
+    persistence = SQLitePersistence(database, update_interval=60)
+    write_async = database.write_async
+
+    async def failing_write(statements):
+        # A state changes while the doomed write is running
+        persistence._pending[("conversation", json.dumps([1, 1]))] = json.dumps(2)
+        raise sqlite3.OperationalError("database is locked")
+
+    async def run():
+        database.write_async = failing_write
+        await persistence.update_conversation("conversation", (1, 1), 1)
+        await persistence.update_conversation("conversation", (2, 2), 1)
+        await persistence.flush()
+        database.write_async = write_async
+        await persistence.flush()
+        return await persistence.get_conversations("conversation")
+
+    assert asyncio.run(run()) == {(1, 1): 2, (2, 2): 1}
+    database.close()
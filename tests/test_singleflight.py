@@ -0,0 +1,73 @@
+import asyncio
+
+import httpx
+import pytest
+
+from src.services import api_service
+from src.services.http_client import close_http_client, use_http_client
+from src.services.singleflight import SingleFlight
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """A mock Copperx API that counts the requests reaching it, with the response cache disabled"""
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append((request.headers.get("Authorization"), request.url.path))
+        await asyncio.sleep(0.02)
+        return httpx.Response(200, json={"data": [{"walletId": "w1", "balance": "10"}]})
+
+    # Count coalescing alone, not the response cache in front of it
+    monkeypatch.setattr(api_service.response_cache, "ttls", {})
+    use_http_client(httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    yield calls
+    asyncio.run(close_http_client(None))
+
+def gather(make_calls):
+    """Run the coroutines make_calls returns concurrently on a fresh event loop"""
+    async def run():
+        return await asyncio.gather(*make_calls())
+    return asyncio.run(run())
+
+@pytest.mark.parametrize("endpoint", ["/wallets/balances", "/auth/me"])
+def test_concurrent_identical_gets_make_one_upstream_request(upstream, endpoint):
+    results = gather(lambda: [api_service.api_request("get", endpoint, token="token-1") for _ in range(50)])
+
+    assert len(upstream) == 1
+    assert all(result is results[0] for result in results)
+    assert results[0] == {"data": [{"walletId": "w1", "balance": "10"}]}
+
+def test_different_tokens_do_not_share_a_request(upstream):
+    gather(lambda: [
+        api_service.api_request("get", "/auth/me", token="token-1"),
+        api_service.api_request("get", "/auth/me", token="token-2")
+    ])
+
+    assert sorted(token for token, _ in upstream) == ["Bearer token-1", "Bearer token-2"]
+
+def test_sequential_gets_are_not_coalesced(upstream):
+    for _ in range(3):
+        asyncio.run(api_service.api_request("get", "/wallets/balances", token="token-1"))
+
+    assert len(upstream) == 3
+
+def test_cancelled_caller_does_not_cancel_the_shared_call():
+    flight = SingleFlight()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.02)
+        return "result"
+
+    async def run():
+        first = asyncio.ensure_future(flight.do("key", fetch))
+        second = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run()) == "result"
+    assert calls == 1
+    assert flight.stats() == {"in_flight": 0, "calls": 1, "coalesced": 1}